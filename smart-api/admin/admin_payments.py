@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, case, and_, true
 from datetime import datetime, timedelta
 
 from database import get_db
@@ -74,53 +74,50 @@ def get_my_earnings(
     if not profile:
         raise HTTPException(status_code=404, detail="Admin profile not found")
     
-    query = db.query(AdminPayment).filter(
-        AdminPayment.admin_id == profile.id,
-        AdminPayment.status == "completed"
-    )
-    
+    # Requested range; the month totals are not limited by it
+    in_range = []
     if start_date:
         start = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(AdminPayment.payment_date >= start)
+        in_range.append(AdminPayment.payment_date >= start)
     
     if end_date:
         end = datetime.strptime(end_date, "%Y-%m-%d")
-        query = query.filter(AdminPayment.payment_date <= end)
-    
-    payments = query.all()
+        in_range.append(AdminPayment.payment_date <= end)
     
-    # Calculate totals by payment type
-    salary_total = sum(p.amount for p in payments if p.payment_type == "salary")
-    bonus_total = sum(p.amount for p in payments if p.payment_type == "bonus")
-    commission_total = sum(p.amount for p in payments if p.payment_type == "commission")
-    allowance_total = sum(p.amount for p in payments if p.payment_type == "allowance")
+    in_range = and_(*in_range) if in_range else true()
     
-    total_earnings = salary_total + bonus_total + commission_total + allowance_total
-    
-    # Current month earnings
     today = datetime.utcnow()
-    first_day_of_month = today.replace(day=1)
-    
-    current_month_payments = db.query(AdminPayment).filter(
-        AdminPayment.admin_id == profile.id,
-        AdminPayment.status == "completed",
-        AdminPayment.payment_date >= first_day_of_month
-    ).all()
-    
-    current_month_total = sum(p.amount for p in current_month_payments)
-    
-    # Last month earnings
+    first_day_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     first_day_last_month = (first_day_of_month - timedelta(days=1)).replace(day=1)
-    last_day_last_month = first_day_of_month - timedelta(days=1)
     
-    last_month_payments = db.query(AdminPayment).filter(
+    def amount_where(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), AdminPayment.amount), else_=0)), 0)
+    
+    # Totals by payment type plus current and last month, in one aggregate query
+    totals = db.query(
+        amount_where(in_range, AdminPayment.payment_type == "salary").label("salary"),
+        amount_where(in_range, AdminPayment.payment_type == "bonus").label("bonus"),
+        amount_where(in_range, AdminPayment.payment_type == "commission").label("commission"),
+        amount_where(in_range, AdminPayment.payment_type == "allowance").label("allowance"),
+        func.count(case((in_range, AdminPayment.id))).label("payment_count"),
+        amount_where(AdminPayment.payment_date >= first_day_of_month).label("current_month"),
+        amount_where(
+            AdminPayment.payment_date >= first_day_last_month,
+            AdminPayment.payment_date < first_day_of_month,
+        ).label("last_month"),
+    ).filter(
         AdminPayment.admin_id == profile.id,
-        AdminPayment.status == "completed",
-        AdminPayment.payment_date >= first_day_last_month,
-        AdminPayment.payment_date <= last_day_last_month
-    ).all()
+        AdminPayment.status == "completed"
+    ).one()
+    
+    salary_total = float(totals.salary)
+    bonus_total = float(totals.bonus)
+    commission_total = float(totals.commission)
+    allowance_total = float(totals.allowance)
     
-    last_month_total = sum(p.amount for p in last_month_payments)
+    total_earnings = salary_total + bonus_total + commission_total + allowance_total
+    current_month_total = float(totals.current_month)
+    last_month_total = float(totals.last_month)
     
     # Calculate percentage change
     percentage_change = 0
@@ -141,7 +138,7 @@ def get_my_earnings(
             "allowance": float(allowance_total)
         },
         "salary": profile.salary,
-        "payment_count": len(payments)
+        "payment_count": totals.payment_count
     }
 
 @router.get("/my-upcoming-payments", response_model=List[AdminPaymentResponse])
@@ -0,0 +1,244 @@
+# admin/exports.py
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import (
+    User, Client, Workers, Booking, Payment, WorkerPayments, AdminPayment, AdminProfile,
+)
+from authentication import require_admin
+
+router = APIRouter(prefix="/admin/export", tags=["admin-export"])
+
+# Rows fetched per round trip; memory use is bounded by this, not the table size
+EXPORT_BATCH_SIZE = 1000
+# Output is buffered into chunks of about this many bytes before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+# ==========================
+# DATASETS
+# ==========================
+# Each dataset is a column-only query (no ORM objects, no relationship loads)
+# plus the column used for the start_date/end_date filter.
+class ExportDataset(NamedTuple):
+    query: Callable[[Session], object]
+    date_column: object
+
+
+def _bookings_query(db: Session):
+    return (
+        db.query(
+            Booking.id,
+            Booking.public_id,
+            Booking.status,
+            Booking.payment_status,
+            Booking.date_of_booking,
+            Booking.appointment_datetime,
+            Booking.location,
+            Booking.total_price,
+            Booking.deposit_paid,
+            Booking.rating,
+            Booking.client_id,
+            Client.first_name.label("client_first_name"),
+            Client.last_name.label("client_last_name"),
+            Booking.worker_id,
+            Workers.first_name.label("worker_first_name"),
+            Workers.last_name.label("worker_last_name"),
+            Booking.service_feature_id,
+        )
+        .outerjoin(Client, Client.id == Booking.client_id)
+        .outerjoin(Workers, Workers.id == Booking.worker_id)
+        .order_by(Booking.id)
+    )
+
+
+def _payments_query(db: Session):
+    return (
+        db.query(
+            Payment.id,
+            Payment.booking_id,
+            Booking.public_id.label("booking_public_id"),
+            Payment.type,
+            Payment.status,
+            Payment.amount,
+            Payment.currency,
+            Payment.stripe_payment_intent,
+            Payment.stripe_charge_id,
+            Payment.created_at,
+        )
+        .outerjoin(Booking, Booking.id == Payment.booking_id)
+        .order_by(Payment.id)
+    )
+
+
+def _payroll_query(db: Session):
+    return (
+        db.query(
+            WorkerPayments.id,
+            WorkerPayments.worker_id,
+            Workers.first_name.label("worker_first_name"),
+            Workers.last_name.label("worker_last_name"),
+            WorkerPayments.amount,
+            WorkerPayments.payment_date,
+            WorkerPayments.payment_method,
+            WorkerPayments.paid_by,
+            WorkerPayments.payment_reference,
+            WorkerPayments.reference_number,
+            WorkerPayments.work_done.label("booking_id"),
+        )
+        .outerjoin(Workers, Workers.id == WorkerPayments.worker_id)
+        .order_by(WorkerPayments.id)
+    )
+
+
+def _admin_payments_query(db: Session):
+    # Bank account numbers are deliberately left out of exports
+    return (
+        db.query(
+            AdminPayment.id,
+            AdminPayment.admin_id,
+            AdminProfile.first_name.label("admin_first_name"),
+            AdminProfile.last_name.label("admin_last_name"),
+            AdminPayment.amount,
+            AdminPayment.currency,
+            AdminPayment.payment_type,
+            AdminPayment.payment_method,
+            AdminPayment.payment_reference,
+            AdminPayment.status,
+            AdminPayment.payment_period_start,
+            AdminPayment.payment_period_end,
+            AdminPayment.payment_date,
+            AdminPayment.processed_at,
+            AdminPayment.created_at,
+        )
+        .outerjoin(AdminProfile, AdminProfile.id == AdminPayment.admin_id)
+        .order_by(AdminPayment.id)
+    )
+
+
+DATASETS: Dict[str, ExportDataset] = {
+    "bookings": ExportDataset(_bookings_query, Booking.date_of_booking),
+    "payments": ExportDataset(_payments_query, Payment.created_at),
+    "payroll": ExportDataset(_payroll_query, WorkerPayments.payment_date),
+    "admin-payments": ExportDataset(_admin_payments_query, AdminPayment.created_at),
+}
+
+
+# ==========================
+# ENCODING
+# ==========================
+def _cell(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(columns, rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(columns, rows) -> Iterator[str]:
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps({name: _cell(value) for name, value in zip(columns, row)}, default=str) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(parts)
+            parts, size = [], 0
+    yield "".join(parts)
+
+
+def _gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # wbits=31 writes a gzip header, so the output is a valid .gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_dataset(
+    dataset: ExportDataset,
+    fmt: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Iterator[bytes]:
+    """Yield the encoded export, fetching EXPORT_BATCH_SIZE rows at a time.
+
+    The request's session is closed before a streaming body is sent, so the
+    export runs on its own session for the life of the generator.
+    """
+    db = SessionLocal()
+    try:
+        query = dataset.query(db)
+        if start_date:
+            query = query.filter(dataset.date_column >= datetime.combine(start_date, time.min))
+        if end_date:
+            # end_date is inclusive of the whole day
+            query = query.filter(dataset.date_column < datetime.combine(end_date + timedelta(days=1), time.min))
+
+        columns = [column["name"] for column in query.column_descriptions]
+        rows = query.yield_per(EXPORT_BATCH_SIZE)
+        lines = _csv_lines(columns, rows) if fmt == "csv" else _ndjson_lines(columns, rows)
+        for text in lines:
+            if text:
+                yield text.encode("utf-8")
+    finally:
+        db.close()
+
+
+# ==========================
+# EXPORT ENDPOINT
+# ==========================
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    gzip: bool = Query(False),
+    current_user: User = Depends(require_admin),
+):
+    """Stream a full dataset as CSV or NDJSON"""
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset. Choose one of: {', '.join(DATASETS)}"
+        )
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    body = stream_dataset(DATASETS[dataset], format, start_date, end_date)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d}.{format}"
+    if gzip:
+        body = _gzipped(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,5 +1,5 @@
 # hr/router.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from sqlalchemy import func, desc
@@ -12,8 +12,12 @@ from schemas import (
     WorkerPerformanceResponse,
     HRDashboardStats,
     PayrollSummary,
-    WorkerVerificationRequest
+    WorkerVerificationRequest,
+    BulkImportReport
 )
+from workers.bulk_import import import_workers
+from observability.queries import query_budget
+from outbox import WORKER_VERIFIED, record
 
 router = APIRouter(prefix="/hr", tags=["hr"])
 
@@ -84,6 +88,30 @@ def get_verification_requests(
     
     return workers
 
+@router.post("/workers/import", response_model=BulkImportReport)
+def bulk_import_workers(
+    rows: UploadFile = File(..., description="CSV or JSONL file, one worker per row"),
+    documents: Optional[UploadFile] = File(None, description="Zip of the files named in document columns"),
+    organization_id: Optional[int] = Form(None, description="Agency for rows without an organization_id"),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(require_hr),
+    db: Session = Depends(get_db)
+):
+    """Onboard many workers at once (see workers/bulk_import.py for the file format).
+
+    All rows are validated first; valid rows are inserted in batches and the
+    rest are listed in the report with their row number and reason.
+    """
+    return import_workers(
+        db,
+        rows.file,
+        rows.filename or "",
+        documents.file if documents and documents.filename else None,
+        organization_id=organization_id,
+        dry_run=dry_run,
+    )
+
+
 @router.post("/workers/{worker_id}/verify")
 def verify_worker(
     worker_id: int,
@@ -104,28 +132,17 @@ def verify_worker(
             worker.verification_good_conduct = True
         if verification_data.verify_company_reg:
             worker.verification_company_registration = True
-        
-        # Create notification for worker
-        notification = Notification(
-            user_id=worker.user_id,
-            title="Account Verified",
-            message="Your account has been verified by HR. You can now accept bookings.",
-            is_read=False
-        )
-        db.add(notification)
-        
         message = "Worker verified successfully"
     else:
-        # Reject with reason
-        notification = Notification(
-            user_id=worker.user_id,
-            title="Verification Rejected",
-            message=f"Your verification was rejected. Reason: {verification_data.rejection_reason}",
-            is_read=False
-        )
-        db.add(notification)
         message = "Worker verification rejected"
-    
+
+    # The worker is notified by the outbox dispatcher after commit
+    record(db, WORKER_VERIFIED, {
+        "worker_id": worker.id,
+        "worker_user_id": worker.user_id,
+        "approved": verification_data.approve,
+        "rejection_reason": verification_data.rejection_reason,
+    })
     db.commit()
     
     return {"message": message}
@@ -134,6 +151,7 @@ def verify_worker(
 # WORKER PERFORMANCE
 # ==========================
 @router.get("/workers/performance", response_model=List[WorkerPerformanceResponse])
+@query_budget(5)
 def get_worker_performance(
     current_user: User = Depends(require_hr),
     db: Session = Depends(get_db),
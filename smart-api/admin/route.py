@@ -1,17 +1,17 @@
 # admin/router.py
-import os
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Form
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from sqlalchemy import func, or_, and_
-from uuid import uuid4
-from pathlib import Path
-import shutil
+from sqlalchemy import func, or_, and_, case, desc
 from datetime import datetime, timedelta
 
 from database import get_db
 from models import User, Client, Workers, Booking, Payment, Notification, AdminProfile, AdminPayment
 from authentication import create_access_token, require_admin,require_staff,get_current_user,get_password_hash
+from bookings.dispatch import rank_workers, record_assignment, workers_holding_requests
+from outbox import PAYMENT_SUCCEEDED, record
+from ratelimit import ANALYTICS_PER_ROUTE, ANALYTICS_PER_USER, rate_limit
+from storage import StagedUpload, staged_file, IMAGE_TYPES
 from schemas import (
     AdminDashboardStats,
     PaginatedUsersResponse,
@@ -21,7 +21,8 @@ from schemas import (
     AdminProfileResponse,
     AdminRegister,
     Token,
-    AdminProfileComplete
+    AdminProfileComplete,
+    WorkerMatch
     
 )
 
@@ -83,22 +84,11 @@ def register_admin(
     
 
 
-# Upload directory for admin profile pictures
-ADMIN_UPLOAD_DIR = Path("uploads/admins")
-ADMIN_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-def save_admin_file(upload_file: UploadFile, user_id: int, file_type: str) -> str:
-    """Save uploaded file for admin"""
-    if not upload_file:
+def save_admin_file(upload: Optional[StagedUpload]) -> Optional[str]:
+    """Store an uploaded admin file (already received and hashed, see storage/)"""
+    if not upload:
         return None
-    
-    filename = f"{user_id}_{file_type}_{uuid4()}{Path(upload_file.filename).suffix}"
-    file_path = ADMIN_UPLOAD_DIR / filename
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    
-    return str(file_path)
+    return upload.commit()
 
 # ==========================
 # ADMIN PROFILE MANAGEMENT
@@ -147,7 +137,7 @@ def create_admin_profile(
     
    
     # Profile Picture
-    profile_picture: Optional[UploadFile] = File(None),
+    profile_picture: Optional[StagedUpload] = Depends(staged_file("profile_picture", IMAGE_TYPES)),
     
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -178,7 +168,7 @@ def create_admin_profile(
     # Save profile picture
     profile_pic_path = None
     if profile_picture:
-        profile_pic_path = save_admin_file(profile_picture, current_user.id, "profile")
+        profile_pic_path = save_admin_file(profile_picture)
     
     # Create admin profile
     admin_profile = AdminProfile(
@@ -237,7 +227,7 @@ def update_admin_profile(
     
  
     # Profile Picture
-    profile_picture: Optional[UploadFile] = File(None),
+    profile_picture: Optional[StagedUpload] = Depends(staged_file("profile_picture", IMAGE_TYPES)),
     
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -291,14 +281,9 @@ def update_admin_profile(
   
     # Update profile picture if provided
     if profile_picture:
-        # Delete old profile picture if exists
-        if profile.profile_picture and os.path.exists(profile.profile_picture):
-            try:
-                os.remove(profile.profile_picture)
-            except:
-                pass
-        
-        profile.profile_picture = save_admin_file(profile_picture, current_user.id, "profile")
+        # The old file is kept: stored files are deduplicated by content and
+        # may be referenced by other records
+        profile.profile_picture = save_admin_file(profile_picture)
     
     profile.updated_at = datetime.utcnow()
     
@@ -791,6 +776,23 @@ def get_all_bookings(
         "limit": limit
     }
 
+def _assign_worker(booking: Booking, worker: Workers, db: Session):
+    booking.worker_id = worker.id
+    booking.status = "assigned"
+    db.commit()
+    
+    # Create notification for worker
+    notification = Notification(
+        user_id=worker.user_id,
+        title="New Booking Assigned",
+        message=f"You have been assigned to booking {booking.public_id}",
+        booking_id=booking.id
+    )
+    db.add(notification)
+    db.commit()
+    
+    record_assignment(worker.id)
+
 @router.put("/bookings/{booking_id}/assign-worker")
 def assign_worker_to_booking(
     booking_id: int,
@@ -808,21 +810,62 @@ def assign_worker_to_booking(
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     
-    booking.worker_id = worker_id
-    booking.status = "assigned"
-    db.commit()
+    _assign_worker(booking, worker, db)
     
-    # Create notification for worker
-    notification = Notification(
-        user_id=worker.user_id,
-        title="New Booking Assigned",
-        message=f"You have been assigned to booking {booking.public_id}",
-        booking_id=booking_id
+    return {"message": "Worker assigned successfully"}
+
+def _rank_booking_workers(booking: Booking, db: Session, limit: int):
+    return rank_workers(
+        db,
+        category_id=booking.feature.category_id if booking.feature else None,
+        appointment_datetime=booking.appointment_datetime,
+        location=booking.location,
+        language_id=booking.preferred_worker_language,
+        limit=limit,
+        exclude=workers_holding_requests(db, booking.appointment_datetime),
     )
-    db.add(notification)
-    db.commit()
+
+@router.get("/bookings/{booking_id}/matches", response_model=List[WorkerMatch])
+def get_booking_worker_matches(
+    booking_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Rank the workers best suited to a booking"""
     
-    return {"message": "Worker assigned successfully"}
+    booking = db.query(Booking).options(
+        joinedload(Booking.feature)
+    ).filter(Booking.id == booking_id).first()
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    
+    return _rank_booking_workers(booking, db, limit)
+
+@router.post("/bookings/{booking_id}/auto-assign")
+def auto_assign_worker_to_booking(
+    booking_id: int,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Assign the best ranked worker to a booking"""
+    
+    booking = db.query(Booking).options(
+        joinedload(Booking.feature)
+    ).filter(Booking.id == booking_id).first()
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if booking.worker_id is not None:
+        raise HTTPException(status_code=400, detail="Booking already has a worker")
+    
+    matches = _rank_booking_workers(booking, db, 1)
+    if not matches:
+        raise HTTPException(status_code=409, detail="No available worker matches this booking")
+    
+    worker = db.query(Workers).filter(Workers.id == matches[0]["worker_id"]).first()
+    _assign_worker(booking, worker, db)
+    
+    return {"message": "Worker assigned successfully", "match": matches[0]}
 
 # ==========================
 # PAYMENT MANAGEMENT (ADMIN)
@@ -833,39 +876,58 @@ def get_all_payments(
     db: Session = Depends(get_db),
     status: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    end_date: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100)
 ):
     """Get all payments"""
     
-    query = db.query(Payment).options(
-        joinedload(Payment.booking).joinedload(Booking.client),
-        joinedload(Payment.booking).joinedload(Booking.worker)
-    )
-    
+    filters = []
     if status:
-        query = query.filter(Payment.status == status)
+        filters.append(Payment.status == status)
     
     if start_date:
         start = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(Payment.created_at >= start)
+        filters.append(Payment.created_at >= start)
     
     if end_date:
         end = datetime.strptime(end_date, "%Y-%m-%d")
-        query = query.filter(Payment.created_at <= end)
-    
-    payments = query.order_by(Payment.created_at.desc()).all()
-    
-    # Summary stats
-    total_amount = sum(p.amount for p in payments)
-    succeeded_payments = [p for p in payments if p.status == "succeeded"]
-    succeeded_amount = sum(p.amount for p in succeeded_payments)
+        filters.append(Payment.created_at <= end)
+    
+    # Summary stats over every matching row, in one aggregate query
+    succeeded = Payment.status == "succeeded"
+    total_payments, total_amount, succeeded_payments, succeeded_amount = db.query(
+        func.count(Payment.id),
+        func.coalesce(func.sum(Payment.amount), 0),
+        func.count(case((succeeded, Payment.id))),
+        func.coalesce(func.sum(case((succeeded, Payment.amount), else_=0)), 0),
+    ).filter(*filters).one()
+    
+    # Only the requested page of rows is loaded
+    offset = (page - 1) * limit
+    payments = (
+        db.query(Payment)
+        .options(
+            joinedload(Payment.booking).joinedload(Booking.client),
+            joinedload(Payment.booking).joinedload(Booking.worker)
+        )
+        .filter(*filters)
+        .order_by(Payment.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
     
     return {
         "payments": payments,
+        "total": total_payments,
+        "page": page,
+        "limit": limit,
+        "pages": (total_payments + limit - 1) // limit,
         "summary": {
-            "total_payments": len(payments),
+            "total_payments": total_payments,
             "total_amount": float(total_amount),
-            "succeeded_payments": len(succeeded_payments),
+            "succeeded_payments": succeeded_payments,
             "succeeded_amount": float(succeeded_amount)
         }
     }
@@ -914,7 +976,7 @@ def update_admin_profile(
 # ==========================
 # SYSTEM STATISTICS & ANALYTICS
 # ==========================
-@router.get("/analytics/bookings")
+@router.get("/analytics/bookings", dependencies=[Depends(rate_limit(ANALYTICS_PER_USER, ANALYTICS_PER_ROUTE))])
 def get_booking_analytics(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -1092,21 +1154,18 @@ def process_admin_payment(
     payment.payment_reference = payment_reference
     payment.mpesa_transaction_id = mpesa_transaction_id
     payment.processed_at = datetime.utcnow()
-    
+
+    # The payee is notified by the outbox dispatcher after commit
+    record(db, PAYMENT_SUCCEEDED, {
+        "payment_kind": "admin",
+        "payment_id": payment.id,
+        "payee_user_id": payment.admin_profile.user_id,
+        "amount": payment.amount,
+        "payment_type": payment.payment_type,
+        "reference": payment_reference,
+    })
     db.commit()
     
-    # Create notification
-    admin_user = db.query(User).filter(User.id == payment.admin_profile.user_id).first()
-    if admin_user:
-        notification = Notification(
-            user_id=admin_user.id,
-            title="Payment Processed",
-            message=f"Your {payment.payment_type} payment of KES {payment.amount:,.2f} has been processed. Reference: {payment_reference}",
-            is_read=False
-        )
-        db.add(notification)
-        db.commit()
-    
     return {"message": "Payment processed successfully"}
 
 @router.get("/payments/all")
@@ -1116,7 +1175,9 @@ def get_all_admin_payments(
     status: Optional[str] = Query(None),
     payment_type: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    end_date: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100)
 ):
     """Get all admin payments (for finance/admin management)"""
     
@@ -1131,39 +1192,52 @@ def get_all_admin_payments(
             detail="You don't have permission to view all payments"
         )
     
-    query = db.query(AdminPayment).options(
-        joinedload(AdminPayment.admin_profile)
-    )
-    
-    # Apply filters
+    filters = []
     if status:
-        query = query.filter(AdminPayment.status == status)
+        filters.append(AdminPayment.status == status)
     
     if payment_type:
-        query = query.filter(AdminPayment.payment_type == payment_type)
+        filters.append(AdminPayment.payment_type == payment_type)
     
     if start_date:
         start = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(AdminPayment.created_at >= start)
+        filters.append(AdminPayment.created_at >= start)
     
     if end_date:
         end = datetime.strptime(end_date, "%Y-%m-%d")
-        query = query.filter(AdminPayment.created_at <= end)
+        filters.append(AdminPayment.created_at <= end)
     
-    payments = query.order_by(desc(AdminPayment.created_at)).all()
+    # Summary statistics over every matching row, in one aggregate query
+    total_payments, total_amount, pending_amount, completed_amount = db.query(
+        func.count(AdminPayment.id),
+        func.coalesce(func.sum(AdminPayment.amount), 0),
+        func.coalesce(func.sum(case((AdminPayment.status == "pending", AdminPayment.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((AdminPayment.status == "completed", AdminPayment.amount), else_=0)), 0),
+    ).filter(*filters).one()
     
-    # Summary statistics
-    total_amount = sum(p.amount for p in payments)
-    pending_amount = sum(p.amount for p in payments if p.status == "pending")
-    completed_amount = sum(p.amount for p in payments if p.status == "completed")
+    # Only the requested page of rows is loaded
+    offset = (page - 1) * limit
+    payments = (
+        db.query(AdminPayment)
+        .options(joinedload(AdminPayment.admin_profile))
+        .filter(*filters)
+        .order_by(desc(AdminPayment.created_at))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
     
     return {
         "payments": payments,
+        "total": total_payments,
+        "page": page,
+        "limit": limit,
+        "pages": (total_payments + limit - 1) // limit,
         "summary": {
-            "total_payments": len(payments),
+            "total_payments": total_payments,
             "total_amount": float(total_amount),
             "pending_amount": float(pending_amount),
             "completed_amount": float(completed_amount),
-            "average_payment": float(total_amount / len(payments)) if payments else 0
+            "average_payment": float(total_amount / total_payments) if total_payments else 0
         }
-    }
\ No newline at end of file
+    }
@@ -1,3 +1,4 @@
+import logging
 import os
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
@@ -14,6 +15,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -57,24 +60,23 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        print("Decoding token:", token)
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("email")
         role: str = payload.get("role")
         if email is None:
-            print("Email not found in token")
+            logger.info("Rejected token without an email claim")
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
     user = db.query(User).filter(User.email == email).first()
     if user is None:
-        print("User not found")
+        logger.info("Rejected token for unknown user")
         raise credentials_exception
     if user.role != role:
-        print("role mismatch")
+        logger.info("Rejected token with stale role", extra={"user_id": user.id})
         raise credentials_exception
-    print("Authenticated user:", user.email, "with role:", user.role)
+    logger.debug("Authenticated user", extra={"user_id": user.id, "role": user.role})
     return user   
 
 
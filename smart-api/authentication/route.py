@@ -3,12 +3,12 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import User
 from schemas import UserCreate, UserLogin, Token,UserResponse
-from emails import send_verification_email
+from outbox import USER_REGISTERED, record
+from ratelimit import LOGIN_PER_IP, LOGIN_PER_ROUTE, rate_limit
 from . import (
     get_password_hash,
     verify_password,
     create_access_token,
-    create_verification_token,
     verify_token,
     router ,
     get_current_user
@@ -32,12 +32,12 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     if user.role == "admin":
         new_user.is_admin = True
     db.add(new_user)
+    db.flush()
+    # The verification email is sent by the outbox dispatcher after commit
+    record(db, USER_REGISTERED, {"user_id": new_user.id, "email": new_user.email})
     db.commit()
     db.refresh(new_user)
 
-    email_token = create_verification_token(new_user.email)
-    send_verification_email(new_user.email, email_token)
-
     access_token = create_access_token({"sub": new_user.id, "role": new_user.role})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -63,7 +63,9 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     return {"message": "Email successfully verified"}
 
 
-@auth_router.post("/login", response_model=Token)
+@auth_router.post(
+    "/login", response_model=Token, dependencies=[Depends(rate_limit(LOGIN_PER_IP, LOGIN_PER_ROUTE))]
+)
 def login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.email == user.email).first()
     if not db_user or not verify_password(user.password, db_user.hashed_password):
@@ -0,0 +1,296 @@
+# benchmarks/conftest.py
+# Per-endpoint benchmarks: latency, SQL statement count and peak allocated
+# memory, compared against stored baselines. Only the statement count is
+# deterministic, so only it fails the run; latency and memory regressions
+# are reported, and gated only on request against baselines from this host.
+#
+#   python -m pytest benchmarks                      # compare against baselines.json
+#   python -m pytest benchmarks --bench-update       # accept current numbers as the new baseline
+#   python -m pytest benchmarks --bench-gate-timing  # also fail on latency/memory (same-host baselines)
+#   BENCH_DATABASE_URL=postgresql://... python -m pytest benchmarks
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+# The app reads these at import time, so they are set before anything imports it
+_db_file = None
+if os.getenv("BENCH_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+else:
+    _db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+# Outbox handlers and scheduled jobs run beside requests; their statements are not the endpoint's
+os.environ["OUTBOX_DISPATCH_IN_APP"] = "0"
+os.environ["JOBS_IN_APP"] = "0"
+# Every benchmark request comes from one client; the limits would measure 429s
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+sys.path.insert(0, str(ROOT))
+# Relative paths (uploads mount, staging dirs) resolve against the app root
+os.chdir(ROOT)
+
+# Dataset size; baselines are only comparable for the same size and seed
+BENCH_USERS = int(os.getenv("BENCH_USERS", 200))
+BENCH_SEED = int(os.getenv("BENCH_SEED", 42))
+# Wall time and allocations only compare between runs on the same machine
+BENCH_HOST = platform.node()
+TIMING_METRICS = ("latency_ms", "peak_memory_kb")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench")
+    group.addoption("--bench-update", action="store_true", help="Write measured numbers to baselines.json")
+    group.addoption("--bench-rounds", type=int, default=int(os.getenv("BENCH_ROUNDS", 5)),
+                    help="Timed calls per endpoint (median is reported)")
+    group.addoption("--bench-threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", 0.25)),
+                    help="Allowed relative growth in queries and memory before a benchmark is flagged (0.25 = 25%%)")
+    group.addoption("--bench-latency-threshold", type=float,
+                    default=float(os.getenv("BENCH_LATENCY_THRESHOLD", 0.5)),
+                    help="Allowed relative growth in median latency; wall time is noisier than counts")
+    group.addoption("--bench-gate-timing", action="store_true", default=os.getenv("BENCH_GATE_TIMING") == "1",
+                    help="Also fail on latency and memory regressions, for baselines recorded on this host")
+
+
+# ==========================
+# APP AND DATA
+# ==========================
+@pytest.fixture(scope="session")
+def app_client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    # Endpoint numbers exclude compression (httpx asks for gzip by default);
+    # test_compression.py measures it separately
+    with TestClient(main.app, headers={"Accept-Encoding": "identity"}) as client:
+        yield client
+    if _db_file:
+        os.unlink(_db_file)
+
+
+@pytest.fixture(scope="session")
+def dataset(app_client):
+    """Seed once per session; returns the seeder's load-test fixtures"""
+    from database import SessionLocal
+    from loadtest.seed import seed
+
+    db = SessionLocal()
+    try:
+        seeder = seed(db, users=BENCH_USERS, seed=BENCH_SEED)
+        fixtures = seeder.fixtures()
+    finally:
+        db.close()
+    return fixtures
+
+
+@pytest.fixture(scope="session")
+def busiest(dataset):
+    """The worker and conversation with the most rows: the worst case a user can hit"""
+    from database import SessionLocal
+    from models import Booking, Message
+
+    db = SessionLocal()
+    try:
+        worker_id = (
+            db.query(Booking.worker_id)
+            .filter(Booking.worker_id.isnot(None))
+            .group_by(Booking.worker_id)
+            .order_by(func.count(Booking.id).desc(), Booking.worker_id)
+            .limit(1)
+            .scalar()
+        )
+        booking_id = (
+            db.query(Message.booking_id)
+            .group_by(Message.booking_id)
+            .order_by(func.count(Message.id).desc(), Message.booking_id)
+            .limit(1)
+            .scalar()
+        )
+        client_user_id = db.query(Message.sender_id).filter(Message.booking_id == booking_id).limit(1).scalar()
+    finally:
+        db.close()
+    return {"worker_id": worker_id, "booking_id": booking_id, "user_id": client_user_id}
+
+
+@pytest.fixture(autouse=True)
+def fake_stripe(monkeypatch):
+    """Benchmarks measure the API, not Stripe's round trip"""
+    import stripe
+
+    def create(**params):
+        return stripe.PaymentIntent.construct_from(
+            {"id": f"pi_bench_{time.perf_counter_ns()}", "client_secret": "pi_bench_secret"}, "sk_bench"
+        )
+
+    monkeypatch.setattr(stripe.PaymentIntent, "create", staticmethod(create))
+
+
+# ==========================
+# MEASUREMENT
+# ==========================
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@pytest.fixture(scope="session")
+def query_counter(app_client):
+    from sqlalchemy import event
+
+    from database import engine
+
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter)
+
+
+class Bench:
+    def __init__(self, config, counter: QueryCounter, baselines: dict, results: dict, warnings: list):
+        self.rounds = max(1, config.getoption("--bench-rounds"))
+        self.thresholds = {
+            "latency_ms": config.getoption("--bench-latency-threshold"),
+            "queries": config.getoption("--bench-threshold"),
+            "peak_memory_kb": config.getoption("--bench-threshold"),
+        }
+        self.update = config.getoption("--bench-update")
+        self.gate_timing = config.getoption("--bench-gate-timing")
+        self.warnings = warnings
+        self.counter = counter
+        self.baselines = baselines
+        self.results = results
+
+    def _call(self, call, expect):
+        response = call()
+        assert response.status_code in expect, f"{response.status_code}: {response.text[:300]}"
+        return response
+
+    def __call__(self, name: str, call, expect=(200,), ungated=()):
+        """Measure ``call`` (a zero-argument function making one request).
+
+        Metrics named in ``ungated`` are reported but never fail the run,
+        even with --bench-gate-timing.
+        """
+        self._call(call, expect)  # warm caches and lazy imports
+
+        timings, queries = [], []
+        for _ in range(self.rounds):
+            before = self.counter.count
+            started = time.perf_counter()
+            self._call(call, expect)
+            timings.append(time.perf_counter() - started)
+            queries.append(self.counter.count - before)
+
+        # Separate run: tracing allocations slows the call down
+        tracemalloc.start()
+        try:
+            self._call(call, expect)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "latency_ms": round(statistics.median(timings) * 1000, 3),
+            "queries": max(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "host": BENCH_HOST,
+        }
+        self.results[name] = result
+
+        baseline = self.baselines.get("endpoints", {}).get(name)
+        if self.update or not baseline or not self._comparable():
+            return result
+
+        # Wall time and allocations recorded elsewhere say little about this machine
+        timing_gated = self.gate_timing and baseline.get("host") == BENCH_HOST
+        failures = []
+        for metric, limit in self.thresholds.items():
+            value = result[metric]
+            allowed = baseline[metric] * (1 + limit)
+            # Small absolute slack so tiny numbers don't fail on noise
+            slack = {"latency_ms": 1.0, "queries": 0, "peak_memory_kb": 64}[metric]
+            if value <= allowed + slack:
+                continue
+            message = f"{metric} {baseline[metric]} -> {value} (limit {allowed + slack:.1f})"
+            if metric in TIMING_METRICS and (not timing_gated or metric in ungated):
+                self.warnings.append(f"{name}: {message}")
+            else:
+                failures.append(message)
+        assert not failures, f"{name} regressed: " + "; ".join(failures)
+        return result
+
+    def _comparable(self) -> bool:
+        return self.baselines.get("dataset") == {"users": BENCH_USERS, "seed": BENCH_SEED}
+
+
+def pytest_configure(config):
+    config._bench_results = {}
+    # Free-form comparisons (e.g. before/after serialization) shown in the summary
+    config._bench_notes = []
+    # Latency and memory regressions that did not fail the run
+    config._bench_warnings = []
+    config._bench_baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+
+
+@pytest.fixture
+def bench(request, query_counter):
+    config = request.config
+    return Bench(config, query_counter, config._bench_baselines, config._bench_results, config._bench_warnings)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not config.getoption("--bench-update") or not config._bench_results:
+        return
+    endpoints = dict(config._bench_baselines.get("endpoints", {}))
+    endpoints.update(config._bench_results)
+    BASELINES.write_text(json.dumps({
+        "dataset": {"users": BENCH_USERS, "seed": BENCH_SEED},
+        "endpoints": dict(sorted(endpoints.items())),
+    }, indent=2) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    notes = getattr(config, "_bench_notes", [])
+    if notes:
+        terminalreporter.section("comparisons")
+        for note in notes:
+            terminalreporter.write_line(note)
+    results = getattr(config, "_bench_results", {})
+    if not results:
+        return
+    baselines = config._bench_baselines.get("endpoints", {})
+    terminalreporter.section("endpoint benchmarks")
+    terminalreporter.write_line(f"{'endpoint':32} {'latency ms':>22} {'queries':>14} {'peak KB':>22}")
+    for name, result in sorted(results.items()):
+        base = baselines.get(name, {})
+
+        def cell(metric):
+            return f"{base[metric]} -> {result[metric]}" if metric in base else str(result[metric])
+
+        terminalreporter.write_line(
+            f"{name:32} {cell('latency_ms'):>22} {cell('queries'):>14} {cell('peak_memory_kb'):>22}"
+        )
+    warnings = getattr(config, "_bench_warnings", [])
+    if warnings:
+        gated = "" if config.getoption("--bench-gate-timing") else " (pass --bench-gate-timing to fail on these)"
+        terminalreporter.section("latency and memory over threshold, not gated" + gated)
+        for warning in warnings:
+            terminalreporter.write_line(warning)
+    if config.getoption("--bench-update"):
+        terminalreporter.write_line(f"baselines written to {BASELINES}")
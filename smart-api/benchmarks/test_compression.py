@@ -0,0 +1,154 @@
+# benchmarks/test_compression.py
+# CPU cost against bytes saved for each codec and level, on real payloads
+# from the largest read endpoints. The table printed in the summary is what
+# the GZIP_LEVEL / BROTLI_QUALITY / COMPRESSION_MIN_BYTES defaults in
+# compression.py were picked from.
+import statistics
+import time
+
+import pytest
+
+GZIP_LEVELS = (1, 3, 5, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 8, 11)
+# Cellular uplink the time saved on the wire is priced at, in megabits per second
+LINK_MBPS = 5
+
+
+@pytest.fixture(scope="module")
+def payloads(app_client, busiest):
+    paths = {
+        "get_bookings": ("/bookings/", None),
+        "bookings_analytics": ("/bookings/admin/all", None),
+        "list_cleaners_analytics": ("/workers/admin/all", None),
+        "list_workers": ("/workers/", None),
+        "get_booking_conversation": (f"/messages/booking/{busiest['booking_id']}", {"user_id": busiest["user_id"]}),
+    }
+    samples = {}
+    for name, (path, params) in paths.items():
+        response = app_client.get(path, params=params, headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200, f"{name}: {response.status_code}"
+        assert "content-encoding" not in response.headers
+        samples[name] = response.content
+    return samples
+
+
+def _measure(body: bytes, encoding: str, level: int, rounds: int):
+    from compression import compress
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        compressed = compress(body, encoding, level)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(compressed)
+
+
+def test_compression_cost_against_bytes_saved(request, payloads):
+    from compression import BROTLI_AVAILABLE, GZIP_LEVEL
+
+    rounds = max(3, request.config.getoption("--bench-rounds"))
+    codecs = [("gzip", level) for level in GZIP_LEVELS]
+    if BROTLI_AVAILABLE:
+        codecs += [("br", quality) for quality in BROTLI_QUALITIES]
+
+    total_in = sum(len(body) for body in payloads.values())
+    notes = request.config._bench_notes
+    notes.append(
+        f"compression over {len(payloads)} payloads, {total_in / 1024:.0f} KB "
+        f"({', '.join(f'{name} {len(body) / 1024:.0f} KB' for name, body in payloads.items())})"
+    )
+    notes.append(f"{'codec':10} {'ratio':>7} {'saved KB':>9} {'CPU ms':>8} {'MB/s':>7} {'net ms saved @' + str(LINK_MBPS) + 'Mbps':>22}")
+    ratios = {}
+    for encoding, level in codecs:
+        seconds, out = 0.0, 0
+        for body in payloads.values():
+            elapsed, size = _measure(body, encoding, level, rounds)
+            seconds += elapsed
+            out += size
+        saved = total_in - out
+        ratios[(encoding, level)] = out / total_in
+        wire_ms = saved * 8 / (LINK_MBPS * 1_000_000) * 1000
+        notes.append(
+            f"{encoding + ' ' + str(level):10} {out / total_in:7.3f} {saved / 1024:9.0f} {seconds * 1000:8.2f} "
+            f"{total_in / seconds / 1_000_000:7.1f} {wire_ms - seconds * 1000:22.0f}"
+        )
+    if not BROTLI_AVAILABLE:
+        notes.append("brotli not installed; br rows skipped")
+
+    # JSON this repetitive should at least halve at the default level
+    assert ratios[("gzip", GZIP_LEVEL)] < 0.5
+
+
+def test_small_bodies_not_worth_compressing(request):
+    """Where compressing stops paying: framing overhead against the saving, per body size"""
+    import json
+
+    from compression import COMPRESSION_MIN_BYTES, compress
+
+    row = {"id": 1, "status": "pending", "appointment_datetime": "2026-07-31T07:00:00", "total_price": 2500.0}
+    sizes = []
+    for count in (1, 2, 4, 8, 16, 64):
+        body = json.dumps([dict(row, id=i) for i in range(count)]).encode()
+        sizes.append(f"{len(body)}B -> {len(compress(body, 'gzip'))}B")
+    request.config._bench_notes.append(f"gzip on small bodies (threshold {COMPRESSION_MIN_BYTES}B): " + ", ".join(sizes))
+
+
+def test_get_bookings_gzip(bench, app_client, dataset):
+    # The largest list end to end, compressed at the default level. Its peak
+    # memory is mostly the TestClient and the response body; the compressor's
+    # own is measured on a fixed body below
+    bench(
+        "get_bookings_gzip",
+        lambda: app_client.get("/bookings/", headers={"Accept-Encoding": "gzip"}),
+        ungated=("peak_memory_kb",),
+    )
+
+
+def test_compressor_memory(request):
+    """zlib state allocated per response, on fixed bodies and without the app in between"""
+    import json
+    import tracemalloc
+
+    from compression import compress
+
+    row = {"id": 1, "status": "pending", "appointment_datetime": "2026-07-31T07:00:00", "total_price": 2500.0}
+    peaks = []
+    for count in (16, 256, 4096):
+        body = json.dumps([dict(row, id=i) for i in range(count)]).encode()
+        tracemalloc.start()
+        try:
+            compressed = compress(body, "gzip")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # What compression allocates beyond its output
+        overhead = peak - len(compressed)
+        peaks.append((len(body), overhead))
+    request.config._bench_notes.append(
+        "gzip working memory: " + ", ".join(f"{size / 1024:.0f} KB body -> {overhead / 1024:.0f} KB" for size, overhead in peaks)
+    )
+
+    # Window and hash table are sized to the body: a small one never gets
+    # zlib's full ~256 KB, and no body needs more than that plus buffers
+    small_size, small_overhead = peaks[0]
+    assert small_overhead < 64 * 1024, f"{small_size} B body used {small_overhead} B"
+    assert all(overhead < (256 + 64) * 1024 for _, overhead in peaks)
+
+
+def test_middleware_negotiates(app_client, dataset):
+    from compression import BROTLI_AVAILABLE
+
+    plain = app_client.get("/bookings/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    gzipped = app_client.get("/bookings/", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in gzipped.headers["vary"].lower()
+    assert gzipped.content == plain.content  # httpx decodes
+
+    preferred = app_client.get("/bookings/", headers={"Accept-Encoding": "gzip;q=0.5, br"})
+    assert preferred.headers["content-encoding"] == ("br" if BROTLI_AVAILABLE else "gzip")
+
+    # Under the threshold: sent as is
+    small = app_client.get("/bookings/1", params={"fields": "status"}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,102 @@
+# benchmarks/test_endpoints.py
+import itertools
+from datetime import datetime, timedelta
+
+
+def test_get_bookings(bench, app_client, dataset):
+    bench("get_bookings", lambda: app_client.get("/bookings/"))
+
+
+def test_get_worker_bookings(bench, app_client, busiest):
+    bench("get_worker_bookings", lambda: app_client.get(f"/workers/{busiest['worker_id']}/jobs"))
+
+
+def test_worker_earnings_summary(bench, app_client, busiest):
+    bench("worker_earnings_summary", lambda: app_client.get(f"/workers/{busiest['worker_id']}/earnings-summary"))
+
+
+def test_get_booking_conversation(bench, app_client, busiest):
+    bench("get_booking_conversation", lambda: app_client.get(
+        f"/messages/booking/{busiest['booking_id']}", params={"user_id": busiest["user_id"]}
+    ))
+
+
+def test_list_cleaners_analytics(bench, app_client, dataset):
+    bench("list_cleaners_analytics", lambda: app_client.get("/workers/admin/all"))
+
+
+def test_get_clients_analytics(bench, app_client, dataset):
+    bench("get_clients_analytics", lambda: app_client.get("/clients/admin/"))
+
+
+def test_create_booking(bench, app_client, dataset):
+    client = dataset["clients"][0]
+    worker = dataset["workers"][0]
+    feature = dataset["features"][0]
+    # Past the seeded horizon and three hours apart, so no call hits a slot conflict
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=400)
+    slots = itertools.count()
+
+    def create():
+        return app_client.post("/bookings/", json={
+            "client_id": client["client_id"],
+            "worker_id": worker["worker_id"],
+            "appointment_datetime": (start + timedelta(hours=3 * next(slots))).isoformat(),
+            "service_feature_id": feature["service_feature_id"],
+            "deposit_paid": 0,
+            "description": "Benchmark booking",
+            "location": dataset["locations"][0],
+            "status": "pending",
+            "rating": None,
+            "booked_services": feature["options"][:2],
+        })
+
+    bench("create_booking", create)
+
+
+def test_create_booking_retry(bench, app_client, dataset):
+    # A mobile retry of a booking that already went through: replayed from idempotency_keys
+    client = dataset["clients"][1]
+    feature = dataset["features"][0]
+    payload = {
+        "client_id": client["client_id"],
+        "worker_id": dataset["workers"][1]["worker_id"],
+        "appointment_datetime": (datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+                                 + timedelta(days=600)).isoformat(),
+        "service_feature_id": feature["service_feature_id"],
+        "deposit_paid": 0,
+        "description": "Benchmark retry",
+        "location": dataset["locations"][0],
+        "status": "pending",
+        "rating": None,
+        "booked_services": feature["options"][:2],
+    }
+    headers = {"Idempotency-Key": "benchmark-create-booking-retry"}
+    first = app_client.post("/bookings/", json=payload, headers=headers)
+    assert first.status_code == 200, first.text
+
+    def retry():
+        response = app_client.post("/bookings/", json=payload, headers=headers)
+        assert response.headers["idempotent-replayed"] == "true"
+        return response
+
+    bench("create_booking_retry", retry)
+
+
+def test_list_workers(bench, app_client, dataset):
+    bench("list_workers", lambda: app_client.get("/workers/"))
+
+
+def test_get_worker_ratings(bench, app_client, busiest):
+    bench("get_worker_ratings", lambda: app_client.get(f"/workers/{busiest['worker_id']}/reviews"))
+
+
+def test_get_bookings_sparse(bench, app_client, dataset):
+    # The mobile list view: a status and a date, with the client's name
+    bench("get_bookings_sparse", lambda: app_client.get(
+        "/bookings/", params={"fields": "status,appointment_datetime", "include": "client"}
+    ))
+
+
+def test_get_full_worker(bench, app_client, busiest):
+    bench("get_full_worker", lambda: app_client.get(f"/workers/{busiest['worker_id']}"))
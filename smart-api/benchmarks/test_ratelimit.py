@@ -0,0 +1,27 @@
+# benchmarks/test_ratelimit.py
+# Per-user rate limit subjects: every kind of token the API issues gets its
+# own bucket, instead of falling back to the shared per-IP one.
+from starlette.requests import Request
+
+
+def _request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": ("10.0.0.1", 1234)})
+
+
+def test_user_subject_per_token_type():
+    from authentication import create_access_token
+    from ratelimit import ANALYTICS_PER_USER, subject
+
+    tokens = {
+        "login": create_access_token({"client_id": 7, "role": "client", "email": "client@example.com"}),
+        "registration": create_access_token({"sub": 8, "role": "worker"}),
+        "admin": create_access_token({"sub": "admin@example.com", "role": "admin"}),
+    }
+    subjects = {kind: subject(ANALYTICS_PER_USER, _request(token)) for kind, token in tokens.items()}
+
+    assert subjects == {"login": "user:7", "registration": "user:8", "admin": "user:admin@example.com"}
+    # A registration token and a later login token for the same user share a bucket
+    assert subject(ANALYTICS_PER_USER, _request(create_access_token({"sub": 7}))) == subjects["login"]
+    assert subject(ANALYTICS_PER_USER, _request()) == "ip:10.0.0.1"
+    assert subject(ANALYTICS_PER_USER, _request("not-a-token")) == "ip:10.0.0.1"
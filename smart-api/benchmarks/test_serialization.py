@@ -0,0 +1,80 @@
+# benchmarks/test_serialization.py
+# Cost of turning the booking list into JSON, per 1,000 bookings: the ORM
+# path (joinedload graph, Pydantic validation, JSON dump) against the
+# column rows encoded by orjson that get_bookings now uses.
+import statistics
+import time
+
+from sqlalchemy import func
+
+
+def _orm_path(db):
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy.orm import joinedload
+    from starlette.responses import JSONResponse
+
+    from models import Booking, BookingService, FeatureOption, ServiceFeature
+    from schemas import BookingResponse
+
+    bookings = (
+        db.query(Booking)
+        .options(
+            joinedload(Booking.client),
+            joinedload(Booking.worker),
+            joinedload(Booking.booked_services)
+            .joinedload(BookingService.feature_option)
+            .joinedload(FeatureOption.feature)
+            .joinedload(ServiceFeature.category)
+        )
+        .all()
+    )
+    # What FastAPI does with a response_model: validate, encode, dump
+    validated = TypeAdapter(list[BookingResponse]).validate_python(bookings, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def _row_path(db):
+    from bookings.rows import booking_rows
+    from responses import ORJSONResponse
+
+    return ORJSONResponse(booking_rows(db)).body
+
+
+def _per_thousand(path, rounds, count):
+    from database import SessionLocal
+
+    timings = []
+    for _ in range(rounds + 1):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            body = path(db)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    # First call warms imports and statement caches
+    return statistics.median(timings[1:]) * 1000 * 1000 / count, len(body)
+
+
+def test_booking_serialization_per_thousand(request, dataset):
+    from database import SessionLocal
+    from models import Booking
+
+    db = SessionLocal()
+    try:
+        count = db.query(func.count(Booking.id)).scalar()
+    finally:
+        db.close()
+    assert count, "dataset has no bookings"
+
+    rounds = max(3, request.config.getoption("--bench-rounds"))
+    before_ms, before_bytes = _per_thousand(_orm_path, rounds, count)
+    after_ms, after_bytes = _per_thousand(_row_path, rounds, count)
+
+    request.config._bench_notes.append(
+        f"booking list per 1,000 bookings ({count} seeded): ORM + Pydantic {before_ms:.1f} ms "
+        f"-> rows + orjson {after_ms:.1f} ms ({before_ms / after_ms:.1f}x); "
+        f"body {before_bytes} -> {after_bytes} bytes"
+    )
+    assert after_ms < before_ms
@@ -0,0 +1,312 @@
+# bookings/dispatch.py
+import heapq
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from models import (
+    Booking, BookingRequest, Workers, WorkerService, WorkerAvailability, WorkerLanguages,
+)
+from workers.availability import (
+    DEFAULT_END, DEFAULT_START, parse_clock_minutes, parse_day_of_week,
+)
+from workers.geo import haversine_km, parse_location_pin
+from workers.scheduling import (
+    BLOCKING_STATUSES, DEFAULT_JOB_MINUTES, booking_interval, get_schedule_index,
+)
+
+
+# Structural data (workers, services, availability, languages) is rebuilt when
+# it changes through the ORM or after this many seconds.
+INDEX_TTL_SECONDS = 600
+# Booking load changes constantly, so it is refreshed with one grouped query.
+LOAD_REFRESH_SECONDS = 30
+
+# Bookings in these states count against a worker's current load
+ACTIVE_BOOKING_STATUSES = BLOCKING_STATUSES
+
+# Ranking weights, summing to 1.0
+WEIGHT_RATING = 0.35
+WEIGHT_LOAD = 0.25
+WEIGHT_DISTANCE = 0.25
+WEIGHT_LANGUAGE = 0.15
+
+# Candidates further than this are dropped when both locations are known
+MAX_DISTANCE_KM = 50.0
+
+
+class WorkerProfile(NamedTuple):
+    id: int
+    user_id: int
+    name: str
+    rating: float
+    location: Optional[Tuple[float, float]]
+    languages: frozenset
+
+
+class DispatchIndex:
+    """Precomputed lookups used to rank workers without per-request scans"""
+
+    def __init__(self):
+        self.workers: Dict[int, WorkerProfile] = {}
+        self.by_category: Dict[int, Set[int]] = defaultdict(set)
+        # day -> worker_id -> [(start_minute, end_minute), ...]
+        self.by_day: Dict[int, Dict[int, List[Tuple[int, int]]]] = defaultdict(dict)
+        # Workers that never declared availability get the default window every day
+        self.default_hours: Set[int] = set()
+        self.load: Dict[int, int] = {}
+        self.built_at = time.monotonic()
+        self.load_refreshed_at = 0.0
+
+    @classmethod
+    def build(cls, db: Session) -> "DispatchIndex":
+        index = cls()
+
+        for w in db.query(
+            Workers.id, Workers.user_id, Workers.first_name, Workers.last_name,
+            Workers.organization_name, Workers.worker_type, Workers.average_rating,
+            Workers.location_pin, Workers.latitude, Workers.longitude,
+        ):
+            name = (
+                f"{w.first_name} {w.last_name}"
+                if w.worker_type == "individual"
+                else w.organization_name
+            )
+            index.workers[w.id] = WorkerProfile(
+                id=w.id,
+                user_id=w.user_id,
+                name=name or "",
+                rating=float(w.average_rating or 0.0),
+                location=(
+                    (w.latitude, w.longitude)
+                    if w.latitude is not None and w.longitude is not None
+                    else parse_location_pin(w.location_pin)
+                ),
+                languages=frozenset(),
+            )
+
+        for worker_id, category_id in db.query(WorkerService.worker_id, WorkerService.category_id):
+            index.by_category[category_id].add(worker_id)
+
+        declared = set()
+        for a in db.query(
+            WorkerAvailability.worker_id, WorkerAvailability.day_of_week,
+            WorkerAvailability.start_time, WorkerAvailability.end_time,
+        ):
+            day = parse_day_of_week(a.day_of_week)
+            if day is None:
+                continue
+            declared.add(a.worker_id)
+            window = (
+                parse_clock_minutes(a.start_time, DEFAULT_START),
+                parse_clock_minutes(a.end_time, DEFAULT_END),
+            )
+            index.by_day[day].setdefault(a.worker_id, []).append(window)
+        index.default_hours = set(index.workers) - declared
+
+        languages = defaultdict(set)
+        for worker_id, language_id in db.query(WorkerLanguages.worker_id, WorkerLanguages.language_id):
+            languages[worker_id].add(language_id)
+        for worker_id, language_ids in languages.items():
+            if worker_id in index.workers:
+                index.workers[worker_id] = index.workers[worker_id]._replace(languages=frozenset(language_ids))
+
+        index.refresh_load(db)
+        return index
+
+    def refresh_load(self, db: Session):
+        rows = (
+            db.query(Booking.worker_id, func.count(Booking.id))
+            .filter(
+                Booking.worker_id.isnot(None),
+                Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            )
+            .group_by(Booking.worker_id)
+            .all()
+        )
+        self.load = dict(rows)
+        self.load_refreshed_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.built_at < INDEX_TTL_SECONDS
+
+    def available_at(self, worker_id: int, when: datetime, duration_minutes: int) -> bool:
+        start = when.hour * 60 + when.minute
+        end = start + duration_minutes
+        if worker_id in self.default_hours:
+            return parse_clock_minutes(DEFAULT_START) <= start and end <= parse_clock_minutes(DEFAULT_END)
+        windows = self.by_day.get(when.weekday(), {}).get(worker_id, ())
+        return any(w_start <= start and end <= w_end for w_start, w_end in windows)
+
+    def candidates(self, category_id: Optional[int], when: datetime) -> Set[int]:
+        pool = set(self.by_category.get(category_id, ())) if category_id is not None else set(self.workers)
+        on_day = self.by_day.get(when.weekday(), {}).keys() | self.default_hours
+        return pool & on_day
+
+
+_index: Optional[DispatchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_dispatch_index(db: Session) -> DispatchIndex:
+    global _index
+
+    with _index_lock:
+        if _index is None or not _index.is_fresh():
+            _index = DispatchIndex.build(db)
+        elif time.monotonic() - _index.load_refreshed_at > LOAD_REFRESH_SECONDS:
+            _index.refresh_load(db)
+        return _index
+
+
+def invalidate_dispatch_index(*args):
+    global _index
+    _index = None
+
+
+# ORM changes to the structural data drop the index once their transaction
+# commits; a rebuild between flush and commit would keep the old rows.
+def _queue_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["dispatch_index_stale"] = True
+
+
+for _model in (Workers, WorkerService, WorkerAvailability, WorkerLanguages):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _queue_invalidation)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidation(session):
+    if session.info.pop("dispatch_index_stale", False):
+        invalidate_dispatch_index()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidation(session):
+    session.info.pop("dispatch_index_stale", None)
+
+
+# ==========================
+# RANKING
+# ==========================
+def rank_workers(
+    db: Session,
+    category_id: Optional[int],
+    appointment_datetime: datetime,
+    location: Optional[str] = None,
+    language_id: Optional[int] = None,
+    limit: int = 10,
+    duration_minutes: int = DEFAULT_JOB_MINUTES,
+    exclude: Optional[Set[int]] = None,
+) -> List[dict]:
+    """Rank eligible workers for a job, best match first"""
+    index = get_dispatch_index(db)
+    schedule = get_schedule_index(db)
+    start, end = booking_interval(appointment_datetime, duration_minutes)
+    target = parse_location_pin(location)
+
+    scored = []
+    for worker_id in index.candidates(category_id, appointment_datetime):
+        if exclude and worker_id in exclude:
+            continue
+        if not index.available_at(worker_id, appointment_datetime, duration_minutes):
+            continue
+        if schedule.is_busy(worker_id, start, end):
+            continue
+
+        worker = index.workers.get(worker_id)
+        if worker is None:
+            continue
+
+        distance = None
+        if target and worker.location:
+            distance = haversine_km(target[0], target[1], worker.location[0], worker.location[1])
+            if distance > MAX_DISTANCE_KM:
+                continue
+
+        load = index.load.get(worker_id, 0)
+        rating_score = min(worker.rating, 5.0) / 5.0
+        load_score = 1.0 / (1 + load)
+        # Unknown distance scores neutrally rather than best or worst
+        distance_score = 0.5 if distance is None else 1.0 - distance / MAX_DISTANCE_KM
+        if language_id is None:
+            language_score = 0.5
+        else:
+            language_score = 1.0 if language_id in worker.languages else 0.0
+
+        score = (
+            WEIGHT_RATING * rating_score
+            + WEIGHT_LOAD * load_score
+            + WEIGHT_DISTANCE * distance_score
+            + WEIGHT_LANGUAGE * language_score
+        )
+        scored.append((score, worker_id, worker, load, distance))
+
+    best = heapq.nlargest(limit, scored, key=lambda row: (row[0], -row[1]))
+    return [
+        {
+            "worker_id": worker_id,
+            "name": worker.name,
+            "score": round(score, 4),
+            "rating": worker.rating,
+            "current_load": load,
+            "distance_km": round(distance, 2) if distance is not None else None,
+            "speaks_preferred_language": language_id in worker.languages if language_id is not None else None,
+        }
+        for score, worker_id, worker, load, distance in best
+    ]
+
+
+def free_workers(
+    db: Session,
+    category_id: Optional[int],
+    at: datetime,
+    duration_minutes: int = DEFAULT_JOB_MINUTES,
+) -> List[int]:
+    """Workers offering the category whose hours cover [at, at + duration) and who are not booked"""
+    index = get_dispatch_index(db)
+    schedule = get_schedule_index(db)
+    start, end = booking_interval(at, duration_minutes)
+    return sorted(
+        worker_id
+        for worker_id in index.candidates(category_id, at)
+        if index.available_at(worker_id, at, duration_minutes)
+        and not schedule.is_busy(worker_id, start, end)
+    )
+
+
+def workers_holding_requests(
+    db: Session,
+    appointment_datetime: datetime,
+    duration_minutes: int = DEFAULT_JOB_MINUTES,
+    exclude_request_id: Optional[int] = None,
+) -> Set[int]:
+    """Workers already assigned a booking request that overlaps this slot.
+
+    Assigned requests are not bookings, so the schedule index does not see
+    them; pass the result to ``rank_workers(exclude=...)``.
+    """
+    start, end = booking_interval(appointment_datetime, duration_minutes)
+    query = db.query(BookingRequest.worker_id).filter(
+        BookingRequest.worker_id.isnot(None),
+        BookingRequest.status.in_(BLOCKING_STATUSES),
+        BookingRequest.appointment_datetime > start - timedelta(minutes=DEFAULT_JOB_MINUTES),
+        BookingRequest.appointment_datetime < end,
+    )
+    if exclude_request_id is not None:
+        query = query.filter(BookingRequest.id != exclude_request_id)
+    return {worker_id for (worker_id,) in query}
+
+
+def record_assignment(worker_id: int):
+    """Count a new assignment against the worker until the next load refresh"""
+    index = _index
+    if index is not None:
+        index.load[worker_id] = index.load.get(worker_id, 0) + 1
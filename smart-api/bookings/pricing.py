@@ -0,0 +1,177 @@
+# bookings/pricing.py
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from models import FeatureOption
+
+
+# How long a loaded price table is trusted before it is rebuilt. Writes made
+# through this process invalidate it immediately; the TTL bounds staleness for
+# writes made by other API processes.
+PRICE_TABLE_TTL_SECONDS = 300
+
+
+class PricedOption(NamedTuple):
+    id: int
+    feature_id: Optional[int]
+    area_type: str
+    label: str
+    unit_price: float
+    min_units: int
+    max_units: Optional[int]
+
+
+class PriceTable:
+    """In-memory lookup of every FeatureOption, keyed by option id"""
+
+    def __init__(self, options: Dict[int, PricedOption]):
+        self.options = options
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session) -> "PriceTable":
+        rows = db.query(
+            FeatureOption.id,
+            FeatureOption.feature_id,
+            FeatureOption.area_type,
+            FeatureOption.label,
+            FeatureOption.unit_price,
+            FeatureOption.min_units,
+            FeatureOption.max_units,
+        ).all()
+
+        return cls({
+            row.id: PricedOption(
+                id=row.id,
+                feature_id=row.feature_id,
+                area_type=row.area_type,
+                label=row.label,
+                unit_price=float(row.unit_price),
+                min_units=row.min_units or 0,
+                max_units=row.max_units,
+            )
+            for row in rows
+        })
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at < PRICE_TABLE_TTL_SECONDS
+
+
+_price_table: Optional[PriceTable] = None
+_price_table_lock = threading.Lock()
+
+
+def get_price_table(db: Session) -> PriceTable:
+    """Return the cached price table, loading it with a single query if needed"""
+    global _price_table
+
+    table = _price_table
+    if table is not None and table.is_fresh():
+        return table
+
+    with _price_table_lock:
+        if _price_table is None or not _price_table.is_fresh():
+            _price_table = PriceTable.load(db)
+        return _price_table
+
+
+def invalidate_price_table(*args):
+    global _price_table
+    _price_table = None
+
+
+# Any change to the catalogue made through the ORM drops the cached table once
+# its transaction commits; dropping it at flush would let a concurrent quote
+# reload the old prices and keep them for PRICE_TABLE_TTL_SECONDS.
+def _queue_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["price_table_stale"] = True
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(FeatureOption, _event_name, _queue_invalidation)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidation(session):
+    if session.info.pop("price_table_stale", False):
+        invalidate_price_table()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidation(session):
+    session.info.pop("price_table_stale", None)
+
+
+# ==========================
+# QUOTING
+# ==========================
+def quote_cart(table: PriceTable, items: List[dict], service_feature_id: Optional[int] = None) -> dict:
+    """Price one cart against the lookup table.
+
+    Each item is a dict with ``feature_option_id`` and ``quantity``. Lines for
+    unknown options, options from another feature or quantities outside the
+    option's min/max units are reported in ``errors`` and excluded from the total.
+    """
+    lines = []
+    errors = []
+    total = 0.0
+
+    for item in items:
+        option_id = item["feature_option_id"]
+        quantity = item["quantity"]
+        option = table.options.get(option_id)
+
+        if option is None:
+            errors.append({"feature_option_id": option_id, "detail": f"Feature option {option_id} not found"})
+            continue
+
+        if service_feature_id is not None and option.feature_id != service_feature_id:
+            errors.append({
+                "feature_option_id": option_id,
+                "detail": f"Feature option {option_id} does not belong to service feature {service_feature_id}",
+            })
+            continue
+
+        if quantity < option.min_units or (option.max_units is not None and quantity > option.max_units):
+            errors.append({
+                "feature_option_id": option_id,
+                "detail": (
+                    f"Quantity {quantity} for '{option.label}' must be between "
+                    f"{option.min_units} and {option.max_units if option.max_units is not None else 'unlimited'}"
+                ),
+            })
+            continue
+
+        line_total = round(option.unit_price * quantity, 2)
+        total += line_total
+        lines.append({
+            "feature_option_id": option_id,
+            "label": option.label,
+            "area_type": option.area_type,
+            "quantity": quantity,
+            "unit_price": option.unit_price,
+            "total_price": line_total,
+        })
+
+    return {
+        "service_feature_id": service_feature_id,
+        "total_price": round(total, 2),
+        "lines": lines,
+        "errors": errors,
+        "valid": not errors,
+    }
+
+
+def quote_carts(db: Session, carts: List[dict]) -> List[dict]:
+    """Price many carts with one table lookup and no per-option queries"""
+    table = get_price_table(db)
+    return [
+        quote_cart(table, cart["items"], cart.get("service_feature_id"))
+        for cart in carts
+    ]
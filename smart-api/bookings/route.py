@@ -1,19 +1,36 @@
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session,joinedload
 from sqlalchemy import func
 from schemas import  BookingCreate, BookingResponse, BookingRequestCreate,BookingRequestUpdate,BookingRequestResponse,BookingUpdate,BookingBase,WorkerRatingBase
-from models import Booking,Client,FeatureOption,BookingService,ServiceFeature, BookingRequest,Workers, Notification
+from schemas import BookingQuoteRequest, BookingQuoteResponse, WorkerMatch
+from models import Booking,Client,BookingService,ServiceFeature, BookingRequest,Workers, Notification
 from payments.route import lipa_na_mpesa_online,create_deposit_payment_intent
 from payments import deposit_payment_intent
 from database import get_db
 from typing import List, Optional
 from  . import jobs_router,booking_router
+from .pricing import quote_carts
+from .rows import BOOKINGS, booking_rows
+from .dispatch import rank_workers, record_assignment, workers_holding_requests
+from workers.scheduling import has_booking_conflict, worker_lock
+from outbox import BOOKING_CREATED, record
+from responses import ORJSONResponse
+from fieldsets import Selection, sparse_fields
+from idempotency import idempotent
+from ratelimit import ANALYTICS_PER_ROUTE, ANALYTICS_PER_USER, STK_PER_IP, STK_PER_ROUTE, rate_limit
+
+logger = logging.getLogger(__name__)
+
+# Ranked workers tried in turn when dispatching, in case the best was just taken
+DISPATCH_CANDIDATES = 5
 
 
 
 
 @booking_router.post("/", response_model=BookingResponse)
+@idempotent
 def create_booking(
     booking_data: BookingCreate,
     db: Session = Depends(get_db)
@@ -23,120 +40,129 @@ def create_booking(
     if not client:
         raise HTTPException(404, "Client not found")
 
-    # Validate worker
-    worker = db.query(Workers).filter(Workers.id == booking_data.worker_id).first()
-    if not worker:
-        raise HTTPException(404, "Worker not found")
-
-    # Create booking
-    new_booking = Booking(
-        client_id=booking_data.client_id,
-        worker_id=booking_data.worker_id,
-        appointment_datetime=booking_data.appointment_datetime,
-        service_feature_id=booking_data.service_feature_id,
-        location=booking_data.location,
-        description=booking_data.description,
-        total_price=booking_data.total_price,
-        deposit_paid=False,
-        status="pending",
-    )
-
-    db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
-
-    # Add booked services
-    for service in booking_data.booked_services:
-        option = db.query(FeatureOption).filter(
-            FeatureOption.id == service.feature_option_id
-        ).first()
-
-        if not option:
-            raise HTTPException(
-                404, f"Feature option {service.feature_option_id} not found"
-            )
-
-        db.add(
-            BookingService(
-                booking_id=new_booking.id,
-                feature_option_id=service.feature_option_id,
-                quantity=service.quantity,
-                unit_price=service.unit_price,
-                total_price=service.total_price,
-            )
+    # Price the cart server-side; client supplied prices are ignored
+    quote = quote_carts(db, [{
+        "service_feature_id": booking_data.service_feature_id,
+        "items": [
+            {"feature_option_id": s.feature_option_id, "quantity": s.quantity}
+            for s in booking_data.booked_services or []
+        ],
+    }])[0]
+
+    if not quote["valid"]:
+        raise HTTPException(400, quote["errors"])
+
+    # Features without priced options still rely on the agreed total
+    total_price = quote["total_price"] if quote["lines"] else booking_data.total_price
+    if total_price is None:
+        raise HTTPException(400, "total_price is required when no services are booked")
+
+    # The conflict check and insert happen under the worker's lock so two
+    # clients cannot book the same slot
+    with worker_lock(booking_data.worker_id):
+        # Validate worker (row stays locked until commit where supported)
+        worker = (
+            db.query(Workers)
+            .filter(Workers.id == booking_data.worker_id)
+            .with_for_update()
+            .first()
+        )
+        if not worker:
+            raise HTTPException(404, "Worker not found")
+
+        if has_booking_conflict(db, worker.id, booking_data.appointment_datetime):
+            db.rollback()
+            raise HTTPException(status.HTTP_409_CONFLICT, "Worker is already booked at this time")
+
+        # Create booking
+        new_booking = Booking(
+            client_id=booking_data.client_id,
+            worker_id=booking_data.worker_id,
+            appointment_datetime=booking_data.appointment_datetime,
+            service_feature_id=booking_data.service_feature_id,
+            location=booking_data.location,
+            description=booking_data.description,
+            total_price=total_price,
+            deposit_paid=False,
+            status="pending",
         )
 
-    db.commit()
+        db.add(new_booking)
+        db.flush()
+
+        # Add booked services
+        for line in quote["lines"]:
+            db.add(
+                BookingService(
+                    booking_id=new_booking.id,
+                    feature_option_id=line["feature_option_id"],
+                    quantity=line["quantity"],
+                    unit_price=line["unit_price"],
+                    total_price=line["total_price"],
+                )
+            )
 
-    # Create notification for worker
-    notification = Notification(
-        user_id=worker.user_id,
-        title="New Booking Request",
-        message=(
-            f"You have a new booking scheduled for "
-            f"{new_booking.appointment_datetime.strftime('%d %b %Y, %I:%M %p')}"
-        ),
-        is_read=False,
-    )
-    db.add(notification)
-    db.commit()
+        # The worker is notified by the outbox dispatcher after commit
+        record(db, BOOKING_CREATED, {
+            "booking_id": new_booking.id,
+            "worker_user_id": worker.user_id,
+            "appointment_datetime": new_booking.appointment_datetime.isoformat(),
+        })
+        db.commit()
+    db.refresh(new_booking)
 
-    # 🔑 Create Stripe deposit PaymentIntent
+    # 🔑 Create Stripe deposit PaymentIntent (inline: its client secret is part of the response)
     payment_intent = create_deposit_payment_intent(
         booking_id=new_booking.id,
         db=db
     )
 
-    return {
-        **new_booking.__dict__,
-        "stripe_client_secret": payment_intent
-    }
+    # Returning the ORM object lets BookingResponse load client, worker and services
+    new_booking.stripe_client_secret = payment_intent
+    return new_booking
+
+
+@booking_router.post("/quote", response_model=BookingQuoteResponse)
+def quote_bookings(request: BookingQuoteRequest, db: Session = Depends(get_db)):
+    """Price one or more candidate carts without creating a booking"""
+    carts = [
+        {
+            "service_feature_id": cart.service_feature_id,
+            "items": [item.dict() for item in cart.items],
+        }
+        for cart in request.carts
+    ]
+    return {"quotes": quote_carts(db, carts)}
 
 
 @booking_router.get("/", response_model=list[BookingResponse])
-def get_bookings(db: Session = Depends(get_db)):
-    bookings = (
-        db.query(Booking)
-        .options(
-            joinedload(Booking.client),
-            joinedload(Booking.worker),
-            joinedload(Booking.booked_services)
-            .joinedload(BookingService.feature_option)
-            .joinedload(FeatureOption.feature)
-            .joinedload(ServiceFeature.category)  # ✅ loads category through feature
-        )
-        .all()
-    )
-    return bookings
+def get_bookings(selection: Selection = Depends(sparse_fields(BOOKINGS)), db: Session = Depends(get_db)):
+    # Column rows encoded by orjson; see bookings/rows.py
+    return ORJSONResponse(booking_rows(db, selection=selection))
 
 
 @booking_router.get("/client/{client_id}", response_model=list[BookingResponse])
-def get_bookings_by_client(client_id: int, db: Session = Depends(get_db)):
-    client_exists = db.query("   Booking request created successfully",Client).filter(Client.id == client_id).first()
+def get_bookings_by_client(
+    client_id: int, selection: Selection = Depends(sparse_fields(BOOKINGS)), db: Session = Depends(get_db)
+):
+    client_exists = db.query(Client.id).filter(Client.id == client_id).first()
     if not client_exists:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    bookings = db.query(Booking).options(
-        joinedload(Booking.client),
-        joinedload(Booking.worker),
-        joinedload(Booking.booked_services).joinedload(BookingService.feature_option)
-    ).filter(Booking.client_id == client_id).all()
-
+    bookings = booking_rows(db, Booking.client_id == client_id, selection=selection)
     if not bookings:
         raise HTTPException(status_code=404, detail="No bookings found for this client")
 
-    return bookings
+    return ORJSONResponse(bookings)
 
 @booking_router.get("/{booking_id}", response_model=BookingResponse)
-def get_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(Booking).options(
-        joinedload(Booking.client),
-        joinedload(Booking.worker),
-        joinedload(Booking.booked_services).joinedload(BookingService.feature_option)
-    ).filter(Booking.id == booking_id).first()
-    if not booking:
+def get_booking(
+    booking_id: int, selection: Selection = Depends(sparse_fields(BOOKINGS)), db: Session = Depends(get_db)
+):
+    bookings = booking_rows(db, Booking.id == booking_id, selection=selection)
+    if not bookings:
         raise HTTPException(status_code=404, detail="Booking not found")
-    return booking
+    return ORJSONResponse(bookings[0])
 
 @booking_router.put("/{booking_id}", response_model=BookingResponse)
 def update_booking(
@@ -154,13 +180,14 @@ def update_booking(
     return booking
 
 
-@booking_router.get("/stk/" )
+@booking_router.get("/stk/", dependencies=[Depends(rate_limit(STK_PER_IP, STK_PER_ROUTE))])
 def get_stk_info():
     return lipa_na_mpesa_online(phone="254759234753", amount="10")
 
 @booking_router.post("/requests/", response_model=BookingRequestResponse)
+@idempotent
 def create_booking_request(request: BookingRequestCreate, db: Session = Depends(get_db)):
-    print("Creating booking request with data:", request.dict())
+    logger.debug("Creating booking request", extra={"client_id": request.client_id})
     booking = BookingRequest(**request.dict())
     db.add(booking)
     db.commit()
@@ -244,334 +271,89 @@ def get_booking_request(booking_id: int, db: Session = Depends(get_db)):
     return booking
 
 
-# ✅ Delete Booking Request
-@booking_router.delete("/requests/{booking_id}")
-def delete_booking_request(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(BookingRequest).filter(BookingRequest.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking request not found")
-
-    db.delete(booking)
-    db.commit()
-    return {"detail": "Booking request deleted"}
-
-
-#### from here on we have routes to obtain bookings but from a workers perspective ####
-
-
-
-#### ge all workers bookings and categorize them based on their status ####
-
-def get_worker_bookings(worker_id: int, db: Session = Depends(get_db)):
-    # 1. Verify worker exists
-    worker_exists = db.query(Workers).filter(Workers.id == worker_id).first()
-    if not worker_exists:
-        raise HTTPException(status_code=404, detail="Worker not found")
-
-    # 2. Fetch all worker bookings with joins
-    bookings = db.query(Booking).options(
-        joinedload(Booking.client),
-        joinedload(Booking.worker),
-        joinedload(Booking.booked_services).joinedload(BookingService.feature_option)
-    ).filter(Booking.worker_id == worker_id).all()
-    if not bookings:
-        raise HTTPException(status_code=404, detail="No bookings found for this worker")
-    print("Fetched bookings:", bookings)
-    # 3. Group the bookings by status
-    grouped = {
-        "pending_payment": [],
-        "pending":[],
-        "confirmed": [],
-        "in_progress": [],
-        "completed": [],
-        "cancelled": []
-    }
-
-    for booking in bookings:
-        grouped[booking.status].append(booking) 
-    return grouped
-def get_worker_job_counts( worker_id: int,db: Session = Depends(get_db)):
-    results = (
-        db.query(Booking.status, func.count(Booking.id))
-        .filter(Booking.worker_id == worker_id)
-        .group_by(Booking.status)
-        .all()
-    )
-
-    # default values
-    counts = {
-        "pending_payment": 0,
-        "pending": 0,   
-        "confirmed": 0,
-        "in_progress": 0,
-        "completed": 0,
-        "cancelled": 0,
-    }
-
-    # fill real values
-    for status, count in results:
-        counts[status] = count
-
-    return counts
-
-
-###### create a review for a completed job ######
-@jobs_router.put("/{booking_id}/review", response_model=BookingResponse)
-def add_review_to_booking(
+# ✅ Rank workers for a booking request
+@booking_router.get("/requests/{booking_id}/matches", response_model=List[WorkerMatch])
+def get_booking_request_matches(
     booking_id: int,
-    review_data: WorkerRatingBase,
+    limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = db.query(BookingRequest).options(
+        joinedload(BookingRequest.feature)
+    ).filter(BookingRequest.id == booking_id).first()
     if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
-    if booking.status != "completed":
-        raise HTTPException(status_code=400, detail="Can only review completed bookings")
-
-    booking.rating = review_data.rating
-    booking.review = review_data.review
-
-    db.commit()
-    db.refresh(booking)
-    return booking
-
-
-
-
-
-
-
-
-@booking_router.post("/", response_model=BookingResponse)
-def create_booking(
-    booking_data: BookingCreate,
-    db: Session = Depends(get_db)
-):
-    # Validate client
-    client = db.query(Client).filter(Client.id == booking_data.client_id).first()
-    if not client:
-        raise HTTPException(404, "Client not found")
-
-    # Validate worker
-    worker = db.query(Workers).filter(Workers.id == booking_data.worker_id).first()
-    if not worker:
-        raise HTTPException(404, "Worker not found")
-
-    # Create booking
-    new_booking = Booking(
-        client_id=booking_data.client_id,
-        worker_id=booking_data.worker_id,
-        appointment_datetime=booking_data.appointment_datetime,
-        service_feature_id=booking_data.service_feature_id,
-        location=booking_data.location,
-        description=booking_data.description,
-        total_price=booking_data.total_price,
-        deposit_paid=False,
-        status="pending",
-    )
-
-    db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
-
-    # Add booked services
-    for service in booking_data.booked_services:
-        option = db.query(FeatureOption).filter(
-            FeatureOption.id == service.feature_option_id
-        ).first()
-
-        if not option:
-            raise HTTPException(
-                404, f"Feature option {service.feature_option_id} not found"
-            )
-
-        db.add(
-            BookingService(
-                booking_id=new_booking.id,
-                feature_option_id=service.feature_option_id,
-                quantity=service.quantity,
-                unit_price=service.unit_price,
-                total_price=service.total_price,
-            )
-        )
-
-    db.commit()
-
-    # Create notification for worker
-    notification = Notification(
-        user_id=worker.user_id,
-        title="New Booking Request",
-        message=(
-            f"You have a new booking scheduled for "
-            f"{new_booking.appointment_datetime.strftime('%d %b %Y, %I:%M %p')}"
-        ),
-        is_read=False,
-    )
-    db.add(notification)
-    db.commit()
-
-    # 🔑 Create Stripe deposit PaymentIntent
-    payment_intent = create_deposit_payment_intent(
-        booking_id=new_booking.id,
-        db=db
-    )
-
-    return {
-        **new_booking.__dict__,
-        "stripe_client_secret": payment_intent
-    }
-
+        raise HTTPException(status_code=404, detail="Booking request not found")
 
-@booking_router.get("/", response_model=list[BookingResponse])
-def get_bookings(db: Session = Depends(get_db)):
-    bookings = (
-        db.query(Booking)
-        .options(
-            joinedload(Booking.client),
-            joinedload(Booking.worker),
-            joinedload(Booking.booked_services)
-            .joinedload(BookingService.feature_option)
-            .joinedload(FeatureOption.feature)
-            .joinedload(ServiceFeature.category)  # ✅ loads category through feature
-        )
-        .all()
+    return rank_workers(
+        db,
+        category_id=booking.feature.category_id if booking.feature else None,
+        appointment_datetime=booking.appointment_datetime,
+        location=booking.location,
+        limit=limit,
+        exclude=workers_holding_requests(db, booking.appointment_datetime, exclude_request_id=booking.id),
     )
-    return bookings
 
 
-@booking_router.get("/client/{client_id}", response_model=list[BookingResponse])
-def get_bookings_by_client(client_id: int, db: Session = Depends(get_db)):
-    client_exists = db.query("   Booking request created successfully",Client).filter(Client.id == client_id).first()
-    if not client_exists:
-        raise HTTPException(status_code=404, detail="Client not found")
-
-    bookings = db.query(Booking).options(
-        joinedload(Booking.client),
-        joinedload(Booking.worker),
-        joinedload(Booking.booked_services).joinedload(BookingService.feature_option)
-    ).filter(Booking.client_id == client_id).all()
-
-    if not bookings:
-        raise HTTPException(status_code=404, detail="No bookings found for this client")
-
-    return bookings
-
-@booking_router.get("/{booking_id}", response_model=BookingResponse)
-def get_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(Booking).options(
-        joinedload(Booking.client),
-        joinedload(Booking.worker),
-        joinedload(Booking.booked_services).joinedload(BookingService.feature_option)
-    ).filter(Booking.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    return booking
-
-@booking_router.put("/{booking_id}", response_model=BookingResponse)
-def update_booking(
-    booking_id: int, request: BookingUpdate, db: Session = Depends(get_db)
-):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
-    for key, value in request.dict(exclude_unset=True).items():
-        setattr(booking, key, value)
-
-    db.commit()
-    db.refresh(booking)
-    return booking
-
-
-@booking_router.get("/stk/" )
-def get_stk_info():
-    return lipa_na_mpesa_online(phone="254759234753", amount="10")
-
-@booking_router.post("/requests/", response_model=BookingRequestResponse)
-def create_booking_request(request: BookingRequestCreate, db: Session = Depends(get_db)):
-    print("Creating booking request with data:", request.dict())
-    booking = BookingRequest(**request.dict())
-    db.add(booking)
-    db.commit()
-    db.refresh(booking)
-    return (booking)
-
-
-# # ✅ Get all Booking Requests
-# @booking_router.get("/requests/", response_model=List[BookingRequestResponse])
-# def get_all_booking_requests(db: Session = Depends(get_db)):
-#     return db.query(BookingRequest).all()
-
-
-# # ✅ Get Booking Request by ID
-# @booking_router.get("/requests/{booking_id}", response_model=BookingRequestResponse)
-# def get_booking_request(booking_id: int, db: Session = Depends(get_db)):
-#     booking = db.query(BookingRequest).filter(BookingRequest.id == booking_id).first()
-#     if not booking:
-#         raise HTTPException(status_code=404, detail="Booking request not found")
-#     return booking
-
-@booking_router.get("/requests/client/{client_id}", response_model=List[BookingRequestResponse])
-def get_booking_requests_by_client(client_id: int, db: Session = Depends(get_db)):
-    client_exists = db.query(Client).filter(Client.id == client_id).first()
-    if not client_exists:
-        raise HTTPException(status_code=404, detail="Client not found")
-    booking_requests_exists = db.query(BookingRequest).filter(BookingRequest.client_id == client_id).all()
-    if not booking_requests_exists:
-        raise HTTPException(status_code=404, detail="No booking requests found for this client")
-
-    return booking_requests_exists
-
-
-# ✅ Update Booking Request
-@booking_router.put("/requests/{booking_id}", response_model=BookingRequestResponse)
-def update_booking_request(
-    booking_id: int, request: BookingRequestUpdate, db: Session = Depends(get_db)
-):
-    booking = db.query(BookingRequest).filter(BookingRequest.id == booking_id).first()
+# ✅ Assign the best ranked worker to a booking request
+@booking_router.post("/requests/{booking_id}/dispatch", response_model=BookingRequestResponse)
+def dispatch_booking_request(booking_id: int, db: Session = Depends(get_db)):
+    booking = db.query(BookingRequest).options(
+        joinedload(BookingRequest.feature)
+    ).filter(BookingRequest.id == booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking request not found")
-
-    for key, value in request.dict(exclude_unset=True).items():
-        setattr(booking, key, value)
-
-    db.commit()
-    db.refresh(booking)
-    return booking
-
-
-from sqlalchemy.orm import joinedload
-
-# ✅ Get all booking requests
-@booking_router.get("/requests/", response_model=List[BookingRequestResponse])
-def get_all_booking_requests(db: Session = Depends(get_db)):
-    return (
-        db.query(BookingRequest)
-        .options(
-            joinedload(BookingRequest.client),
-            joinedload(BookingRequest.worker),
-            joinedload(BookingRequest.feature).joinedload(ServiceFeature.category)
-        )
-        .all()
+    if booking.worker_id is not None:
+        raise HTTPException(status_code=400, detail="Booking request already has a worker")
+
+    # Workers already holding an overlapping request are invisible to the
+    # schedule index, which only tracks bookings
+    matches = rank_workers(
+        db,
+        category_id=booking.feature.category_id if booking.feature else None,
+        appointment_datetime=booking.appointment_datetime,
+        location=booking.location,
+        limit=DISPATCH_CANDIDATES,
+        exclude=workers_holding_requests(db, booking.appointment_datetime, exclude_request_id=booking.id),
     )
 
-# ✅ Get booking request by ID
-@booking_router.get("/requests/{booking_id}", response_model=BookingRequestResponse)
-def get_booking_request(booking_id: int, db: Session = Depends(get_db)):
-    booking = (
-        db.query(BookingRequest)
-        .options(
-            joinedload(BookingRequest.client),
-            joinedload(BookingRequest.worker),
-            joinedload(BookingRequest.feature).joinedload(ServiceFeature.category)
-        )
-        .filter(BookingRequest.id == booking_id)
-        .first()
-    )
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking request not found")
-    return booking
+    # The check and assignment happen under the worker's lock, with the
+    # request row locked, so concurrent dispatches cannot double-assign
+    for match in matches:
+        with worker_lock(match["worker_id"]):
+            booking = (
+                db.query(BookingRequest)
+                .filter(BookingRequest.id == booking_id)
+                .with_for_update()
+                .populate_existing()
+                .first()
+            )
+            if booking.worker_id is not None:
+                db.rollback()
+                raise HTTPException(status_code=400, detail="Booking request already has a worker")
+            taken = workers_holding_requests(db, booking.appointment_datetime, exclude_request_id=booking.id)
+            if match["worker_id"] in taken or has_booking_conflict(db, match["worker_id"], booking.appointment_datetime):
+                continue
+
+            worker = db.query(Workers).filter(Workers.id == match["worker_id"]).first()
+            booking.worker_id = worker.id
+            booking.status = "assigned"
+            db.add(Notification(
+                user_id=worker.user_id,
+                title="New Booking Request",
+                message=(
+                    f"You have been matched to a booking request for "
+                    f"{booking.appointment_datetime.strftime('%d %b %Y, %I:%M %p')}"
+                ),
+                is_read=False,
+            ))
+            db.commit()
+        db.refresh(booking)
+
+        record_assignment(worker.id)
+        return booking
+
+    db.rollback()
+    raise HTTPException(status_code=409, detail="No available worker matches this request")
 
 
 # ✅ Delete Booking Request
@@ -606,11 +388,11 @@ def get_worker_bookings(worker_id: int, db: Session = Depends(get_db)):
     ).filter(Booking.worker_id == worker_id).all()
     if not bookings:
         raise HTTPException(status_code=404, detail="No bookings found for this worker")
-    print("Fetched bookings:", bookings)
     # 3. Group the bookings by status
     grouped = {
         "pending_payment": [],
         "pending":[],
+        "assigned": [],
         "confirmed": [],
         "in_progress": [],
         "completed": [],
@@ -666,7 +448,8 @@ def add_review_to_booking(
     db.refresh(booking)
     return booking
 
-@booking_router.get("/admin/all")
+
+@booking_router.get("/admin/all", dependencies=[Depends(rate_limit(ANALYTICS_PER_USER, ANALYTICS_PER_ROUTE))])
 def bookings_analytics(db: Session = Depends(get_db)):
     bookings = (
         db.query(Booking)
@@ -0,0 +1,165 @@
+# bookings/rows.py
+# Booking rows built straight from selected columns, in the shape of
+# BookingResponse: one query for the bookings and one per embedded relation
+# (booked services with their option, feature and category; client and
+# worker names), with no ORM identity map or Pydantic validation per row.
+# BOOKINGS is the projection behind ``?fields=``/``?include=`` (fieldsets.py).
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from fieldsets import Column, Projection, Relation, Selection
+from models import Booking, BookingService, Client, FeatureOption, ServiceCategory, ServiceFeature, Workers
+
+
+@dataclass(slots=True)
+class CategoryRow:
+    slug: str
+    title: str
+
+
+@dataclass(slots=True)
+class FeatureRow:
+    slug: str
+    title: str
+    category: Optional[CategoryRow]
+
+
+@dataclass(slots=True)
+class FeatureOptionRow:
+    area_type: str
+    label: str
+    unit_price: float
+    min_units: Optional[int]
+    max_units: Optional[int]
+    id: int
+    feature: Optional[FeatureRow]
+
+
+@dataclass(slots=True)
+class BookingServiceRow:
+    feature_option_id: int
+    quantity: int
+    unit_price: float
+    total_price: float
+    id: int
+    feature_option: Optional[FeatureOptionRow]
+
+
+@dataclass(slots=True)
+class ClientNameRow:
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    organization_name: Optional[str]
+
+
+@dataclass(slots=True)
+class WorkerNameRow:
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+
+@dataclass(slots=True)
+class BookingRow:
+    client_id: int
+    worker_id: Optional[int]
+    appointment_datetime: datetime
+    service_feature_id: int
+    total_price: float
+    deposit_paid: float
+    description: Optional[str]
+    location: str
+    status: str
+    rating: Optional[float]
+    id: int
+    public_id: str
+    date_of_booking: datetime
+    booked_services: List[BookingServiceRow] = field(default_factory=list)
+    client: Optional[ClientNameRow] = None
+    worker: Optional[WorkerNameRow] = None
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _service_rows(db: Session, booking_ids) -> Dict[int, List[BookingServiceRow]]:
+    category = aliased(ServiceCategory)
+    statement = (
+        select(
+            BookingService.booking_id, BookingService.feature_option_id, BookingService.quantity,
+            BookingService.unit_price, BookingService.total_price, BookingService.id,
+            FeatureOption.id, FeatureOption.area_type, FeatureOption.label, FeatureOption.unit_price,
+            FeatureOption.min_units, FeatureOption.max_units,
+            ServiceFeature.id, ServiceFeature.slug, ServiceFeature.title,
+            category.id, category.slug, category.title,
+        )
+        .outerjoin(FeatureOption, FeatureOption.id == BookingService.feature_option_id)
+        .outerjoin(ServiceFeature, ServiceFeature.id == FeatureOption.feature_id)
+        .outerjoin(category, category.id == ServiceFeature.category_id)
+        .where(BookingService.booking_id.in_(booking_ids))
+        .order_by(BookingService.booking_id, BookingService.id)
+    )
+
+    services: Dict[int, List[BookingServiceRow]] = {}
+    for (booking_id, option_id, quantity, unit_price, total_price, service_id,
+         fo_id, area_type, label, fo_price, min_units, max_units,
+         feature_id, feature_slug, feature_title, category_id, category_slug, category_title) in db.execute(statement):
+        feature = None
+        if feature_id is not None:
+            feature = FeatureRow(
+                feature_slug, feature_title,
+                CategoryRow(category_slug, category_title) if category_id is not None else None,
+            )
+        option = None
+        if fo_id is not None:
+            option = FeatureOptionRow(area_type, label, _float(fo_price), min_units, max_units, fo_id, feature)
+        services.setdefault(booking_id, []).append(BookingServiceRow(
+            option_id, quantity, _float(unit_price), _float(total_price), service_id, option,
+        ))
+    return services
+
+
+def _client_names(db: Session, client_ids) -> Dict[int, ClientNameRow]:
+    statement = select(Client.id, Client.first_name, Client.last_name, Client.organization_name) \
+        .where(Client.id.in_(client_ids))
+    return {row[0]: ClientNameRow(*row) for row in db.execute(statement)}
+
+
+def _worker_names(db: Session, worker_ids) -> Dict[int, WorkerNameRow]:
+    statement = select(Workers.id, Workers.first_name, Workers.last_name).where(Workers.id.in_(worker_ids))
+    return {row[0]: WorkerNameRow(*row) for row in db.execute(statement)}
+
+
+def _none():
+    return None
+
+
+BOOKINGS = Projection("booking", [
+    Column("client_id", Booking.client_id),
+    Column("worker_id", Booking.worker_id),
+    Column("appointment_datetime", Booking.appointment_datetime),
+    Column("service_feature_id", Booking.service_feature_id),
+    Column("total_price", Booking.total_price, float),
+    Column("deposit_paid", Booking.deposit_paid, float),
+    Column("description", Booking.description),
+    Column("location", Booking.location),
+    Column("status", Booking.status),
+    Column("rating", Booking.rating, float),
+    Column("id", Booking.id),
+    Column("public_id", Booking.public_id),
+    Column("date_of_booking", Booking.date_of_booking),
+    Relation("booked_services", _service_rows),
+    Relation("client", _client_names, key="client_id", default=_none),
+    Relation("worker", _worker_names, key="worker_id", default=_none),
+], row=BookingRow)
+
+
+def booking_rows(db: Session, *criteria, selection: Optional[Selection] = None) -> list:
+    """Bookings matching ``criteria`` (all when none), ordered by id"""
+    return BOOKINGS.rows(db, selection or BOOKINGS.full(), *criteria, order_by=Booking.id)
@@ -1,13 +1,17 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, status,APIRouter, Form
+from fastapi import FastAPI, Depends, HTTPException, status,APIRouter, Form
 from sqlalchemy.orm import Session,joinedload
 from sqlalchemy import func
 from datetime import datetime
 from schemas import ClientCreate, ClientOut, ClientBase
 from models import Client,User,Booking,Payment,Workers,ServiceFeature
 from database import SessionLocal, get_db  
-from pathlib import Path
-import shutil
 from typing import Optional
+from storage import StagedUpload, staged_file, IMAGE_TYPES
+from observability.queries import query_budget
+from fieldsets import Selection, sparse_fields
+from ratelimit import ANALYTICS_PER_ROUTE, ANALYTICS_PER_USER, rate_limit
+from responses import ORJSONResponse
+from .rows import CLIENTS, client_rows
 
 
 
@@ -15,11 +19,6 @@ router = APIRouter(prefix="/clients", tags=["clients"])
 
 
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-
-
 @router.post("/", response_model=ClientOut)
 def register_client_with_files(
     user_id: int = Form(...),
@@ -32,9 +31,9 @@ def register_client_with_files(
     national_id_number: Optional[int] = Form(None),
     address: Optional[str] = Form(None),
 
-    national_id_proof: UploadFile = File(...),
-    tax_document_proof: UploadFile = File(None),
-    profile_picture: UploadFile = File(None),
+    national_id_proof: StagedUpload = Depends(staged_file("national_id_proof", required=True, private=True)),
+    tax_document_proof: Optional[StagedUpload] = Depends(staged_file("tax_document_proof", private=True)),
+    profile_picture: Optional[StagedUpload] = Depends(staged_file("profile_picture", IMAGE_TYPES)),
 
     db: Session = Depends(get_db)
 ):
@@ -76,37 +75,27 @@ def register_client_with_files(
     db.commit()
     db.refresh(client)
 
-    # 5. Save uploaded files
-    client_folder = UPLOAD_DIR / f"client_{user_id}"
-    client_folder.mkdir(parents=True, exist_ok=True)
-
-    def save_file(file: UploadFile, prefix: str) -> str:
-        path = client_folder / f"{prefix}_{file.filename}"
-        with open(path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-        return str(path)
-
-    client.national_id_proof = save_file(national_id_proof, "id")
+    # 5. Store uploaded files (already received and hashed, see storage/)
+    client.national_id_proof = national_id_proof.commit()
     if tax_document_proof:
-         client.tax_document_proof = save_file(tax_document_proof, "tax")
+        client.tax_document_proof = tax_document_proof.commit()
     if profile_picture:
-        client.profile_picture = save_file(profile_picture, "profile")
+        client.profile_picture = profile_picture.commit()
 
     db.commit()
     db.refresh(client)
     return client
 
 @router.get("/{client_id}", response_model=ClientOut)
-def get_client(client_id: int, db: Session = Depends(get_db)):
-    client = db.query(Client).filter(Client.user_id == client_id).first()
-    if not client:
+def get_client(client_id: int, selection: Selection = Depends(sparse_fields(CLIENTS)), db: Session = Depends(get_db)):
+    clients = client_rows(db, Client.user_id == client_id, selection=selection)
+    if not clients:
         raise HTTPException(status_code=404, detail="Client not found")
-    return client
+    return ORJSONResponse(clients[0])
 
 @router.get("/", response_model=list[ClientOut])    
-def get_clients(db: Session = Depends(get_db)):
-    clients = db.query(Client).all()
-    return clients
+def get_clients(selection: Selection = Depends(sparse_fields(CLIENTS)), db: Session = Depends(get_db)):
+    return ORJSONResponse(client_rows(db, selection=selection))
 @router.put("/{client_id}", response_model=ClientOut)
 def update_client(client_id: int, client: ClientBase, db: Session = Depends(get_db)):
     db_client = db.query(Client).filter(Client.client_id == client_id).first()
@@ -130,7 +119,8 @@ def delete_client(client_id: int, db: Session = Depends(get_db)):
 
 
 
-@router.get("/admin/")
+@router.get("/admin/", dependencies=[Depends(rate_limit(ANALYTICS_PER_USER, ANALYTICS_PER_ROUTE))])
+@query_budget(5)
 def get_clients_analytics(db: Session = Depends(get_db)):
     clients = (
         db.query(Client)
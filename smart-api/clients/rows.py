@@ -0,0 +1,65 @@
+# clients/rows.py
+# Client rows built from selected columns, in the shape of ClientOut.
+# CLIENTS is the projection behind ``?fields=`` (fieldsets.py).
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from fieldsets import Column, Projection, Selection
+from models import Client
+from storage import signed_reference
+from storage.images import variant_urls
+
+_VARIANT_KEYS = ("thumb", "medium", "thumb_jpeg", "medium_jpeg")
+
+
+def _variants(reference: Optional[str]) -> Optional[Dict[str, str]]:
+    urls = variant_urls(reference)
+    return {key: urls[key] for key in _VARIANT_KEYS} if urls else None
+
+
+@dataclass(slots=True)
+class ClientRow:
+    first_name: Optional[str]
+    last_name: Optional[str]
+    organization_name: Optional[str]
+    tax_number: Optional[str]
+    phone_number: Optional[str]
+    national_id_number: Optional[int]
+    address: Optional[str]
+    user_id: int
+    client_type: str
+    verification_id: Optional[bool]
+    verification_tax: Optional[bool]
+    id: int
+    national_id_proof: Optional[str]
+    tax_document_proof: Optional[str]
+    profile_picture: Optional[str]
+    profile_picture_variants: Optional[Dict[str, str]]
+
+
+CLIENTS = Projection("client", [
+    Column("first_name", Client.first_name),
+    Column("last_name", Client.last_name),
+    Column("organization_name", Client.organization_name),
+    Column("tax_number", Client.tax_number),
+    Column("phone_number", Client.phone_number),
+    Column("national_id_number", Client.national_id_number),
+    Column("address", Client.address),
+    Column("user_id", Client.user_id),
+    Column("client_type", Client.client_type),
+    Column("verification_id", Client.verification_id),
+    Column("verification_tax", Client.verification_tax),
+    Column("id", Client.id),
+    # KYC documents are returned as short-lived signed URLs
+    Column("national_id_proof", Client.national_id_proof, signed_reference),
+    Column("tax_document_proof", Client.tax_document_proof, signed_reference),
+    Column("profile_picture", Client.profile_picture),
+    Column("profile_picture_variants", Client.profile_picture, _variants),
+], row=ClientRow)
+
+
+def client_rows(db: Session, *criteria, selection: Optional[Selection] = None) -> List[ClientRow]:
+    """Clients matching ``criteria`` (all when none), ordered by id"""
+    return CLIENTS.rows(db, selection or CLIENTS.full(), *criteria, order_by=Client.id)
@@ -0,0 +1,177 @@
+# compression.py
+# Negotiated response compression. JSON and other text bodies above
+# COMPRESSION_MIN_BYTES go out as brotli (when the package is installed and
+# the client accepts it) or gzip. WebSocket traffic, streaming responses
+# (SSE, CSV exports) and bodies that are already encoded pass through
+# untouched. Defaults come from benchmarks/test_compression.py.
+import importlib.util
+import os
+import time
+import zlib
+from typing import Optional, Tuple
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from observability.metrics import Counter, Histogram
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+# Below about one packet the saving doesn't pay for the CPU
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+# Larger bodies are compressed in a worker thread so the event loop keeps serving
+COMPRESSION_THREAD_MIN_BYTES = int(os.getenv("COMPRESSION_THREAD_MIN_BYTES", 256 * 1024))
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+COMPRESSED_BYTES = Counter(
+    "http_compression_bytes_total", "Response body bytes before and after compression", ("encoding", "stage"),
+)
+COMPRESSION_SECONDS = Histogram(
+    "http_compression_seconds", "Time spent compressing one response body", ("encoding",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+# ==========================
+# CODECS
+# ==========================
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """``body`` encoded as ``br`` or ``gzip`` at ``level`` (the configured default when None)"""
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    # zlib allocates window and hash table up front (about 256 KB at the
+    # defaults); like nginx, shrink both to fit the body, which is known here
+    window_bits = max(9, min(15, (len(body) - 1).bit_length()))
+    compressor = zlib.compressobj(
+        GZIP_LEVEL if level is None else level, zlib.DEFLATED, 16 + window_bits, max(1, min(8, window_bits - 7)),
+    )
+    return compressor.compress(body) + compressor.flush()
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """In server preference order"""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an ``Accept-Encoding`` header, or None for identity"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _compressible(headers: Headers, status: int) -> bool:
+    if status < 200 or status in (204, 206, 304):
+        return False
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type == "text/event-stream":
+        return False
+    return (
+        content_type in COMPRESSIBLE_TYPES
+        or content_type.startswith("text/")
+        or content_type.endswith(("+json", "+xml"))
+    )
+
+
+# ==========================
+# MIDDLEWARE
+# ==========================
+class CompressionMiddleware:
+    """Compress complete, compressible HTTP response bodies.
+
+    Only single-message bodies are compressed: anything sent in several
+    chunks is a stream and is passed through as it comes, so SSE events
+    and exports are not held back. The compressed body keeps an exact
+    Content-Length.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether this is a stream
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = Headers(raw=start["headers"])
+            if (message.get("more_body", False) or len(body) < self.minimum_size
+                    or not _compressible(headers, start["status"])):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            started = time.perf_counter()
+            if len(body) >= COMPRESSION_THREAD_MIN_BYTES:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            COMPRESSION_SECONDS.observe(time.perf_counter() - started, encoding)
+            COMPRESSED_BYTES.inc(encoding, "in", amount=len(body))
+            COMPRESSED_BYTES.inc(encoding, "out", amount=len(compressed))
+
+            response_headers = MutableHeaders(scope=start)
+            response_headers["Content-Encoding"] = encoding
+            response_headers["Content-Length"] = str(len(compressed))
+            response_headers.add_vary_header("Accept-Encoding")
+            etag = response_headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Same resource, different bytes: no longer a strong match
+                response_headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
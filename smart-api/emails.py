@@ -1,3 +1,4 @@
+import logging
 import smtplib, os
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
@@ -7,8 +8,13 @@ from datetime import datetime, timedelta
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from observability.metrics import track_send
+from observability.tracing import KIND_CLIENT, traced
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
@@ -28,7 +34,8 @@ def verify_token(token: str) -> str:
 
 
 
-def send_verification_email(email: str, token: str):
+@traced("emails.send_verification_email", KIND_CLIENT)
+def send_verification_email(email: str, token: str, raise_errors: bool = False):
     link = f"http://localhost:8000/verify-email?token={token}"
 
     # Plain text version
@@ -54,9 +61,11 @@ def send_verification_email(email: str, token: str):
     msg.attach(MIMEText(html, "html"))
 
     try:
-        with smtplib.SMTP(os.getenv("EMAIL_HOST"), int(os.getenv("EMAIL_PORT"))) as server:
+        with track_send("email"), smtplib.SMTP(os.getenv("EMAIL_HOST"), int(os.getenv("EMAIL_PORT"))) as server:
             server.starttls()
             server.login(os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASSWORD"))
             server.send_message(msg)
     except Exception as e:
-        print(f"Email sending failed: {e}")
\ No newline at end of file
+        if raise_errors:
+            raise
+        logger.warning("Email sending failed: %s", e)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# fieldsets.py
+# Sparse fieldsets for read APIs: ``?fields=id,status,appointment_datetime``
+# returns only those attributes and ``?include=client`` embeds only the
+# named relations. A Projection turns the selection into a query over just
+# the needed columns, plus one query per included relation, so payload and
+# query cost follow what the client asked for. With neither parameter the
+# full response is returned, exactly as before.
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+
+@dataclass(frozen=True)
+class Column:
+    """A top-level attribute read from ``expression`` (None: always null)"""
+    name: str
+    expression: Any = None
+    convert: Optional[Callable[[Any], Any]] = None
+
+
+@dataclass(frozen=True)
+class Relation:
+    """A nested attribute loaded by ``load(db, keys) -> {key: value}``.
+
+    ``key`` names the parent column the lookup is keyed by; it is fetched
+    even when not selected. ``keys`` is a subquery of the matching parents'
+    key values, so each relation costs one query however many parents there
+    are. Parents missing from the result get ``default()``.
+    """
+    name: str
+    load: Callable[[Session, Any], Dict[Any, Any]]
+    key: str = "id"
+    default: Callable[[], Any] = list
+
+
+@dataclass(frozen=True)
+class Selection:
+    names: Tuple[str, ...]
+    full: bool
+
+
+class Projection:
+    def __init__(self, resource: str, attributes: Sequence, row: Optional[Callable] = None):
+        """``attributes`` in response order; ``row(**values)`` builds full rows (dicts otherwise)"""
+        self.resource = resource
+        self.attributes = list(attributes)
+        self.row = row
+        self._by_name = {attribute.name: attribute for attribute in self.attributes}
+        self.columns = [a.name for a in self.attributes if isinstance(a, Column)]
+        self.relations = [a.name for a in self.attributes if isinstance(a, Relation)]
+
+    def parse(self, fields: Optional[str], include: Optional[str], omit: Sequence[str] = ()) -> Selection:
+        """Validate the query parameters; unknown names are a 400.
+
+        ``omit`` leaves relations out of the default (no parameters) response;
+        they can still be asked for by name.
+        """
+        requested = _split(fields)
+        included = _split(include)
+        unknown = [name for name in requested if name not in self._by_name]
+        unknown += [name for name in included if name not in self.relations]
+        if unknown:
+            raise HTTPException(status_code=400, detail={
+                "message": f"Unknown field(s) for {self.resource}: {', '.join(unknown)}",
+                "fields": self.columns + self.relations,
+                "include": self.relations,
+            })
+        if not requested and not included:
+            return self.full(omit)
+
+        wanted = set(requested or self.columns) | set(included) | {"id"}
+        return Selection(tuple(name for name in self._by_name if name in wanted), False)
+
+    def full(self, omit: Sequence[str] = ()) -> Selection:
+        return Selection(tuple(name for name in self._by_name if name not in omit), True)
+
+    def rows(self, db: Session, selection: Selection, *criteria, order_by=None) -> list:
+        """Rows for ``selection`` matching ``criteria``"""
+        attributes = [self._by_name[name] for name in selection.names]
+        relations = [a for a in attributes if isinstance(a, Relation)]
+
+        # Selected columns, then any relation keys not already among them
+        expressions: Dict[str, Any] = {}
+        for attribute in attributes:
+            if isinstance(attribute, Column) and attribute.expression is not None:
+                expressions[attribute.name] = attribute.expression.label(attribute.name)
+        for relation in relations:
+            if relation.key not in expressions:
+                expressions[relation.key] = self._by_name[relation.key].expression.label(relation.key)
+        names = list(expressions)
+
+        statement = select(*expressions.values()).where(*criteria)
+        if order_by is not None:
+            statement = statement.order_by(order_by)
+        records = [dict(zip(names, values)) for values in db.execute(statement)]
+
+        loaded = {}
+        for relation in relations:
+            keys = select(self._by_name[relation.key].expression).where(*criteria)
+            loaded[relation.name] = relation.load(db, keys) if records else {}
+
+        build = self.row if selection.full and self.row else None
+        rows = []
+        for record in records:
+            row = {}
+            for attribute in attributes:
+                if isinstance(attribute, Relation):
+                    value = loaded[attribute.name].get(record[attribute.key])
+                    row[attribute.name] = attribute.default() if value is None else value
+                elif attribute.expression is None:
+                    row[attribute.name] = None
+                else:
+                    value = record[attribute.name]
+                    row[attribute.name] = attribute.convert(value) if attribute.convert and value is not None else value
+            rows.append(build(**row) if build else row)
+        return rows
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def sparse_fields(projection: Projection, omit: Sequence[str] = ()):
+    """Dependency reading ``fields``/``include`` for ``projection``"""
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated {projection.resource} attributes to return"),
+        include: Optional[str] = Query(None, description="Comma-separated relations to embed"),
+    ) -> Selection:
+        return projection.parse(fields, include, omit)
+    return dependency
@@ -0,0 +1,324 @@
+# idempotency.py
+# Idempotency-Key support for writes that mobile clients retry. A handler
+# marked @idempotent runs once per key: the first request claims the key
+# in idempotency_keys, and its response is stored there for
+# IDEMPOTENCY_TTL_HOURS. A retry with the same key and the same request gets
+# that response back (with Idempotent-Replayed: true) without running the
+# handler again. A retry that arrives while the first request is still
+# running waits for it, and gets 409 with Retry-After if it takes too long.
+# The same key sent with a different body gets 422.
+#
+#   @booking_router.post("/", response_model=BookingResponse)
+#   @idempotent
+#   def create_booking(...):
+#
+# Requests without the header behave exactly as before. 5xx responses (and
+# 429) are not stored, so the retry runs the handler again.
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+import anyio
+import anyio.to_thread
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from observability.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+# A claim not completed within this long is assumed dead and can be taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+# How long a duplicate waits for the first request before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+IDEMPOTENCY_POLL_SECONDS = 0.2
+# Larger responses are not stored; a retry runs the handler again
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", 1024 * 1024))
+MAX_KEY_LENGTH = 255
+
+CLAIMED, REPLAY, MISMATCH, IN_PROGRESS = "claimed", "replay", "mismatch", "in_progress"
+
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",),
+)
+
+
+def idempotent(func: Callable) -> Callable:
+    """Mark a route handler as honouring Idempotency-Key.
+
+    Apply below the router decorator so the route registers the marked
+    function.
+    """
+    func.idempotent = True
+    return func
+
+
+# ==========================
+# STORE
+# ==========================
+def storage_key(method: str, route_path: str, key: str) -> str:
+    """The row key: the client's key only means something for the route it was sent to"""
+    return hashlib.sha256(f"{method} {route_path}\n{key}".encode()).hexdigest()
+
+
+def fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method} {path}?".encode())
+    digest.update(query_string)
+    digest.update(b"\n")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def claim(key: str, request_fingerprint: str):
+    """(outcome, stored row or None) for a request arriving under ``key``"""
+    from database import engine
+    from models import IdempotencyKey
+
+    now = datetime.utcnow()
+    lease = now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    try:
+        with engine.begin() as conn:
+            row = conn.execute(select(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+            if row is not None and row.expires_at <= now:
+                conn.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                row = None
+            if row is None:
+                conn.execute(insert(IdempotencyKey).values(
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    status="in_progress",
+                    locked_until=lease,
+                    created_at=now,
+                    expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+                ))
+                return CLAIMED, None
+            if row.fingerprint != request_fingerprint:
+                return MISMATCH, None
+            if row.status == "completed":
+                return REPLAY, row
+            if row.locked_until is None or row.locked_until <= now:
+                # The first request died without finishing; take its claim over
+                result = conn.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.status == "in_progress",
+                        IdempotencyKey.locked_until == row.locked_until,
+                    )
+                    .values(locked_until=lease)
+                )
+                if result.rowcount:
+                    return CLAIMED, None
+            return IN_PROGRESS, None
+    except IntegrityError:
+        return IN_PROGRESS, None  # another node inserted the key first
+
+
+def complete(key: str, status: int, headers: List[Tuple[str, str]], body: bytes) -> None:
+    from database import engine
+    from models import IdempotencyKey
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(
+                status="completed",
+                locked_until=None,
+                response_status=status,
+                response_headers=headers,
+                response_body=body,
+            )
+        )
+
+
+def release(key: str) -> None:
+    """Give up a claim so the next retry runs the handler"""
+    from database import engine
+    from models import IdempotencyKey
+
+    with engine.begin() as conn:
+        conn.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.status == "in_progress")
+        )
+
+
+def _stored_headers(raw: List[Tuple[bytes, bytes]]) -> List[Tuple[str, str]]:
+    # Rate limit counters describe the original request, not the replay
+    return [
+        (name.decode("latin-1"), value.decode("latin-1"))
+        for name, value in raw
+        if name.lower() != b"set-cookie" and not name.lower().startswith(b"x-ratelimit-")
+    ]
+
+
+def _storable(status: Optional[int], size: int) -> bool:
+    return status is not None and status < 500 and status != 429 and size <= IDEMPOTENCY_MAX_BODY_BYTES
+
+
+# ==========================
+# MIDDLEWARE
+# ==========================
+class IdempotencyMiddleware:
+    """Enforce Idempotency-Key on routes whose handler is marked @idempotent.
+
+    Sits inside the other middleware, so the stored response is the
+    handler's own (uncompressed, without per-request headers). Duplicates
+    within one process queue on a local lock instead of polling the table.
+    If the table cannot be reached the request runs as if it had no key.
+    """
+
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.router = router
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PATCH", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        client_key = Headers(scope=scope).get(IDEMPOTENCY_HEADER)
+        route_path = self._idempotent_route(scope) if client_key is not None else None
+        if route_path is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(client_key) <= MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}, status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        key = storage_key(scope["method"], route_path, client_key)
+        request_fingerprint = fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            outcome, row = await self._claim(key, request_fingerprint)
+            if outcome == CLAIMED:
+                await self._run(key, scope, _replay_body(body, receive), send)
+                return
+            IDEMPOTENT_REQUESTS.inc(outcome)
+            if outcome == REPLAY:
+                await _send_stored(row, send)
+            elif outcome == MISMATCH:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key was already used with a different request"}, status_code=422,
+                )
+                await response(scope, receive, send)
+            else:
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still being processed"},
+                    status_code=409,
+                    headers={"Retry-After": str(max(1, round(IDEMPOTENCY_WAIT_SECONDS)))},
+                )
+                await response(scope, receive, send)
+
+    def _idempotent_route(self, scope: Scope) -> Optional[str]:
+        """The path template of the marked route ``scope`` is for, or None"""
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                endpoint = getattr(route, "endpoint", None)
+                return route.path if getattr(endpoint, "idempotent", False) else None
+        return None
+
+    async def _claim(self, key: str, request_fingerprint: str):
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            try:
+                outcome, row = await anyio.to_thread.run_sync(claim, key, request_fingerprint)
+            except SQLAlchemyError:
+                logger.exception("Idempotency store unavailable, running request unguarded")
+                return CLAIMED, None
+            # Held on another node: wait for it to finish, then replay
+            if outcome != IN_PROGRESS or time.monotonic() >= deadline:
+                return outcome, row
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+    async def _run(self, key: str, scope: Scope, receive: Receive, send: Send) -> None:
+        status: Optional[int] = None
+        headers: List[Tuple[str, str]] = []
+        chunks: List[bytes] = []
+        size = 0
+
+        async def send_and_keep(message: Message) -> None:
+            nonlocal status, headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = _stored_headers(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= IDEMPOTENCY_MAX_BODY_BYTES:
+                    chunks.append(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_keep)
+        except BaseException:
+            with anyio.CancelScope(shield=True):
+                await self._finish(release, key)
+            raise
+        if _storable(status, size):
+            IDEMPOTENT_REQUESTS.inc("stored")
+            await self._finish(complete, key, status, headers, b"".join(chunks))
+        else:
+            IDEMPOTENT_REQUESTS.inc("released")
+            await self._finish(release, key)
+
+    @staticmethod
+    async def _finish(func: Callable, *args) -> None:
+        try:
+            await anyio.to_thread.run_sync(func, *args)
+        except SQLAlchemyError:
+            # The claim lapses after IDEMPOTENCY_LOCK_SECONDS and the key can be retried
+            logger.exception("Could not update idempotency key", extra={"idempotency_key": args[0]})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """A receive that hands the handler the body already read, then waits on the client"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _send_stored(row, send: Send) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.response_headers or []]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": row.response_status, "headers": headers})
+    await send({"type": "http.response.body", "body": row.response_body or b"", "more_body": False})
@@ -0,0 +1,181 @@
+# jobs/__init__.py
+# Scheduled maintenance jobs. A job is a function registered with a cron
+# schedule; jobs.runner claims due jobs through a row in scheduled_jobs, so
+# with several nodes running the runner each slot still runs once.
+#
+# Long sweeps go through JobContext.sweep: rows are handled in keyset
+# chunks, each its own transaction, and the last id is checkpointed so an
+# interrupted run resumes where it stopped.
+import calendar
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import ScheduledJob
+
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 500))
+# A claim not extended for this long is considered abandoned
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+
+
+# ==========================
+# CRON SCHEDULES
+# ==========================
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+def _field(spec: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron field {spec!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron (minute hour day-of-month month day-of-week), in UTC"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression {expression!r} needs five fields")
+        self.minutes = _field(fields[0], 0, 59)
+        self.hours = _field(fields[1], 0, 23)
+        self.days = _field(fields[2], 1, 31)
+        self.months = _field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday; stored as Python weekdays (Monday = 0)
+        self.weekdays = {(day - 1) % 7 for day in _field(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = moment.weekday() in self.weekdays
+        # Like cron: when both are restricted, either one matching is enough
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                days_left = calendar.monthrange(candidate.year, candidate.month)[1] - candidate.day + 1
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=days_left)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron expression {self.expression!r} never fires")
+
+
+# ==========================
+# REGISTRY
+# ==========================
+@dataclass
+class Job:
+    name: str
+    schedule: CronSchedule
+    func: Callable[["JobContext"], Optional[dict]]
+    description: str = ""
+
+
+_jobs: Dict[str, Job] = {}
+
+
+def job(name: str, schedule: str):
+    """Register ``func(ctx) -> dict | None`` to run on a cron schedule"""
+    def register(func):
+        _jobs[name] = Job(name, CronSchedule(schedule), func, (func.__doc__ or "").strip())
+        return func
+    return register
+
+
+def registered_jobs() -> List[Job]:
+    return list(_jobs.values())
+
+
+def get_job(name: str) -> Optional[Job]:
+    return _jobs.get(name)
+
+
+# ==========================
+# CONTEXT AND CHECKPOINTS
+# ==========================
+class LockLost(Exception):
+    """Another runner took the job over after this one's lease expired"""
+
+
+class JobContext:
+    def __init__(self, db: Session, name: str, owner: str, checkpoint: Optional[dict] = None):
+        self.db = db
+        self.name = name
+        self.owner = owner
+        self.checkpoint = dict(checkpoint or {})
+
+    def save(self, **progress) -> None:
+        """Commit pending work together with the checkpoint and extend the lease"""
+        self.checkpoint.update(progress)
+        result = self.db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.name == self.name, ScheduledJob.locked_by == self.owner)
+            .values(
+                checkpoint=dict(self.checkpoint),
+                locked_until=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS),
+            )
+        )
+        if not result.rowcount:
+            self.db.rollback()
+            raise LockLost(self.name)
+        self.db.commit()
+
+    def sweep(self, model, criteria: Iterable, apply: Callable[[List], int], name: str = "last_id",
+              chunk_size: int = JOB_CHUNK_SIZE) -> int:
+        """Call ``apply(rows)`` on matching rows in id order, a chunk per transaction.
+
+        ``apply`` changes the rows (or the session) and returns how many it
+        changed. Resumes after the id checkpointed under ``name``.
+        """
+        criteria = list(criteria)
+        last_id = self.checkpoint.get(name, 0)
+        changed = 0
+        while True:
+            rows = (
+                self.db.query(model)
+                .filter(*criteria, model.id > last_id)
+                .order_by(model.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return changed
+            changed += apply(rows)
+            last_id = rows[-1].id
+            self.save(**{name: last_id})
@@ -0,0 +1,190 @@
+# jobs/runner.py
+# Runs due jobs. In the API process a background task checks every
+# JOBS_TICK_SECONDS; ``python -m jobs.runner`` does the same as a separate
+# worker (set JOBS_IN_APP=0 then) and can list jobs or run one now.
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import anyio.to_thread
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from jobs import JOB_LEASE_SECONDS, Job, JobContext, get_job, registered_jobs
+import jobs.tasks  # noqa: F401  (registers the jobs)
+from models import ScheduledJob
+from observability.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+JOBS_IN_APP = os.getenv("JOBS_IN_APP", "1") == "1"
+JOBS_TICK_SECONDS = float(os.getenv("JOBS_TICK_SECONDS", 30))
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+JOB_RUNS = Counter("job_runs_total", "Scheduled job runs, by outcome", ("job", "status"))
+JOB_DURATION = Histogram(
+    "job_duration_seconds", "Scheduled job run time", ("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+
+
+def _claim(db, job: Job, now: datetime, force: bool = False) -> Optional[ScheduledJob]:
+    """Take the job's lock if it is due (or ``force``) and nobody holds it"""
+    if db.get(ScheduledJob, job.name) is None:
+        try:
+            db.add(ScheduledJob(name=job.name, next_run_at=job.schedule.next_after(now)))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    conditions = [
+        ScheduledJob.name == job.name,
+        or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now),
+    ]
+    if not force:
+        conditions.append(ScheduledJob.next_run_at <= now)
+    result = db.execute(
+        update(ScheduledJob)
+        .where(*conditions)
+        .values(locked_by=OWNER, locked_until=now + timedelta(seconds=JOB_LEASE_SECONDS), last_started_at=now)
+    )
+    db.commit()
+    return db.get(ScheduledJob, job.name) if result.rowcount else None
+
+
+def run_job(job: Job, force: bool = False) -> Optional[dict]:
+    """Run ``job`` if this runner can claim it; returns the state it finished in"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        state = _claim(db, job, now, force)
+        if state is None:
+            return None
+
+        ctx = JobContext(db, job.name, OWNER, state.checkpoint)
+        started = time.perf_counter()
+        finished = {"locked_by": None, "locked_until": None}
+        try:
+            result = job.func(ctx) or {}
+            db.commit()
+            finished.update(last_status="succeeded", last_error=None, last_result=result, checkpoint=None)
+        except Exception as exc:
+            db.rollback()
+            # The checkpoint stays, so the next run resumes the sweep
+            finished.update(last_status="failed", last_error=f"{type(exc).__name__}: {exc}"[:1000])
+            logger.exception("Job failed", extra={"job": job.name})
+        elapsed = time.perf_counter() - started
+
+        end = datetime.utcnow()
+        finished.update(last_finished_at=end, next_run_at=job.schedule.next_after(end))
+        db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.name == job.name, ScheduledJob.locked_by == OWNER)
+            .values(**finished)
+        )
+        db.commit()
+
+        JOB_RUNS.inc(job.name, finished["last_status"])
+        JOB_DURATION.observe(elapsed, job.name)
+        logger.info("Job finished", extra={
+            "job": job.name, "status": finished["last_status"], "duration_ms": round(elapsed * 1000, 1),
+            "result": finished.get("last_result"),
+        })
+        return {"job": job.name, "status": finished["last_status"], "result": finished.get("last_result"),
+                "error": finished.get("last_error")}
+    finally:
+        db.close()
+
+
+def run_due() -> List[dict]:
+    return [report for report in (run_job(job) for job in registered_jobs()) if report]
+
+
+# ==========================
+# BACKGROUND TASK
+# ==========================
+class Runner:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await anyio.to_thread.run_sync(run_due)
+            except Exception:
+                logger.exception("Job runner tick failed")
+            await asyncio.sleep(JOBS_TICK_SECONDS)
+
+
+runner = Runner()
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m jobs.runner [--list | --run NAME | --once]"""
+    parser = argparse.ArgumentParser(description="Run scheduled jobs")
+    parser.add_argument("--list", action="store_true", help="Show jobs, schedules and last runs")
+    parser.add_argument("--run", metavar="NAME", help="Run one job now, ignoring its schedule")
+    parser.add_argument("--once", action="store_true", help="Run what is due and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        db = SessionLocal()
+        try:
+            states = {state.name: state for state in db.query(ScheduledJob).all()}
+        finally:
+            db.close()
+        rows = []
+        for job in registered_jobs():
+            state = states.get(job.name)
+            rows.append({
+                "job": job.name,
+                "schedule": job.schedule.expression,
+                "next_run_at": state.next_run_at.isoformat() if state else None,
+                "last_status": state.last_status if state else None,
+                "last_result": state.last_result if state else None,
+            })
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    if args.run:
+        job = get_job(args.run)
+        if job is None:
+            parser.error(f"unknown job {args.run!r}")
+        report = run_job(job, force=True)
+        print(json.dumps(report or {"job": job.name, "status": "locked"}, indent=2, default=str))
+        return 0 if report and report["status"] == "succeeded" else 1
+
+    while True:
+        for report in run_due():
+            print(json.dumps(report, default=str))
+        if args.once:
+            return 0
+        time.sleep(JOBS_TICK_SECONDS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# jobs/tasks.py
+# The scheduled jobs. Times are UTC, like every timestamp in the models.
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import stripe
+from sqlalchemy import or_
+
+from jobs import JobContext, job
+from models import (
+    BookingRequest, IdempotencyKey, Notification, OutboxEvent, Payment, RateLimitBucket, WorkerLoan, WorkerLoanStatus,
+    Workers,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pending requests nobody acted on are expired after this long
+BOOKING_REQUEST_TTL_HOURS = int(os.getenv("BOOKING_REQUEST_TTL_HOURS", 72))
+LOAN_DEFAULT_GRACE_DAYS = int(os.getenv("LOAN_DEFAULT_GRACE_DAYS", 7))
+# Give the client time to finish paying before asking Stripe
+PAYMENT_RECONCILE_AFTER_MINUTES = int(os.getenv("PAYMENT_RECONCILE_AFTER_MINUTES", 15))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 30))
+# Any policy's bucket has refilled long before this; dropping it loses nothing
+RATE_LIMIT_BUCKET_IDLE_HOURS = 24
+# Stripe round trips per transaction
+RECONCILE_CHUNK_SIZE = 50
+
+
+@job("expire_booking_requests", "*/15 * * * *")
+def expire_booking_requests(ctx: JobContext) -> dict:
+    """Expire pending booking requests whose appointment has passed or that went unanswered"""
+    now = datetime.utcnow()
+
+    def expire(requests):
+        for request in requests:
+            request.status = "expired"
+        return len(requests)
+
+    expired = ctx.sweep(BookingRequest, [
+        BookingRequest.status == "pending",
+        or_(
+            BookingRequest.appointment_datetime < now,
+            BookingRequest.requested_date < now - timedelta(hours=BOOKING_REQUEST_TTL_HOURS),
+        ),
+    ], expire)
+    return {"expired": expired}
+
+
+@job("expire_good_conduct", "0 2 * * *")
+def expire_good_conduct(ctx: JobContext) -> dict:
+    """Clear good-conduct verification once the certificate expires, and tell the worker"""
+    now = datetime.utcnow()
+
+    def flag(workers):
+        for worker in workers:
+            worker.verification_good_conduct = False
+            ctx.db.add(Notification(
+                user_id=worker.user_id,
+                title="Certificate of Good Conduct Expired",
+                message=(
+                    f"Your certificate of good conduct expired on "
+                    f"{worker.good_conduct_expiry_date.strftime('%d %b %Y')}. "
+                    "Upload a renewed certificate to stay verified."
+                ),
+                is_read=False,
+            ))
+        return len(workers)
+
+    flagged = ctx.sweep(Workers, [
+        Workers.verification_good_conduct.is_(True),
+        Workers.good_conduct_expiry_date < now,
+    ], flag)
+    return {"flagged": flagged}
+
+
+@job("mark_loan_defaults", "0 3 * * *")
+def mark_loan_defaults(ctx: JobContext) -> dict:
+    """Move active loans still owing past their due date (plus grace) to defaulted"""
+    cutoff = datetime.utcnow() - timedelta(days=LOAN_DEFAULT_GRACE_DAYS)
+
+    def default(loans):
+        for loan in loans:
+            loan.status = WorkerLoanStatus.defaulted
+        return len(loans)
+
+    defaulted = ctx.sweep(WorkerLoan, [
+        WorkerLoan.status == WorkerLoanStatus.active,
+        WorkerLoan.remaining_balance > 0,
+        WorkerLoan.due_date < cutoff,
+    ], default)
+    return {"defaulted": defaulted}
+
+
+@job("reconcile_payments", "*/10 * * * *")
+def reconcile_payments(ctx: JobContext) -> dict:
+    """Settle pending Stripe payments from the PaymentIntent's actual status"""
+    stripe.api_key = os.getenv("stripe_api_key")
+    cutoff = datetime.utcnow() - timedelta(minutes=PAYMENT_RECONCILE_AFTER_MINUTES)
+    counts = {"succeeded": 0, "failed": 0, "unreachable": 0}
+
+    def reconcile(payments):
+        changed = 0
+        for payment in payments:
+            try:
+                intent = stripe.PaymentIntent.retrieve(payment.stripe_payment_intent)
+            except stripe.StripeError as exc:
+                counts["unreachable"] += 1
+                logger.warning("Could not reconcile payment %s: %s", payment.id, exc)
+                continue
+            if intent.status == "succeeded":
+                payment.status = "succeeded"
+                booking = payment.booking
+                if payment.type == "deposit":
+                    booking.deposit_paid = payment.amount
+                    booking.payment_status = "deposit_paid"
+                else:
+                    booking.payment_status = "paid"
+            elif intent.status == "canceled":
+                payment.status = "failed"
+            else:
+                continue
+            counts[payment.status] += 1
+            changed += 1
+        return changed
+
+    ctx.sweep(Payment, [
+        Payment.status == "pending",
+        Payment.stripe_payment_intent.isnot(None),
+        Payment.created_at < cutoff,
+    ], reconcile, chunk_size=RECONCILE_CHUNK_SIZE)
+    return counts
+
+
+# ==========================
+# ROLLUPS AND HOUSEKEEPING
+# ==========================
+@job("rebuild_notification_counters", "30 3 * * *")
+def rebuild_notification_counters(ctx: JobContext) -> dict:
+    """Recompute unread counters from the notifications table, correcting any drift"""
+    from notifications.inbox import rebuild_counters
+
+    return {"counters": rebuild_counters(ctx.db)}
+
+
+@job("archive_notifications", "0 4 * * *")
+def archive_notifications(ctx: JobContext) -> dict:
+    """Move old read notifications to the archive (notifications.retention)"""
+    from notifications.retention import archive_read_notifications
+
+    return archive_read_notifications(ctx.db)
+
+
+@job("prune_outbox", "0 5 * * *")
+def prune_outbox(ctx: JobContext) -> dict:
+    """Delete dispatched outbox events past retention; failed ones are kept for inspection"""
+    cutoff = datetime.utcnow() - timedelta(days=OUTBOX_RETENTION_DAYS)
+
+    def delete(events):
+        for event in events:
+            ctx.db.delete(event)
+        return len(events)
+
+    deleted = ctx.sweep(OutboxEvent, [
+        OutboxEvent.status == "dispatched",
+        OutboxEvent.dispatched_at < cutoff,
+    ], delete)
+    return {"deleted": deleted}
+
+
+@job("prune_rate_limit_buckets", "20 * * * *")
+def prune_rate_limit_buckets(ctx: JobContext) -> dict:
+    """Delete shared rate limit buckets nobody has drawn from lately (ratelimit.DatabaseBackend)"""
+    cutoff = time.time() - RATE_LIMIT_BUCKET_IDLE_HOURS * 3600
+    deleted = (
+        ctx.db.query(RateLimitBucket)
+        .filter(RateLimitBucket.updated_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    ctx.save()
+    return {"deleted": deleted}
+
+
+@job("prune_idempotency_keys", "40 * * * *")
+def prune_idempotency_keys(ctx: JobContext) -> dict:
+    """Delete stored Idempotency-Key responses past their TTL (idempotency.py)"""
+    deleted = (
+        ctx.db.query(IdempotencyKey)
+        .filter(IdempotencyKey.expires_at < datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    ctx.save()
+    return {"deleted": deleted}
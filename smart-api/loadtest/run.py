@@ -0,0 +1,345 @@
+# loadtest/run.py
+# Async load generator for a running API. Results are written as JSON with
+# per-endpoint percentiles and throughput, stable enough to diff between commits.
+#
+#   DATABASE_URL=sqlite:///./loadtest.db python -m loadtest.seed --users 10000
+#   DATABASE_URL=sqlite:///./loadtest.db STRIPE_API_BASE=http://localhost:12111 uvicorn main:app
+#   python -m loadtest.run --duration 60 --concurrency 50 --baseline loadtest/results/main.json
+#
+# create_booking creates a Stripe PaymentIntent, so point the server at
+# stripe-mock (STRIPE_API_BASE) or POST /bookings/ is recorded as failing.
+# Every virtual user logs in from one address, so start the server with
+# RATE_LIMIT_ENABLED=0 for capacity runs (or leave it on to see the 429s).
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+
+try:
+    import websockets
+except ImportError:  # chat scenario is skipped without it
+    websockets = None
+
+# Relative frequency of each scenario per virtual user iteration
+SCENARIOS = {
+    "client_bookings": 4,
+    "create_booking": 2,
+    "worker_dashboard": 3,
+    "chat": 2,
+    "admin_analytics": 1,
+}
+REQUEST_TIMEOUT_SECONDS = 30
+CHAT_MESSAGES_PER_SESSION = 3
+# Pause between scenario iterations, so one virtual user is not a tight loop
+THINK_TIME_SECONDS = (0.05, 0.3)
+
+
+# ==========================
+# RESULTS
+# ==========================
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Recorder:
+    """Latency samples keyed by route template (e.g. ``GET /workers/{worker_id}/jobs``)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name: str, seconds: float, status: Any, ok: bool):
+        self.samples[name].append(seconds)
+        self.statuses[name][str(status)] += 1
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for name, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            endpoints[name] = {
+                "count": len(ordered),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(ordered), 4),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+                "status_codes": dict(sorted(self.statuses[name].items())),
+            }
+        total = sum(len(values) for values in self.samples.values())
+        errors = sum(self.errors.values())
+        every = sorted(value for values in self.samples.values() for value in values)
+        return {
+            "totals": {
+                "requests": total,
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "throughput_rps": round(total / elapsed, 2),
+                "p50_ms": round(percentile(every, 50) * 1000, 2),
+                "p95_ms": round(percentile(every, 95) * 1000, 2),
+                "p99_ms": round(percentile(every, 99) * 1000, 2),
+            },
+            "endpoints": endpoints,
+        }
+
+
+# ==========================
+# VIRTUAL USERS
+# ==========================
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, fixtures: Dict[str, Any], recorder: Recorder,
+                 tokens: Dict[str, str], rng: random.Random, ws_url: str):
+        self.client = client
+        self.fixtures = fixtures
+        self.recorder = recorder
+        self.tokens = tokens
+        self.rng = rng
+        self.ws_url = ws_url
+
+    async def request(self, name: str, method: str, url: str, expect=(200,), email: Optional[str] = None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        token = await self.token(email) if email else None
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as exc:
+            self.recorder.add(name, time.perf_counter() - started, type(exc).__name__, False)
+            return None
+        self.recorder.add(name, time.perf_counter() - started, response.status_code, response.status_code in expect)
+        return response
+
+    async def token(self, email: str) -> str:
+        # Shared across virtual users; each account logs in once per run
+        if email not in self.tokens:
+            response = await self.request(
+                "POST /login", "POST", "/login",
+                json={"email": email, "password": self.fixtures["password"]},
+            )
+            self.tokens[email] = response.json()["access_token"] if response is not None and response.status_code == 200 else ""
+        return self.tokens[email]
+
+    async def client_bookings(self):
+        client = self.rng.choice(self.fixtures["clients"])
+        await self.request("GET /bookings/client/{client_id}", "GET",
+                           f"/bookings/client/{client['client_id']}", email=client["email"])
+        chat = self.rng.choice(self.fixtures["conversations"])
+        await self.request("GET /messages/booking/{booking_id}", "GET",
+                           f"/messages/booking/{chat['booking_id']}", params={"user_id": chat["client_user_id"]})
+
+    async def create_booking(self):
+        client = self.rng.choice(self.fixtures["clients"])
+        worker = self.rng.choice(self.fixtures["workers"])
+        feature = self.rng.choice(self.fixtures["features"])
+        options = self.rng.sample(feature["options"], k=min(2, len(feature["options"])))
+        # Spread appointments widely; 409 (slot taken) is an expected outcome under contention
+        appointment = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(
+            days=self.rng.randint(1, 90), hours=self.rng.randint(0, 10), minutes=5 * self.rng.randint(0, 11)
+        )
+        await self.request(
+            "POST /bookings/", "POST", "/bookings/", expect=(200, 409), email=client["email"],
+            json={
+                "client_id": client["client_id"],
+                "worker_id": worker["worker_id"],
+                "appointment_datetime": appointment.isoformat(),
+                "service_feature_id": feature["service_feature_id"],
+                "deposit_paid": 0,
+                "description": "Load test booking",
+                "location": self.rng.choice(self.fixtures["locations"]),
+                "status": "pending",
+                "rating": None,
+                "booked_services": options,
+            },
+        )
+
+    async def worker_dashboard(self):
+        worker = self.rng.choice(self.fixtures["workers"])
+        worker_id = worker["worker_id"]
+        for name, url in (
+            ("GET /workers/{worker_id}/jobs", f"/workers/{worker_id}/jobs"),
+            ("GET /workers/{worker_id}/earnings-summary", f"/workers/{worker_id}/earnings-summary"),
+            ("GET /workers/{worker_id}/reviews", f"/workers/{worker_id}/reviews"),
+            ("GET /workers/{worker_id}/notifications", f"/workers/{worker_id}/notifications"),
+        ):
+            await self.request(name, "GET", url, email=worker["email"])
+
+    async def admin_analytics(self):
+        email = self.fixtures["admin"]["email"]
+        for name, url in (
+            ("GET /workers/admin/all", "/workers/admin/all"),
+            ("GET /clients/admin/", "/clients/admin/"),
+            ("GET /admin/analytics/bookings", "/admin/analytics/bookings"),
+            ("GET /bookings/", "/bookings/"),
+        ):
+            await self.request(name, "GET", url, email=email)
+
+    async def chat(self):
+        if websockets is None:
+            return
+        chat = self.rng.choice(self.fixtures["conversations"])
+        path = "/messages/ws/chat/{booking_id}/{user_id}"
+        client_url = f"{self.ws_url}/messages/ws/chat/{chat['booking_id']}/{chat['client_user_id']}"
+        worker_url = f"{self.ws_url}/messages/ws/chat/{chat['booking_id']}/{chat['worker_user_id']}"
+
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(client_url, open_timeout=REQUEST_TIMEOUT_SECONDS) as sender, \
+                    websockets.connect(worker_url, open_timeout=REQUEST_TIMEOUT_SECONDS) as receiver:
+                self.recorder.add(f"WS connect {path}", (time.perf_counter() - started) / 2, 101, True)
+                for _ in range(CHAT_MESSAGES_PER_SESSION):
+                    content = f"load test {uuid4().hex}"
+                    sent = time.perf_counter()
+                    await sender.send(json.dumps({"type": "new_message", "content": content}))
+                    # Round trip: persisted by the server and delivered to the other party
+                    while True:
+                        event = json.loads(await asyncio.wait_for(receiver.recv(), REQUEST_TIMEOUT_SECONDS))
+                        if event.get("type") == "new_message" and event.get("content") == content:
+                            break
+                    self.recorder.add(f"WS message {path}", time.perf_counter() - sent, 200, True)
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+            self.recorder.add(f"WS message {path}", time.perf_counter() - started, type(exc).__name__, False)
+
+    async def loop(self, deadline: float, weights: Dict[str, int]):
+        names, counts = zip(*[(name, weight) for name, weight in weights.items() if weight > 0])
+        while time.monotonic() < deadline:
+            scenario = self.rng.choices(names, weights=counts)[0]
+            await getattr(self, scenario)()
+            await asyncio.sleep(self.rng.uniform(*THINK_TIME_SECONDS))
+
+
+async def run(
+    base_url: str,
+    fixtures: Dict[str, Any],
+    duration: float = 60,
+    concurrency: int = 20,
+    ramp_up: float = 5,
+    weights: Optional[Dict[str, int]] = None,
+    seed: int = 1,
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    tokens: Dict[str, str] = {}
+    ws_url = "ws" + base_url[len("http"):] if base_url.startswith("http") else base_url
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT_SECONDS, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + ramp_up + duration
+
+        async def start(n: int):
+            await asyncio.sleep(ramp_up * n / concurrency)
+            user = VirtualUser(client, fixtures, recorder, tokens, random.Random(seed * 1000 + n), ws_url)
+            await user.loop(deadline, weights or SCENARIOS)
+
+        await asyncio.gather(*(start(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "meta": {
+            "base_url": base_url,
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "duration_seconds": round(elapsed, 2),
+            "concurrency": concurrency,
+            "ramp_up_seconds": ramp_up,
+            "scenarios": weights or SCENARIOS,
+            "git_commit": _git_commit(),
+        },
+        **recorder.summary(elapsed),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    """Side-by-side p95 and throughput per endpoint against an earlier run"""
+    lines = [f"{'endpoint':55} {'p95 ms':>18} {'rps':>16}"]
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            lines.append(f"{name:55} {now['p95_ms']:>18} {now['throughput_rps']:>16}  (new)")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        lines.append(
+            f"{name:55} {before['p95_ms']:>8} -> {now['p95_ms']:<8} {before['throughput_rps']:>6} -> {now['throughput_rps']:<6} ({change:+.1f}%)"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m loadtest.run --base-url http://localhost:8000 --duration 60 --concurrency 50"""
+    parser = argparse.ArgumentParser(description="Load test a running SmartSafi API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--fixtures", default="loadtest/fixtures.json", help="Written by python -m loadtest.seed")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of steady load after ramp-up")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which virtual users start")
+    parser.add_argument("--scenario", action="append", metavar="NAME=WEIGHT",
+                        help=f"Override scenario weights; known: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="loadtest/results/latest.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    weights = None
+    if args.scenario:
+        weights = {name: 0 for name in SCENARIOS}
+        for item in args.scenario:
+            name, _, weight = item.partition("=")
+            if name not in SCENARIOS:
+                parser.error(f"Unknown scenario {name}")
+            weights[name] = int(weight or 1)
+
+    with open(args.fixtures) as file:
+        fixtures = json.load(file)
+    if websockets is None:
+        print("websockets is not installed; skipping the chat scenario", file=sys.stderr)
+
+    results = asyncio.run(run(
+        args.base_url.rstrip("/"), fixtures, args.duration, args.concurrency, args.ramp_up, weights, args.seed,
+    ))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    totals = results["totals"]
+    print(
+        f"{totals['requests']} requests, {totals['throughput_rps']} req/s, "
+        f"p50 {totals['p50_ms']} ms, p95 {totals['p95_ms']} ms, p99 {totals['p99_ms']} ms, "
+        f"errors {totals['errors']} -> {args.output}"
+    )
+    if args.baseline:
+        with open(args.baseline) as file:
+            print(compare(results, json.load(file)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,587 @@
+# loadtest/seed.py
+# Synthetic production-scale data for local load testing and benchmarks.
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from authentication import get_password_hash
+from models import (
+    AdminProfile, Booking, BookingService, Client, FeatureOption, Language, LedgerEntryType,
+    Message, Notification, Payment, ServiceCategory, ServiceFeature, User, UserRoleEnum,
+    WorkerAvailability, WorkerLanguages, WorkerLedger, WorkerLoan, WorkerLoanStatus,
+    WorkerPayments, WorkerRating, WorkerService, WorkerWallet, Workers,
+)
+
+# Every seeded account logs in with this password
+DEFAULT_PASSWORD = "loadtest-password"
+EMAIL_DOMAIN = "loadtest.example.com"
+INSERT_BATCH_SIZE = 1000
+
+# Share of users per role; the rest are clients
+WORKER_SHARE = 0.2
+STAFF_SHARE = 0.01
+
+# Nairobi neighbourhoods: (name, latitude, longitude, relative demand)
+NEIGHBOURHOODS = [
+    ("Westlands", -1.2676, 36.8108, 9),
+    ("Kilimani", -1.2921, 36.7844, 8),
+    ("Kileleshwa", -1.2806, 36.7850, 6),
+    ("Lavington", -1.2781, 36.7700, 5),
+    ("Karen", -1.3197, 36.7076, 4),
+    ("Parklands", -1.2625, 36.8206, 5),
+    ("South B", -1.3090, 36.8370, 4),
+    ("Embakasi", -1.3203, 36.8980, 5),
+    ("Kasarani", -1.2210, 36.8980, 4),
+    ("Ruaka", -1.2050, 36.7790, 3),
+    ("Rongai", -1.3960, 36.7440, 3),
+    ("Syokimau", -1.3630, 36.9350, 2),
+]
+
+FIRST_NAMES = [
+    "Wanjiru", "Achieng", "Njeri", "Akinyi", "Mumbua", "Chebet", "Wairimu", "Nafula",
+    "Kamau", "Otieno", "Mwangi", "Kiprono", "Mutua", "Omondi", "Kariuki", "Wekesa",
+    "Grace", "Faith", "Mercy", "Brian", "Kevin", "Dennis", "Esther", "Joy",
+]
+LAST_NAMES = [
+    "Kamau", "Odhiambo", "Mwangi", "Wanjiku", "Kiptoo", "Mutiso", "Ochieng", "Njoroge",
+    "Chege", "Wafula", "Kiplagat", "Otieno", "Karanja", "Achieng", "Nyambura", "Kimani",
+]
+LANGUAGES = ["English", "Swahili", "Kikuyu", "Luo", "Kalenjin", "Luhya", "Kamba"]
+
+CHAT_LINES = {
+    "client": [
+        "Hi, are you still available for tomorrow?",
+        "The gate code is 4521, please call when you arrive.",
+        "Could you also do the balcony?",
+        "Running a few minutes late, sorry.",
+        "Thank you, the house looks great!",
+        "Please bring your own vacuum if possible.",
+    ],
+    "worker": [
+        "Yes, I will be there on time.",
+        "I'm on my way, about 15 minutes out.",
+        "I have arrived at the gate.",
+        "No problem, I can do the balcony as well.",
+        "All done. Kindly confirm and leave a rating.",
+        "Do you have cleaning detergents or should I bring some?",
+    ],
+}
+REVIEWS = {
+    5: ["Excellent work, very thorough.", "Punctual and professional.", "Best cleaner I've had."],
+    4: ["Good job overall.", "Nice work, missed a few spots.", "Friendly and efficient."],
+    3: ["Average, took longer than expected.", "Okay but arrived late."],
+    2: ["Not very thorough.", "Had to redo some areas."],
+    1: ["Did not finish the job.", "Very disappointing."],
+}
+RATING_WEIGHTS = {5: 55, 4: 28, 3: 10, 2: 4, 1: 3}
+
+
+def _batches(rows: Sequence[Dict[str, Any]], size: int = INSERT_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class Seeder:
+    """Generates one consistent data set; all randomness comes from ``seed``.
+
+    Popularity follows heavy-tailed weights (a few clients book a lot, a few
+    workers get most jobs), booking dates skew towards the recent past and
+    appointments cluster in the morning, as in production.
+    """
+
+    def __init__(self, db: Session, seed: int = 42, password: str = DEFAULT_PASSWORD, tag: Optional[str] = None):
+        self.db = db
+        self.rng = random.Random(seed)
+        self.password = password
+        # Keeps emails unique when seeding the same database more than once
+        self.tag = tag or uuid4().hex[:6]
+        self.now = datetime.utcnow().replace(second=0, microsecond=0)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    # ---------- helpers ----------
+    def _insert(self, model, rows: List[Dict[str, Any]], returning: bool = False) -> List[int]:
+        """Multi-row INSERT in batches; returns generated ids in input order"""
+        ids: List[int] = []
+        for batch in _batches(rows):
+            if returning:
+                result = self.db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), batch)
+                ids.extend(result.scalars())
+            else:
+                self.db.execute(insert(model), batch)
+        self.db.commit()
+        self.counts[model.__tablename__] += len(rows)
+        return ids
+
+    def _weights(self, n: int, alpha: float) -> List[float]:
+        """Cumulative Zipf-like weights for n items in random rank order"""
+        weights = [1 / (rank ** alpha) for rank in range(1, n + 1)]
+        self.rng.shuffle(weights)
+        return list(itertools.accumulate(weights))
+
+    def _pick(self, items: Sequence, cumulative: List[float]):
+        return items[bisect.bisect_left(cumulative, self.rng.random() * cumulative[-1])]
+
+    def _name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def _phone(self) -> str:
+        return f"2547{self.rng.randint(10000000, 99999999)}"
+
+    def _location(self) -> str:
+        _, lat, lon, _ = self.rng.choices(NEIGHBOURHOODS, weights=[n[3] for n in NEIGHBOURHOODS])[0]
+        return f"{lat + self.rng.gauss(0, 0.01):.5f},{lon + self.rng.gauss(0, 0.01):.5f}"
+
+    def _email(self, role: str, n: int) -> str:
+        return f"{role}{n}.{self.tag}@{EMAIL_DOMAIN}"
+
+    # ---------- reference data ----------
+    def catalog(self):
+        if not self.db.query(ServiceFeature.id).first():
+            from services_seed import seed_services
+
+            seed_services(self.db)
+        existing = {name for (name,) in self.db.query(Language.name)}
+        missing = [{"name": name} for name in LANGUAGES if name not in existing]
+        if missing:
+            self._insert(Language, missing)
+
+        self.category_ids = [category_id for (category_id,) in self.db.query(ServiceCategory.id)]
+        self.language_ids = [language_id for (language_id,) in self.db.query(Language.id)]
+        self.features: Dict[int, List[Any]] = {}
+        for (feature_id,) in self.db.query(ServiceFeature.id):
+            self.features[feature_id] = []
+        for option in self.db.query(FeatureOption.id, FeatureOption.feature_id, FeatureOption.unit_price,
+                                    FeatureOption.min_units, FeatureOption.max_units):
+            if option.feature_id in self.features:
+                self.features[option.feature_id].append(option)
+        self.feature_ids = list(self.features)
+        self.feature_weights = self._weights(len(self.feature_ids), 0.9)
+
+    # ---------- people ----------
+    def users(self, total: int):
+        self.password_hash = get_password_hash(self.password)
+        n_workers = max(1, int(total * WORKER_SHARE))
+        n_staff = max(2, int(total * STAFF_SHARE))
+        n_clients = max(1, total - n_workers - n_staff)
+
+        def accounts(role: str, count: int):
+            return self._insert(User, [
+                {"email": self._email(role, i), "hashed_password": self.password_hash, "role": role,
+                 "is_verified": self.rng.random() < 0.9}
+                for i in range(count)
+            ], returning=True)
+
+        staff_roles = ["admin", "hr"] + [self.rng.choice(["manager", "support", "finance"]) for _ in range(n_staff - 2)]
+        staff_emails = [self._email(role, i) for i, role in enumerate(staff_roles)]
+        staff_ids = self._insert(User, [
+            {"email": email, "hashed_password": self.password_hash, "role": role,
+             "is_verified": True, "is_admin": role == "admin"}
+            for email, role in zip(staff_emails, staff_roles)
+        ], returning=True)
+        self._insert(AdminProfile, [
+            {"user_id": user_id, "first_name": first, "last_name": last, "phone_number": self._phone(),
+             "department": role, "permissions": {}, "salary": self.rng.choice([60000, 80000, 120000])}
+            for user_id, role, (first, last) in zip(staff_ids, staff_roles, (self._name() for _ in staff_ids))
+        ])
+        self.staff = list(zip(staff_ids, staff_roles, staff_emails))
+
+        client_user_ids = accounts(UserRoleEnum.client.value, n_clients)
+        client_rows = []
+        for user_id in client_user_ids:
+            first, last = self._name()
+            organization = self.rng.random() < 0.15
+            client_rows.append({
+                "user_id": user_id,
+                "client_type": "organization" if organization else "individual",
+                "first_name": first,
+                "last_name": last,
+                "organization_name": f"{last} Holdings" if organization else None,
+                "phone_number": self._phone(),
+                "address": self._location(),
+                "verification_id": self.rng.random() < 0.7,
+            })
+        self.client_ids = self._insert(Client, client_rows, returning=True)
+        self.client_users = dict(zip(self.client_ids, client_user_ids))
+        self.client_weights = self._weights(len(self.client_ids), 1.1)
+
+        worker_user_ids = accounts(UserRoleEnum.worker.value, n_workers)
+        worker_rows = []
+        for user_id in worker_user_ids:
+            first, last = self._name()
+            pin = self._location()
+            lat, lon = map(float, pin.split(","))
+            verified = self.rng.random() < 0.8
+            worker_rows.append({
+                "user_id": user_id,
+                "worker_type": "individual",
+                "first_name": first,
+                "last_name": last,
+                "phone_number": self._phone(),
+                "mpesa_number": self._phone(),
+                "national_id_number": str(self.rng.randint(20000000, 39999999)),
+                "location_pin": pin,
+                "latitude": lat,
+                "longitude": lon,
+                "agreement_accepted": True,
+                "verification_id": verified,
+                "verification_good_conduct": verified and self.rng.random() < 0.85,
+                "good_conduct_expiry_date": self.now + timedelta(days=self.rng.randint(-60, 700)),
+                "preferred_language_id": self.rng.choice(self.language_ids),
+            })
+        self.worker_ids = self._insert(Workers, worker_rows, returning=True)
+        self.worker_users = dict(zip(self.worker_ids, worker_user_ids))
+        self.worker_weights = self._weights(len(self.worker_ids), 0.8)
+
+        services, availability, languages = [], [], []
+        for worker_id in self.worker_ids:
+            for category_id in self.rng.sample(self.category_ids, k=min(len(self.category_ids), self.rng.randint(1, 3))):
+                services.append({"worker_id": worker_id, "category_id": category_id,
+                                 "experience_years": int(self.rng.expovariate(1 / 3))})
+            days = self.rng.sample(range(7), k=self.rng.choice([4, 5, 5, 6, 6, 7]))
+            start = self.rng.choice(["06:00", "07:00", "08:00"])
+            end = self.rng.choice(["16:00", "17:00", "18:00"])
+            availability.extend({"worker_id": worker_id, "day_of_week": day, "start_time": start, "end_time": end}
+                                for day in sorted(days))
+            for language_id in self.rng.sample(self.language_ids, k=min(len(self.language_ids), self.rng.randint(1, 3))):
+                languages.append({"worker_id": worker_id, "language_id": language_id})
+        self._insert(WorkerService, services)
+        self._insert(WorkerAvailability, availability)
+        self._insert(WorkerLanguages, languages)
+
+    # ---------- bookings ----------
+    def _appointment(self, worker_id: int, booked_at: datetime, taken: set) -> datetime:
+        day = (booked_at + timedelta(days=int(self.rng.expovariate(1 / 3)))).date()
+        # Mornings are busiest
+        hour = self.rng.choices(range(7, 18), weights=[8, 10, 10, 8, 6, 5, 5, 4, 3, 2, 1])[0]
+        while (worker_id, day, hour) in taken:
+            hour += 2
+            if hour > 17:
+                day, hour = day + timedelta(days=1), 7
+        taken.add((worker_id, day, hour))
+        return datetime(day.year, day.month, day.day, hour, self.rng.choice([0, 30]))
+
+    def bookings(self, total: int, days: int):
+        taken = set()
+        rows, carts = [], []
+        for _ in range(total):
+            client_id = self._pick(self.client_ids, self.client_weights)
+            worker_id = self._pick(self.worker_ids, self.worker_weights)
+            feature_id = self._pick(self.feature_ids, self.feature_weights)
+            # Skewed towards recent dates: the business is growing
+            booked_at = self.now - timedelta(minutes=int(days * 1440 * self.rng.random() ** 1.6))
+            appointment = self._appointment(worker_id, booked_at, taken)
+
+            lines = []
+            options = self.features[feature_id]
+            for option in self.rng.sample(options, k=min(len(options), self.rng.randint(1, 3))):
+                low = max(option.min_units or 1, 1)
+                high = max(option.max_units or low + 3, low)
+                quantity = self.rng.randint(low, min(high, low + 4))
+                lines.append({"feature_option_id": option.id, "quantity": quantity,
+                              "unit_price": option.unit_price, "total_price": option.unit_price * quantity})
+            total_price = sum(line["total_price"] for line in lines) or float(self.rng.choice([1500, 2500, 3500, 5000, 8000]))
+
+            if appointment > self.now:
+                status = self.rng.choices(["pending", "confirmed", "assigned"], weights=[5, 3, 2])[0]
+            else:
+                status = self.rng.choices(["completed", "cancelled", "pending"], weights=[82, 12, 6])[0]
+            deposit_paid = status != "pending" or self.rng.random() < 0.3
+            payment_status = {"completed": "paid", "cancelled": "cancelled"}.get(
+                status, "partial" if deposit_paid else "pending"
+            )
+            location = self._location()
+            lat, lon = map(float, location.split(","))
+            rows.append({
+                "client_id": client_id,
+                "worker_id": worker_id,
+                "description": "Synthetic booking",
+                "location": location,
+                "latitude": lat,
+                "longitude": lon,
+                "date_of_booking": booked_at,
+                "appointment_datetime": appointment,
+                "service_feature_id": feature_id,
+                "total_price": total_price,
+                "deposit_paid": round(total_price * 0.15, 2) if deposit_paid else 0.0,
+                "status": status,
+                "payment_status": payment_status,
+                "rating": None,
+                "review": None,
+            })
+            carts.append(lines)
+
+        ids = self._insert(Booking, rows, returning=True)
+        self._insert(BookingService, [
+            {**line, "booking_id": booking_id}
+            for booking_id, lines in zip(ids, carts)
+            for line in lines
+        ])
+        self.booking_rows = [dict(row, id=booking_id) for booking_id, row in zip(ids, rows)]
+
+    def payments(self):
+        payments, notifications = [], []
+        for b in self.booking_rows:
+            worker_user = self.worker_users[b["worker_id"]]
+            notifications.append({
+                "user_id": worker_user, "booking_id": b["id"], "title": "New Booking Request",
+                "message": f"You have a new booking scheduled for {b['appointment_datetime']:%d %b %Y, %I:%M %p}",
+                "is_read": b["appointment_datetime"] < self.now - timedelta(days=2),
+                "created_at": b["date_of_booking"],
+            })
+            if b["deposit_paid"]:
+                payments.append({
+                    "booking_id": b["id"], "amount": b["deposit_paid"], "currency": "kes", "type": "deposit",
+                    "status": "succeeded", "stripe_payment_intent": f"pi_{uuid4().hex[:24]}",
+                    "created_at": b["date_of_booking"] + timedelta(minutes=self.rng.randint(1, 30)),
+                })
+            elif self.rng.random() < 0.2:
+                payments.append({
+                    "booking_id": b["id"], "amount": round(b["total_price"] * 0.15, 2), "currency": "kes",
+                    "type": "deposit", "status": self.rng.choice(["failed", "pending"]),
+                    "stripe_payment_intent": f"pi_{uuid4().hex[:24]}", "created_at": b["date_of_booking"],
+                })
+            if b["status"] == "completed":
+                payments.append({
+                    "booking_id": b["id"], "amount": round(b["total_price"] - b["deposit_paid"], 2),
+                    "currency": "kes", "type": "balance", "status": "succeeded",
+                    "stripe_payment_intent": f"pi_{uuid4().hex[:24]}",
+                    "created_at": b["appointment_datetime"] + timedelta(hours=3),
+                })
+        self._insert(Payment, payments)
+        self._insert(Notification, notifications)
+
+    def ratings(self):
+        ratings, booking_updates = [], []
+        per_worker = defaultdict(list)
+        for b in self.booking_rows:
+            if b["status"] != "completed":
+                continue
+            per_worker[b["worker_id"]].append(None)
+            if self.rng.random() > 0.65:
+                continue
+            stars = self.rng.choices(list(RATING_WEIGHTS), weights=list(RATING_WEIGHTS.values()))[0]
+            review = self.rng.choice(REVIEWS[stars]) if self.rng.random() < 0.6 else None
+            ratings.append({"worker_id": b["worker_id"], "booking_id": b["id"], "rating": float(stars),
+                            "review": review, "created_at": b["appointment_datetime"] + timedelta(hours=5)})
+            booking_updates.append({"id": b["id"], "rating": float(stars), "review": review})
+            per_worker[b["worker_id"]][-1] = stars
+        self._insert(WorkerRating, ratings)
+        for batch in _batches(booking_updates):
+            self.db.execute(update(Booking), batch)
+
+        worker_updates = []
+        for worker_id, jobs in per_worker.items():
+            stars = [s for s in jobs if s is not None]
+            worker_updates.append({
+                "id": worker_id,
+                "jobs_completed": len(jobs),
+                "average_rating": round(sum(stars) / len(stars), 2) if stars else 0.0,
+            })
+        for batch in _batches(worker_updates):
+            self.db.execute(update(Workers), batch)
+        self.db.commit()
+
+    def messages(self, mean_per_booking: float):
+        rows = []
+        # Lognormal message counts: most chats are short, a few are long
+        sigma = 0.9
+        mu = math.log(max(mean_per_booking, 0.1)) - sigma ** 2 / 2
+        for b in self.booking_rows:
+            count = min(int(self.rng.lognormvariate(mu, sigma)), 120)
+            if not count:
+                continue
+            client_user = self.client_users[b["client_id"]]
+            worker_user = self.worker_users[b["worker_id"]]
+            sent_at = b["date_of_booking"]
+            sender = "client"
+            for _ in range(count):
+                sent_at += timedelta(minutes=int(self.rng.expovariate(1 / 20)) + 1)
+                if sent_at > self.now:
+                    break
+                from_client = sender == "client"
+                read = sent_at < self.now - timedelta(hours=6) or self.rng.random() < 0.5
+                rows.append({
+                    "sender_id": client_user if from_client else worker_user,
+                    "receiver_id": worker_user if from_client else client_user,
+                    "booking_id": b["id"],
+                    "content": self.rng.choice(CHAT_LINES[sender]),
+                    "sent_at": sent_at,
+                    "is_read": read,
+                    "delivered_at": sent_at + timedelta(seconds=self.rng.randint(1, 90)),
+                    "read_at": sent_at + timedelta(minutes=self.rng.randint(1, 240)) if read else None,
+                })
+                # Replies are more likely than follow-ups
+                if self.rng.random() < 0.7:
+                    sender = "worker" if from_client else "client"
+        self._insert(Message, rows)
+
+    def ledger(self):
+        payouts, ledger = [], []
+        balances = defaultdict(float)
+        for b in self.booking_rows:
+            if b["status"] != "completed" or self.rng.random() > 0.85:
+                continue
+            amount = round(b["total_price"] * 0.8, 2)
+            paid_at = b["appointment_datetime"] + timedelta(days=self.rng.randint(0, 3))
+            method = self.rng.choices(["mpesa", "bank_transfer"], weights=[85, 15])[0]
+            payouts.append({
+                "worker_id": b["worker_id"], "amount": amount, "payment_date": paid_at,
+                "payment_method": method, "paid_by": "system", "work_done": b["id"],
+                "payment_reference": f"SS{uuid4().hex[:10].upper()}",
+            })
+            ledger.append({
+                "worker_id": b["worker_id"], "amount": amount, "entry_type": LedgerEntryType.credit,
+                "reason": "job_payment", "reference_type": "booking", "reference_id": b["id"], "created_at": paid_at,
+            })
+            balances[b["worker_id"]] += amount
+            if self.rng.random() < 0.25:
+                withdrawn = round(balances[b["worker_id"]] * self.rng.uniform(0.3, 0.9), 2)
+                ledger.append({
+                    "worker_id": b["worker_id"], "amount": withdrawn, "entry_type": LedgerEntryType.debit,
+                    "reason": "withdrawal", "reference_type": None, "reference_id": None,
+                    "created_at": paid_at + timedelta(days=1),
+                })
+                balances[b["worker_id"]] -= withdrawn
+        self._insert(WorkerPayments, payouts)
+
+        loans = []
+        for worker_id in self.rng.sample(self.worker_ids, k=len(self.worker_ids) // 30):
+            principal = float(self.rng.choice([2000, 5000, 10000]))
+            taken_at = self.now - timedelta(days=self.rng.randint(5, 180))
+            repaid = round(principal * self.rng.uniform(0, 1.2), 2)
+            remaining = max(round(principal * 1.2 - repaid, 2), 0.0)
+            due = taken_at + timedelta(days=90)
+            status = (
+                WorkerLoanStatus.completed if not remaining
+                else WorkerLoanStatus.defaulted if due < self.now and repaid < principal * 0.5
+                else WorkerLoanStatus.active
+            )
+            loans.append({
+                "worker_id": worker_id, "principal_amount": principal, "remaining_balance": remaining,
+                "status": status, "created_at": taken_at, "due_date": due, "approved": True,
+                "approved_at": taken_at, "approved_by": self.staff[0][0],
+            })
+            ledger.append({
+                "worker_id": worker_id, "amount": principal, "entry_type": LedgerEntryType.credit,
+                "reason": "loan_disbursement", "reference_type": "loan", "reference_id": None, "created_at": taken_at,
+            })
+            if repaid:
+                ledger.append({
+                    "worker_id": worker_id, "amount": repaid, "entry_type": LedgerEntryType.debit,
+                    "reason": "loan_repayment", "reference_type": "loan", "reference_id": None,
+                    "created_at": taken_at + timedelta(days=30),
+                })
+            balances[worker_id] += principal - repaid
+        self._insert(WorkerLoan, loans)
+        self._insert(WorkerLedger, ledger)
+        self._insert(WorkerWallet, [
+            {"worker_id": worker_id, "balance": round(balance, 2)} for worker_id, balance in balances.items()
+        ])
+
+    # ---------- output ----------
+    def fixtures(self, sample: int = 200) -> Dict[str, Any]:
+        """Accounts and ids the load test drives, so it needs no discovery requests"""
+        chats = [b for b in self.booking_rows if b["worker_id"]]
+        upcoming = self.rng.sample(chats, k=min(sample, len(chats)))
+        clients = self.rng.sample(self.client_ids, k=min(sample, len(self.client_ids)))
+        workers = self.rng.sample(self.worker_ids, k=min(sample, len(self.worker_ids)))
+        priced = [
+            {"service_feature_id": feature_id,
+             "options": [{"feature_option_id": option.id, "quantity": max(option.min_units or 1, 1)} for option in options]}
+            for feature_id, options in self.features.items() if options
+        ]
+        staff = {role: {"email": email, "user_id": user_id} for user_id, role, email in reversed(self.staff)}
+        client_numbers = {client_id: n for n, client_id in enumerate(self.client_ids)}
+        worker_numbers = {worker_id: n for n, worker_id in enumerate(self.worker_ids)}
+        return {
+            "password": self.password,
+            "tag": self.tag,
+            "admin": staff["admin"],
+            "hr": staff["hr"],
+            "clients": [
+                {"client_id": client_id, "user_id": self.client_users[client_id],
+                 "email": self._email("client", client_numbers[client_id])}
+                for client_id in clients
+            ],
+            "workers": [
+                {"worker_id": worker_id, "user_id": self.worker_users[worker_id],
+                 "email": self._email("worker", worker_numbers[worker_id])}
+                for worker_id in workers
+            ],
+            "conversations": [
+                {"booking_id": b["id"], "client_user_id": self.client_users[b["client_id"]],
+                 "worker_user_id": self.worker_users[b["worker_id"]]}
+                for b in upcoming
+            ],
+            "features": priced,
+            "locations": [self._location() for _ in range(20)],
+        }
+
+
+def seed(
+    db: Session,
+    users: int = 1000,
+    bookings: Optional[int] = None,
+    messages_per_booking: float = 6.0,
+    days: int = 365,
+    seed: int = 42,
+    password: str = DEFAULT_PASSWORD,
+) -> Seeder:
+    """Generate a full data set; ``bookings`` defaults to five per client"""
+    seeder = Seeder(db, seed=seed, password=password)
+    started = time.monotonic()
+    seeder.catalog()
+    seeder.users(users)
+    seeder.bookings(bookings if bookings is not None else len(seeder.client_ids) * 5, days)
+    seeder.payments()
+    seeder.ratings()
+    seeder.messages(messages_per_booking)
+    seeder.ledger()
+    seeder.counts["elapsed_seconds"] = round(time.monotonic() - started, 2)
+    return seeder
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m loadtest.seed --users 10000 --fixtures loadtest/fixtures.json"""
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic SmartSafi data")
+    parser.add_argument("--users", type=int, default=1000, help="Total accounts (about 78%% clients, 20%% workers)")
+    parser.add_argument("--bookings", type=int, help="Total bookings (default: 5 per client)")
+    parser.add_argument("--messages-per-booking", type=float, default=6.0, help="Mean chat length")
+    parser.add_argument("--days", type=int, default=365, help="History length in days")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same data")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--fixtures", default="loadtest/fixtures.json", help="Where to write load test fixtures")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seeder = seed(db, args.users, args.bookings, args.messages_per_booking, args.days, args.seed, args.password)
+    finally:
+        db.close()
+
+    os.makedirs(os.path.dirname(args.fixtures) or ".", exist_ok=True)
+    with open(args.fixtures, "w") as file:
+        json.dump(seeder.fixtures(), file, indent=2)
+    print(json.dumps(seeder.counts, indent=2))
+    print(f"Fixtures written to {args.fixtures}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
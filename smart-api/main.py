@@ -1,8 +1,21 @@
 import datetime
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from database import  engine
+from observability.logs import RequestLoggingMiddleware, configure_logging
+
+# Before the routers are imported, so their import-time messages are captured
+configure_logging()
+
+from database import  engine, add_missing_columns
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from storage.serving import UploadFiles
+from observability.queries import QueryCountMiddleware
+from compression import CompressionMiddleware
+from idempotency import IdempotencyMiddleware
+from ratelimit.concurrency import ConcurrencyLimitMiddleware
+from observability import metrics, tracing
+from outbox.dispatcher import OUTBOX_DISPATCH_IN_APP, dispatcher as outbox_dispatcher
+from jobs.runner import JOBS_IN_APP, runner as job_runner
 import models
 
 from  users import route as users_route
@@ -17,33 +30,68 @@ from Services.route import router as s_route
 from payments.route import paymentsrouter
 from notifications.route import router as notifications_router
 from wallet.route import router as wallet_router
-from messages.route import router as messages_router
+from messages.route import router as messages_router, manager as chat_manager
 # from admin import router as admin_router
 from admin.route import router as admin_router
 from admin.hr_admin import router as hr_admin_router
 from admin.admin_payments import router as admin_payments_router
+from admin.exports import router as admin_export_router
 # Create DB tables
 models.Base.metadata.create_all(bind=engine)
+add_missing_columns(models.Base.metadata)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Side effects recorded in the outbox are handled in the background
+    if OUTBOX_DISPATCH_IN_APP:
+        outbox_dispatcher.start()
+    # Scheduled maintenance; the job lock keeps each run to one node
+    if JOBS_IN_APP:
+        job_runner.start()
+    yield
+    await job_runner.stop()
+    await outbox_dispatcher.stop()
+
 
 app = FastAPI(
     title="Smart Safi API",
     description="API for Smart Safi Application",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
+# Innermost: stores and replays the handler's own response for @idempotent routes
+app.add_middleware(IdempotencyMiddleware, router=app.router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "Server-Timing", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining",
+                    "Idempotent-Replayed"],
 )
+# gzip/brotli for large JSON; inside the rest, so request latency and Server-Timing include it
+app.add_middleware(CompressionMiddleware)
+# Per-request statement count and DB time (X-DB-Queries, Server-Timing)
+app.add_middleware(QueryCountMiddleware, engine=engine)
+# Sheds load with 503 before the thread pool queue grows; inside metrics and logging so shed requests show up
+app.add_middleware(ConcurrencyLimitMiddleware)
+# Outside the other middleware, so /metrics latency covers the whole stack
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+tracing.instrument_engine(engine)
+tracing.instrument_requests()
+# Outermost: the request id is set for everything logged while handling the request
+app.add_middleware(RequestLoggingMiddleware)
+metrics.watch_engine_pool(engine)
+metrics.watch_connections(chat_manager)
 
 
 
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", UploadFiles(directory="uploads"), name="uploads")
 
 
 
@@ -61,6 +109,8 @@ app.include_router(admin_router)
 app.include_router(messages_router)
 app.include_router(hr_admin_router)
 app.include_router(admin_payments_router)
+app.include_router(admin_export_router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
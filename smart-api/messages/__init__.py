@@ -1,8 +1,11 @@
 from fastapi import APIRouter, WebSocket
 from typing import Dict, List, Optional
 import json
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 class ConnectionManager:
@@ -38,7 +41,7 @@ class ConnectionManager:
             "timestamp": datetime.utcnow().isoformat()
         })
         
-        print(f"User {user_id} connected to booking {booking_id}")
+        logger.debug("Chat connected", extra={"booking_id": booking_id, "user_id": user_id})
     
     async def disconnect(self, booking_id: int, user_id: int, websocket: WebSocket):
         """Disconnect user from chat"""
@@ -53,7 +56,7 @@ class ConnectionManager:
         # Notify others that user went offline
         await self.broadcast_user_status(booking_id, user_id, False)
         
-        print(f"User {user_id} disconnected from booking {booking_id}")
+        logger.debug("Chat disconnected", extra={"booking_id": booking_id, "user_id": user_id})
     
     async def broadcast(self, booking_id: int, message: dict, exclude_user_id: Optional[int] = None):
         """Broadcast message to all users in a booking"""
@@ -66,7 +69,7 @@ class ConnectionManager:
             try:
                 await websocket.send_json(message)
             except Exception as e:
-                print(f"Error sending to user {user_id}: {e}")
+                logger.warning("Error sending to user %s: %s", user_id, e)
     
     async def send_to_user(self, booking_id: int, user_id: int, message: dict):
         """Send message to specific user in a booking"""
@@ -76,7 +79,7 @@ class ConnectionManager:
                 await self.active_connections[booking_id][user_id].send_json(message)
                 return True
             except Exception as e:
-                print(f"Error sending to user {user_id}: {e}")
+                logger.warning("Error sending to user %s: %s", user_id, e)
         return False
     
     async def broadcast_user_status(self, booking_id: int, user_id: int, is_online: bool):
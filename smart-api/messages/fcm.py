@@ -4,6 +4,12 @@ from typing import Dict, Any, Optional
 import os
 from pathlib import Path
 import json
+import logging
+
+from observability.metrics import track_send
+from observability.tracing import KIND_CLIENT, traced
+
+logger = logging.getLogger(__name__)
 
 class FCMService:
     _initialized = False
@@ -23,12 +29,9 @@ class FCMService:
             ]
             
             cred_path = None
-            print("current_dir:", current_dir)
-            print(current_dir.parent,"parent")
             for path in possible_paths:
                 if Path(path).exists():
                     cred_path = path
-                    print(f"✅ Found Firebase credentials at: {path}")
                     break
             
             if not cred_path:
@@ -40,39 +43,44 @@ class FCMService:
                         cred = credentials.Certificate(cred_dict)
                         firebase_admin.initialize_app(cred)
                         cls._initialized = True
-                        print("✅ Firebase initialized from environment variable")
+                        logger.info("Firebase initialized from environment variable")
                         return True
                     except json.JSONDecodeError as e:
-                        print(f"❌ Invalid JSON in FIREBASE_CREDENTIALS_JSON: {e}")
+                        logger.error("Invalid JSON in FIREBASE_CREDENTIALS_JSON: %s", e)
                 else:
-                    print("❌ Firebase credentials file not found and no environment variable set")
+                    logger.warning("Firebase credentials file not found and no environment variable set")
                 return False
             
             cred = credentials.Certificate(str(cred_path))
             firebase_admin.initialize_app(cred)
             cls._initialized = True
-            print("✅ Firebase initialized successfully")
+            logger.info("Firebase initialized from %s", cred_path)
             return True
         except Exception as e:
-            print(f"❌ Firebase initialization error: {e}")
+            logger.error("Firebase initialization error: %s", e)
             return False
     
     @staticmethod
+    @traced("fcm.send_message_notification", KIND_CLIENT)
     def send_message_notification(
         fcm_token: str,
         title: str,
         body: str,
-        data: Optional[Dict[str, Any]] = None
+        data: Optional[Dict[str, Any]] = None,
+        raise_errors: bool = False
     ) -> bool:
-        """Send push notification for new message"""
+        """Send push notification for new message
+
+        With ``raise_errors`` transient failures raise so the caller can retry;
+        a missing token or an unregistered device still returns False.
+        """
         if not fcm_token:
-            print("❌ No FCM token provided")
+            logger.debug("No FCM token provided")
             return False
         
         # Initialize Firebase if not already done
         if not FCMService._initialized:
             if not FCMService.initialize_firebase():
-                print("❌ Failed to initialize Firebase")
                 return False
         
         try:
@@ -106,15 +114,18 @@ class FCMService:
             )
             
             # Send the message
-            response = messaging.send(message)
-            print(f"✅ FCM message sent successfully: {response}")
+            with track_send("fcm"):
+                response = messaging.send(message)
+            logger.debug("FCM message sent: %s", response)
             return True
             
         except messaging.UnregisteredError:
-            print(f"❌ FCM token is no longer valid: {fcm_token}")
+            logger.info("FCM token is no longer registered")
             return False
         except Exception as e:
-            print(f"❌ Error sending FCM message: {e}")
+            if raise_errors:
+                raise
+            logger.warning("Error sending FCM message: %s", e)
             return False
 
 # Initialize Firebase on module import
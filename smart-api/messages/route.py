@@ -5,17 +5,24 @@ from database import get_db
 from datetime import datetime
 from models import User, Booking, Message
 from schemas import MessageCreate, MessageResponse, MarkReadRequest, ConversationResponse, MessageItem, UserSummary
+from storage.images import variant_url
+from observability.queries import query_budget
+from observability.tracing import KIND_SERVER, start_span
+from outbox import MESSAGE_SENT, record
+from idempotency import idempotent
 from typing import List
 from fastapi import WebSocket, WebSocketDisconnect
 import json
+import logging
 
-# Import FCM Service
-from .fcm import FCMService
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 manager = ConnectionManager()
 
 @router.post("/send", response_model=MessageResponse)
+@query_budget(10)
+@idempotent
 async def send_message(  # Change to async function
     data: MessageCreate,
     db: Session = Depends(get_db)
@@ -62,14 +69,8 @@ async def send_message(  # Change to async function
     )
 
     db.add(message)
-    db.commit()
-    db.refresh(message)
-    
-    # Get receiver details
-    receiver = db.get(User, receiver_id)
-    if not receiver:
-        raise HTTPException(status_code=404, detail="Receiver user not found")
-    
+    db.flush()
+
     # Prepare WebSocket message
     ws_message = {
         "type": "new_message",
@@ -82,49 +83,20 @@ async def send_message(  # Change to async function
         "booking_id": booking.id,
         "sender_name": sender_name
     }
-    
-    # Try to send via WebSocket first
-    is_online = manager.is_user_online(booking.id, receiver_id)
-    
-    if is_online:
-        # User is online, send via WebSocket
-        sent = await manager.send_to_user(booking.id, receiver_id, ws_message)  # Now this is okay in async function
+
+    # The push to an offline receiver is sent by the outbox dispatcher after commit
+    record(db, MESSAGE_SENT, ws_message)
+    db.commit()
+    db.refresh(message)
+
+    # Deliver over WebSocket if the receiver has the chat open
+    if manager.is_user_online(booking.id, receiver_id):
+        sent = await manager.send_to_user(booking.id, receiver_id, ws_message)
         if sent:
-            print(f"Message sent via WebSocket to user {receiver_id}")
-        else:
-            is_online = False  # Fallback to FCM if WebSocket fails
+            logger.debug("Message delivered over WebSocket", extra={"user_id": receiver_id})
     else:
-        print(f"User {receiver_id} is offline")
-    
-    # Send push notification if receiver is offline or WebSocket failed
-    if not is_online and receiver.fcm_token:
-        print(f"Sending FCM notification to user {receiver_id}")
-        
-        # Prepare notification data
-        notification_data = {
-            "type": "new_message",
-            "message_id": str(message.id),
-            "booking_id": str(booking.id),
-            "sender_id": str(sender_id),
-            "sender_type": data.sender_type,
-            "sender_name": sender_name,
-            "content": data.content[:100],  # Truncate for notification
-            "timestamp": message.sent_at.isoformat()
-        }
-        
-        # Send push notification
-        success = FCMService.send_message_notification(
-            fcm_token=receiver.fcm_token,
-            title=f"New message from {sender_name}",
-            body=data.content[:100],
-            data=notification_data
-        )
-        
-        if success:
-            print(f"FCM notification sent successfully to user {receiver_id}")
-        else:
-            print(f"Failed to send FCM notification to user {receiver_id}")
-    
+        logger.debug("Receiver offline", extra={"user_id": receiver_id})
+
     # Also broadcast to all connected clients in this booking (for real-time updates)
     await manager.broadcast(booking.id, ws_message, exclude_user_id=sender_id)
     
@@ -191,6 +163,7 @@ def format_time(dt: datetime) -> str:
 
 # Endpoint to fetch conversation by booking
 @router.get("/booking/{booking_id}", response_model=ConversationResponse)
+@query_budget(8)
 def get_booking_conversation(  # This can stay synchronous
     booking_id: int,
     db: Session = Depends(get_db),
@@ -246,12 +219,14 @@ def get_booking_conversation(  # This can stay synchronous
     client_summary = UserSummary(
         name=f"{client.first_name} {client.last_name}",
         profilePicture=client.profile_picture,
+        profilePictureThumb=variant_url(client.profile_picture),
         rating=None,
         status="online" if client_online else "offline"
     )
     provider_summary = UserSummary(
         name=f"{provider.first_name} {provider.last_name}",
         profilePicture=provider.profile_picture,
+        profilePictureThumb=variant_url(provider.profile_picture),
         rating=None,
         status="online" if provider_online else "offline"
     )
@@ -302,73 +277,78 @@ async def chat_ws(
     try:
         while True:
             data = await websocket.receive_json()
+            message_type = data.get("type")
+            attributes = {"booking_id": booking_id, "user_id": user_id, "chat.message_type": message_type}
+            # A trace per message: the connection itself can stay open for hours
+            with start_span(f"chat_ws {message_type}", KIND_SERVER, attributes, root=True):
+                if data["type"] == "typing":
+                    # Broadcast typing indicator
+                    is_typing = data.get("is_typing", False)
+                    logger.debug("Typing", extra={"event": "chat.typing", "booking_id": booking_id, "user_id": user_id})
+                    await manager.send_typing_indicator(booking_id, user_id, is_typing)
             
-            if data["type"] == "typing":
-                # Broadcast typing indicator
-                is_typing = data.get("is_typing", False)
-                await manager.send_typing_indicator(booking_id, user_id, is_typing)
+                elif data["type"] == "message_delivered":
+                    # Mark message as delivered
+                    message_id = data.get("message_id")
+                    if message_id:
+                        message = db.query(Message).filter_by(id=message_id).first()
+                        if message and message.receiver_id == user_id:
+                            message.delivered_at = datetime.utcnow()
+                            db.commit()
+                            # Broadcast delivery receipt
+                            await manager.broadcast(
+                                booking_id,
+                                {
+                                    "type": "message_delivered",
+                                    "message_id": message_id,
+                                    "user_id": user_id,
+                                    "timestamp": datetime.utcnow().isoformat()
+                                },
+                                exclude_user_id=user_id
+                            )
             
-            elif data["type"] == "message_delivered":
-                # Mark message as delivered
-                message_id = data.get("message_id")
-                if message_id:
-                    message = db.query(Message).filter_by(id=message_id).first()
-                    if message and message.receiver_id == user_id:
-                        message.delivered_at = datetime.utcnow()
+                elif data["type"] == "ping":
+                    # Keep connection alive
+                    logger.debug("Ping", extra={"event": "chat.ping", "booking_id": booking_id, "user_id": user_id})
+                    await websocket.send_json({"type": "pong"})
+            
+                elif data["type"] == "new_message":
+                    # Handle new message sent via WebSocket
+                    content = data.get("content", "")
+                    if content:
+                        # Determine receiver
+                        if user_id == booking.client.user_id:
+                            receiver_id = booking.worker.user_id
+                            sender_type = "client"
+                        else:
+                            receiver_id = booking.client.user_id
+                            sender_type = "worker"
+                    
+                        # Create message in database
+                        message = Message(
+                            sender_id=user_id,
+                            receiver_id=receiver_id,
+                            booking_id=booking_id,
+                            content=content
+                        )
+                        db.add(message)
                         db.commit()
-                        # Broadcast delivery receipt
+                        db.refresh(message)
+                    
+                        # Broadcast to all connected clients
                         await manager.broadcast(
                             booking_id,
                             {
-                                "type": "message_delivered",
-                                "message_id": message_id,
-                                "user_id": user_id,
-                                "timestamp": datetime.utcnow().isoformat()
+                                "type": "new_message",
+                                "message_id": message.id,
+                                "sender_id": user_id,
+                                "receiver_id": receiver_id,
+                                "sender_type": sender_type,
+                                "content": content,
+                                "timestamp": message.sent_at.isoformat()
                             },
                             exclude_user_id=user_id
                         )
-            
-            elif data["type"] == "ping":
-                # Keep connection alive
-                await websocket.send_json({"type": "pong"})
-            
-            elif data["type"] == "new_message":
-                # Handle new message sent via WebSocket
-                content = data.get("content", "")
-                if content:
-                    # Determine receiver
-                    if user_id == booking.client.user_id:
-                        receiver_id = booking.worker.user_id
-                        sender_type = "client"
-                    else:
-                        receiver_id = booking.client.user_id
-                        sender_type = "worker"
-                    
-                    # Create message in database
-                    message = Message(
-                        sender_id=user_id,
-                        receiver_id=receiver_id,
-                        booking_id=booking_id,
-                        content=content
-                    )
-                    db.add(message)
-                    db.commit()
-                    db.refresh(message)
-                    
-                    # Broadcast to all connected clients
-                    await manager.broadcast(
-                        booking_id,
-                        {
-                            "type": "new_message",
-                            "message_id": message.id,
-                            "sender_id": user_id,
-                            "receiver_id": receiver_id,
-                            "sender_type": sender_type,
-                            "content": content,
-                            "timestamp": message.sent_at.isoformat()
-                        },
-                        exclude_user_id=user_id
-                    )
 
     except WebSocketDisconnect:
         # Handle disconnect
@@ -377,7 +357,7 @@ async def chat_ws(
         user.last_seen = datetime.utcnow()
         db.commit()
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.exception("WebSocket error", extra={"booking_id": booking_id, "user_id": user_id})
         await manager.disconnect(booking_id, user_id, websocket)
         user.is_online = False
         user.last_seen = datetime.utcnow()
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum, DateTime, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum, DateTime, Float, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSON
 import enum
@@ -189,6 +189,9 @@ class Workers(Base):
     company_hotline_number = Column(String, nullable=True)
     verification_company_registration = Column(Boolean, default=False)
     location_pin = Column(String, nullable=True)
+    # Parsed from location_pin on save (see workers/geo.py)
+    latitude = Column(Float, nullable=True, index=True)
+    longitude = Column(Float, nullable=True, index=True)
 
     preferred_language_id = Column(Integer, ForeignKey("languages.id"), nullable=True)
 
@@ -376,6 +379,9 @@ class Booking(Base):
     worker_id = Column(Integer, ForeignKey("workers.id"), nullable=True)
     description=Column(String)
     location = Column(String,nullable=False)
+    # Parsed from location on save (see workers/geo.py)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
 
     date_of_booking = Column(DateTime, default=datetime.utcnow)
     appointment_datetime = Column(DateTime, nullable=False)
@@ -406,6 +412,11 @@ class Booking(Base):
     notifications = relationship("Notification", back_populates="booking")
     worker_rating = relationship("WorkerRating", back_populates="booking")
 
+    # Worker schedule lookups and booking conflict checks (workers/scheduling.py)
+    __table_args__ = (
+        Index("ix_bookings_worker_appointment", "worker_id", "appointment_datetime"),
+    )
+
 
 class BookingService(Base):
     __tablename__ = "booking_services"
@@ -479,6 +490,101 @@ class Notification(Base):
     user = relationship("User", back_populates="notifications")
     booking = relationship("Booking", back_populates="notifications")
 
+    __table_args__ = (
+        # Inbox pages and "mark read up to id" walk one user's rows by id
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+    )
+
+
+class NotificationCounter(Base):
+    """Unread notifications per user, kept in step with the notifications table"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+
+class NotificationArchive(Base):
+    """Cold storage for old, read notifications moved out by the retention job"""
+    __tablename__ = "notifications_archive"
+
+    id = Column(Integer, primary_key=True)
+    public_id = Column(String(100))
+    user_id = Column(Integer, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    is_read = Column(Boolean, default=True)
+    created_at = Column(DateTime)
+    booking_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class OutboxEvent(Base):
+    """Domain events written in the transaction that caused them; handled after commit"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="pending")  # pending, dispatched, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Claimed by a dispatcher until then; an expired claim is picked up again
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    dispatched_at = Column(DateTime, nullable=True)
+
+
+class ScheduledJob(Base):
+    """Schedule state and the cross-node lock for one background job (see jobs/)"""
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(100), primary_key=True)
+    next_run_at = Column(DateTime, nullable=False)
+    # Held by one runner until locked_until; extended at every checkpoint
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    # Progress of an unfinished sweep, e.g. {"last_id": 1200}; cleared on success
+    checkpoint = Column(JSON, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_status = Column(String(20), nullable=True)  # succeeded, failed
+    last_error = Column(Text, nullable=True)
+    last_result = Column(JSON, nullable=True)
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every node when RATE_LIMIT_BACKEND=database (see ratelimit/)"""
+    __tablename__ = "rate_limit_buckets"
+
+    # "<policy>:<subject>", e.g. "login_ip:41.90.1.7"
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Epoch seconds; also the compare-and-set version for concurrent takers
+    updated_at = Column(Float, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    """A write made under an Idempotency-Key and the response it produced (see idempotency.py)"""
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of the route and the client's key
+    key = Column(String(64), primary_key=True)
+    # sha256 of method, path, query string and body; a reused key must send the same request
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress, completed
+    # Held by the request doing the work; a crashed holder's claim is taken over after this
+    locked_until = Column(DateTime, nullable=True)
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 
 
 class Message(Base):
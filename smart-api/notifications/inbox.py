@@ -0,0 +1,136 @@
+# notifications/inbox.py
+from typing import Optional
+
+from sqlalchemy import case, event, func, insert, inspect, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Notification, NotificationCounter
+
+MAX_PAGE_SIZE = 100
+
+
+# ==========================
+# UNREAD COUNTERS
+# ==========================
+def _adjust(connection, user_id: int, delta: int) -> None:
+    """Shift a user's counter; a user without a row is counted on first read"""
+    unread = NotificationCounter.unread
+    connection.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=case((unread + delta < 0, 0), else_=unread + delta))
+    )
+
+
+@event.listens_for(Notification, "after_insert")
+def _notification_added(mapper, connection, target):
+    if not target.is_read:
+        _adjust(connection, target.user_id, 1)
+
+
+@event.listens_for(Notification, "after_update")
+def _notification_changed(mapper, connection, target):
+    history = inspect(target).attrs.is_read.history
+    if not history.has_changes():
+        return
+    was_read = bool(history.deleted[0]) if history.deleted else False
+    if was_read != bool(target.is_read):
+        _adjust(connection, target.user_id, -1 if target.is_read else 1)
+
+
+@event.listens_for(Notification, "after_delete")
+def _notification_deleted(mapper, connection, target):
+    if not target.is_read:
+        _adjust(connection, target.user_id, -1)
+
+
+def _create_counter(db: Session, user_id: int) -> int:
+    """Insert a user's counter from a COUNT in one statement, outside the caller's transaction.
+
+    Committing on a separate connection leaves the caller's session (and
+    the objects it has loaded) untouched. Under READ COMMITTED a
+    notification committed while this runs can still be missed: its own
+    adjustment finds no row yet, and the COUNT did not see it. The nightly
+    rebuild_notification_counters job corrects that drift.
+    """
+    count = select(literal(user_id), func.count(Notification.id)).where(
+        Notification.user_id == user_id, Notification.is_read.is_(False)
+    )
+    bind = db.get_bind()
+    try:
+        with bind.begin() as connection:
+            connection.execute(insert(NotificationCounter).from_select(["user_id", "unread"], count))
+    except IntegrityError:
+        pass  # another request created it first
+    with bind.connect() as connection:
+        return connection.execute(
+            select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        ).scalar()
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    """The maintained counter; the first read for a user creates it from a COUNT"""
+    unread = db.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar()
+    if unread is not None:
+        return unread
+    return _create_counter(db, user_id)
+
+
+def rebuild_counters(db: Session) -> int:
+    """Recompute every existing counter from the table (after bulk loads or drift)"""
+    counts = dict(
+        db.query(Notification.user_id, func.count(Notification.id))
+        .filter(Notification.is_read.is_(False))
+        .group_by(Notification.user_id)
+        .all()
+    )
+    user_ids = [user_id for (user_id,) in db.query(NotificationCounter.user_id).all()]
+    if user_ids:
+        db.execute(
+            update(NotificationCounter),
+            [{"user_id": user_id, "unread": counts.get(user_id, 0)} for user_id in user_ids],
+        )
+    db.commit()
+    return len(user_ids)
+
+
+# ==========================
+# INBOX
+# ==========================
+def inbox_page(db: Session, user_id: int, cursor: Optional[int] = None, limit: int = 20,
+               unread_only: bool = False) -> dict:
+    """Newest first, keyset-paginated on id so deep pages cost the same as the first"""
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if cursor is not None:
+        query = query.filter(Notification.id < cursor)
+    if unread_only:
+        query = query.filter(Notification.is_read.is_(False))
+    rows = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next_cursor": items[-1].id if len(rows) > limit else None,
+        "unread_count": unread_count(db, user_id),
+    }
+
+
+def mark_read_up_to(db: Session, user_id: int, up_to_id: int) -> int:
+    """Mark every unread notification with id <= ``up_to_id`` read in one UPDATE"""
+    # Make sure the counter exists before the UPDATE so the adjustment lands
+    unread_count(db, user_id)
+    result = db.execute(
+        update(Notification)
+        .where(
+            Notification.user_id == user_id,
+            Notification.id <= up_to_id,
+            Notification.is_read.is_(False),
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        _adjust(db.connection(), user_id, -result.rowcount)
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,96 @@
+# notifications/retention.py
+# Moves old, read notifications to notifications_archive so the hot table
+# (and its indexes) only hold what inboxes actually page through.
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from models import Notification, NotificationArchive
+
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))
+# Rows moved per transaction; keeps locks and the write-ahead log small
+ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", 1000))
+
+_COLUMNS = ("id", "public_id", "user_id", "title", "message", "is_read", "created_at", "booking_id")
+
+
+def archive_read_notifications(
+    db: Session,
+    older_than_days: int = NOTIFICATION_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> dict:
+    """Copy read notifications older than the cutoff to the archive and delete them.
+
+    Unread notifications are never moved, so unread counters are unaffected.
+    Each batch is its own transaction; an interrupted run resumes where it
+    stopped.
+    """
+    started = time.monotonic()
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = db.scalars(
+            select(Notification.id)
+            .where(Notification.is_read.is_(True), Notification.created_at < cutoff)
+            .order_by(Notification.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        columns = [getattr(Notification, name) for name in _COLUMNS]
+        db.execute(
+            insert(NotificationArchive).from_select(
+                list(_COLUMNS), select(*columns).where(Notification.id.in_(ids))
+            )
+        )
+        db.execute(delete(Notification).where(Notification.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+        batches += 1
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "archived": moved,
+        "batches": batches,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m notifications.retention [--days 90] [--rebuild-counters]"""
+    from database import SessionLocal
+    from notifications.inbox import rebuild_counters
+
+    parser = argparse.ArgumentParser(description="Archive old read notifications")
+    parser.add_argument("--days", type=int, default=NOTIFICATION_RETENTION_DAYS, help="Keep this many days hot")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--rebuild-counters", action="store_true",
+                        help="Also recompute unread counters (after bulk loads)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = archive_read_notifications(db, args.days, args.batch_size)
+        if args.rebuild_counters:
+            report["counters_rebuilt"] = rebuild_counters(db)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,17 @@
 # filepath: routes/notifications.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from database import get_db
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal, get_db
 from models import Notification, User, Workers
-from schemas import NotificationResponse, NotificationCreate
-from typing import List
+from schemas import NotificationResponse, NotificationCreate, InboxPage, UnreadCount, MarkReadUpTo, MarkReadResult
+from authentication import get_current_user
+from typing import List, Optional
 from datetime import datetime
+from .inbox import MAX_PAGE_SIZE, inbox_page, mark_read_up_to, unread_count
+from .stream import sse_events, websocket_events
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -15,18 +20,94 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
 # Get all notifications for a user
 # ==============================
 @router.get("/user/{user_id}", response_model=List[NotificationResponse])
-def get_user_notifications(user_id: int, db: Session = Depends(get_db)):
+def get_user_notifications(
+    user_id: int,
+    cursor: Optional[int] = Query(None, description="Return notifications older than this id"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    notifications = (
-        db.query(Notification)
-        .filter(Notification.user_id == user_id)
-        .order_by(Notification.created_at.desc())
-        .all()
+    return inbox_page(db, user_id, cursor, limit)["items"]
+
+
+# ==============================
+# Inbox for the signed-in user
+# ==============================
+@router.get("/inbox", response_model=InboxPage)
+def get_inbox(
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    unread_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return inbox_page(db, current_user.id, cursor, limit, unread_only)
+
+
+@router.get("/inbox/unread-count", response_model=UnreadCount)
+def get_unread_count(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return {"unread_count": unread_count(db, current_user.id)}
+
+
+@router.post("/inbox/read", response_model=MarkReadResult)
+def mark_inbox_read(
+    payload: MarkReadUpTo,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Mark everything up to and including ``up_to_id`` as read"""
+    updated = mark_read_up_to(db, current_user.id, payload.up_to_id)
+    return {"updated": updated, "unread_count": unread_count(db, current_user.id)}
+
+
+# ==============================
+# Live stream for the signed-in user (replaces polling)
+# ==============================
+def _stream_user_id(token: Optional[str]) -> int:
+    """Resolve the token on a short-lived session so the stream does not hold one"""
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    db = SessionLocal()
+    try:
+        return get_current_user(token=token, db=db).id
+    finally:
+        db.close()
+
+
+def _resume_from(value: Optional[str]) -> int:
+    return int(value) if value and value.isdigit() else 0
+
+
+@router.get("/stream")
+async def stream_notifications(
+    token: Optional[str] = Query(None, description="Bearer token, for EventSource clients that cannot set headers"),
+    last_event_id: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-sent events; reconnects resume after ``Last-Event-ID``"""
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    user_id = await run_in_threadpool(_stream_user_id, token)
+    return StreamingResponse(
+        sse_events(user_id, _resume_from(last_event_id_header or last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return notifications
+
+
+@router.websocket("/ws")
+async def notifications_ws(websocket: WebSocket, token: Optional[str] = None, last_event_id: Optional[str] = None):
+    try:
+        user_id = await run_in_threadpool(_stream_user_id, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await websocket_events(websocket, user_id, _resume_from(last_event_id))
 
 
 # ==============================
@@ -85,5 +166,4 @@ def get_worker_notifications(worker_id: int, db: Session = Depends(get_db)):
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
 
-    notifications = db.query(Notification).filter(Notification.user_id == worker.user_id, Notification.is_read == False).all()
-    return notifications
\ No newline at end of file
+    return inbox_page(db, worker.user_id, limit=MAX_PAGE_SIZE, unread_only=True)["items"]
\ No newline at end of file
@@ -0,0 +1,216 @@
+# notifications/stream.py
+# In-process pub/sub for new notifications. Writers need no changes: a
+# Notification insert is queued on the session and published once the
+# transaction commits. Subscribers (SSE and WebSocket streams) replay what
+# they missed from the table, keyed by notification id as the event id.
+#
+# The bus is per process; with several workers, a user connected to one
+# still gets notifications committed by another on reconnect (replay), not
+# live.
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import Notification
+from observability.metrics import Gauge, register_collector
+
+# Events buffered per subscriber before it is cut off to resume via replay
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_LIMIT = 200
+# SSE comment / WebSocket ping interval, so proxies keep idle streams open
+HEARTBEAT_SECONDS = 15
+
+
+def notification_event(notification) -> dict:
+    created_at = notification.created_at
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": notification.message,
+        "booking_id": notification.booking_id,
+        "is_read": bool(notification.is_read),
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+    }
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when the queue overflowed; the stream closes and the client resumes
+        self.lagging = False
+
+    def _put(self, payload: dict) -> None:
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """The next event, or None after ``timeout`` seconds of quiet"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationBus:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, payload: dict) -> None:
+        """Safe to call from any thread (sync handlers commit in the threadpool)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            if subscription.loop.is_closed():
+                continue
+            subscription.loop.call_soon_threadsafe(subscription._put, payload)
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+bus = NotificationBus()
+
+STREAM_SUBSCRIBERS = Gauge("notification_stream_subscribers", "Open notification SSE/WebSocket streams")
+register_collector(lambda: STREAM_SUBSCRIBERS.set(bus.count()))
+
+
+def replay(user_id: int, after_id: int) -> List[dict]:
+    """Notifications a reconnecting client missed, oldest first"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Notification)
+            .filter(Notification.user_id == user_id, Notification.id > after_id)
+            .order_by(Notification.id)
+            .limit(REPLAY_LIMIT)
+            .all()
+        )
+        return [notification_event(row) for row in rows]
+    finally:
+        db.close()
+
+
+def format_sse(payload: dict) -> str:
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+
+# ==========================
+# STREAMS
+# ==========================
+async def _missed(user_id: int, after_id: int):
+    while True:
+        rows = await run_in_threadpool(replay, user_id, after_id)
+        for payload in rows:
+            after_id = payload["id"]
+            yield payload
+        if len(rows) < REPLAY_LIMIT:
+            return
+
+
+async def sse_events(user_id: int, last_event_id: int):
+    """Server-sent events: missed notifications, then live ones, then heartbeats.
+
+    Subscribes before replaying so nothing committed in between is lost;
+    duplicates are skipped by id.
+    """
+    subscription = bus.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        async for payload in _missed(user_id, last_event_id):
+            last_event_id = payload["id"]
+            yield format_sse(payload)
+        while not subscription.lagging:
+            payload = await subscription.next(HEARTBEAT_SECONDS)
+            if payload is None:
+                yield ": keepalive\n\n"
+            elif payload["id"] > last_event_id:
+                last_event_id = payload["id"]
+                yield format_sse(payload)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+async def websocket_events(websocket: WebSocket, user_id: int, last_event_id: int) -> None:
+    """The same stream as JSON messages; answers client pings"""
+    subscription = bus.subscribe(user_id)
+
+    async def read():
+        while True:
+            message = await websocket.receive_json()
+            if message.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+
+    reader = asyncio.create_task(read())
+    try:
+        async for payload in _missed(user_id, last_event_id):
+            last_event_id = payload["id"]
+            await websocket.send_json({"type": "notification", **payload})
+        while not subscription.lagging and not reader.done():
+            payload = await subscription.next(HEARTBEAT_SECONDS)
+            if payload is None:
+                await websocket.send_json({"type": "ping"})
+            elif payload["id"] > last_event_id:
+                last_event_id = payload["id"]
+                await websocket.send_json({"type": "notification", **payload})
+        if subscription.lagging:
+            # Client reconnects with last_event_id and catches up from the table
+            await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        bus.unsubscribe(subscription)
+        reader.cancel()
+        # Retrieve the reader's outcome, or asyncio logs it as never retrieved
+        try:
+            await reader
+        except (asyncio.CancelledError, WebSocketDisconnect):
+            pass
+
+
+# ==========================
+# PUBLISH ON COMMIT
+# ==========================
+@event.listens_for(Notification, "after_insert")
+def _notification_created(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("notification_events", []).append((target.user_id, notification_event(target)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_notifications(session):
+    for user_id, payload in session.info.pop("notification_events", ()):
+        bus.publish(user_id, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_notifications(session):
+    session.info.pop("notification_events", None)
@@ -0,0 +1,287 @@
+# observability/metrics.py
+# In-process metrics in the Prometheus text exposition format, served at
+# /metrics. Values are per process: scrape every worker, or run one.
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import anyio.to_thread
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional bearer token for scrapers; unset leaves /metrics open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# ==========================
+# METRIC TYPES
+# ==========================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Tuple[str, ...]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(v) for v in labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+# Callbacks that refresh gauges from live state right before a scrape
+_collectors: List[Callable[[], None]] = []
+
+
+def register_collector(collect: Callable[[], None]) -> None:
+    _collectors.append(collect)
+
+
+def render() -> str:
+    for collect in _collectors:
+        collect()
+    return "".join(metric.render() for metric in REGISTRY)
+
+
+# ==========================
+# METRICS
+# ==========================
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served")
+
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured connection pool size")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size")
+
+WEBSOCKET_CONNECTIONS = Gauge("websocket_connections", "Open chat WebSocket connections")
+WEBSOCKET_BOOKINGS = Gauge("websocket_active_bookings", "Bookings with at least one open chat connection")
+
+NOTIFICATION_DURATION = Histogram(
+    "notification_send_duration_seconds", "Time spent handing a notification to its provider", ("channel",),
+)
+NOTIFICATION_FAILURES = Counter(
+    "notification_send_failures_total", "Notifications the provider rejected or that errored", ("channel",),
+)
+
+QUEUE_DEPTH = Gauge("background_queue_depth", "Work submitted but not finished, per queue", ("queue",))
+
+
+@contextmanager
+def track_send(channel: str) -> Iterator[None]:
+    """Time a provider call (``fcm``, ``email``) and count it as failed if it raises"""
+    try:
+        with NOTIFICATION_DURATION.time(channel):
+            yield
+    except Exception:
+        NOTIFICATION_FAILURES.inc(channel)
+        raise
+
+
+# ==========================
+# COLLECTORS
+# ==========================
+def watch_engine_pool(engine: Engine) -> None:
+    def collect():
+        pool = engine.pool
+        # Pools without a fixed size (SQLite's StaticPool/NullPool) report nothing
+        if not hasattr(pool, "checkedout"):
+            return
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        # QueuePool counts up from -size while the pool is still filling
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    register_collector(collect)
+
+
+def watch_connections(manager) -> None:
+    """Chat connections from a ``messages.ConnectionManager``.
+
+    Totals only: a per-booking label would grow without bound.
+    """
+    def collect():
+        rooms = [len(users) for users in list(manager.active_connections.values())]
+        WEBSOCKET_CONNECTIONS.set(sum(rooms))
+        WEBSOCKET_BOOKINGS.set(sum(1 for n in rooms if n))
+
+    register_collector(collect)
+
+
+def _collect_threadpool():
+    # Sync handlers and dependencies queue for anyio's worker threads
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    QUEUE_DEPTH.set(statistics.borrowed_tokens + statistics.tasks_waiting, "threadpool")
+
+
+# ==========================
+# MIDDLEWARE AND ENDPOINT
+# ==========================
+class MetricsMiddleware:
+    """Record request latency labelled by route template, never the raw path"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "5xx"
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = f"{message['status'] // 100}xx"
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"], route.path if route else "unmatched", status,
+            )
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    _collect_threadpool()
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,177 @@
+# observability/queries.py
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# "off", "warn" (log) or "raise" (tests: fail the request) when a budget is exceeded
+QUERY_BUDGET_MODE = os.getenv("DB_QUERY_BUDGET_MODE", "warn")
+# The same statement shape this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", 5))
+
+_NUMBER = re.compile(r"\b\d+\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|:\w+|N)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|N))*\s*\)")
+# SQLAlchemy renders an empty expanding IN as this always-false subquery
+_EMPTY_IN = re.compile(r"\(SELECT N FROM \(SELECT N\) WHERE N ?!= ?N\)")
+_SPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestQueries:
+    """Statements executed while serving one request"""
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+# SQLAlchemy caches compiled SQL, so the same strings come back on every request
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """Collapse literals and IN lists so per-row variants of a query compare equal"""
+    shape = _NUMBER.sub("N", statement)
+    shape = _EMPTY_IN.sub("(...)", _IN_LIST.sub("(...)", shape))
+    return _SPACE.sub(" ", shape).strip()
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+# ==========================
+# ENGINE EVENTS
+# ==========================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not conn.info.get("query_started"):
+        return
+    stats.duration += time.perf_counter() - conn.info["query_started"].pop()
+    stats.count += 1
+    stats.shapes[statement_shape(statement)] += 1
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; without this its
+    # start time would stay on the pooled connection and skew later timings
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None and exception_context.statement:
+        stats.duration += elapsed
+        stats.count += 1
+        stats.shapes[statement_shape(exception_context.statement)] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+# ==========================
+# BUDGETS
+# ==========================
+def query_budget(limit: int) -> Callable:
+    """Mark a route handler with the most statements one request may run.
+
+    Apply below the router decorator so the route registers the marked
+    function.
+    """
+    def decorate(func):
+        func.query_budget = limit
+        return func
+    return decorate
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route else scope['path']}"
+
+
+def _check(scope: Scope, stats: RequestQueries) -> None:
+    name = _route_name(scope)
+    for shape, n in stats.repeated().items():
+        logger.warning("Possible N+1 on %s: %d x %s", name, n, shape[:300])
+
+    budget = getattr(scope.get("endpoint"), "query_budget", None)
+    if budget is None or stats.count <= budget or QUERY_BUDGET_MODE == "off":
+        return
+    message = f"{name} ran {stats.count} queries (budget {budget})"
+    if QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+# ==========================
+# MIDDLEWARE
+# ==========================
+class QueryCountMiddleware:
+    """Count statements and DB time per HTTP request.
+
+    Adds ``X-DB-Queries`` and ``Server-Timing`` (``db`` and ``app``
+    durations) to every response, logs repeated statement shapes, and
+    enforces ``query_budget`` marks. Statements run after the response
+    headers are sent (streaming bodies, background tasks) are not counted.
+    """
+
+    def __init__(self, app: ASGIApp, engine: Engine):
+        self.app = app
+        instrument_engine(engine)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueries()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+        _check(scope, stats)
@@ -0,0 +1,327 @@
+# observability/tracing.py
+# Minimal OpenTelemetry-compatible tracing. Spans carry W3C trace context
+# and are exported as OTLP/JSON (one ExportTraceServiceRequest per line),
+# the format the collector's otlpjsonfile receiver reads.
+import atexit
+import functools
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# "none" (disabled), "console" (stdout) or "file" (TRACE_FILE)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+# Share of new traces recorded; unsampled requests cost a context lookup per span
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "smart-safi-api")
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+MAX_STATEMENT_LENGTH = 2000
+
+ENABLED = TRACE_EXPORTER in ("console", "file")
+
+# OTLP SpanKind values
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes",
+                 "status", "message", "events")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = dict(attributes or {})
+        self.status = 0
+        self.message = ""
+        self.events: List[Dict[str, Any]] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = str(exc)[:500]
+        self.events.append({
+            "timeUnixNano": str(time.time_ns()),
+            "name": "exception",
+            "attributes": _attributes({"exception.type": type(exc).__name__, "exception.message": self.message}),
+        })
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        _exporter.submit(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": self.status, "message": self.message} if self.status else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            encoded.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            encoded.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            encoded.append({"key": key, "value": {"doubleValue": value}})
+        elif value is not None:
+            encoded.append({"key": key, "value": {"stringValue": str(value)}})
+    return encoded
+
+
+# The active span, or _UNSAMPLED inside a request that is not being traced
+_UNSAMPLED = object()
+_current: ContextVar[Any] = ContextVar("current_span", default=None)
+
+
+# ==========================
+# EXPORT
+# ==========================
+class _Exporter:
+    """Batch finished spans and write them from a background thread"""
+
+    def __init__(self):
+        self.queue: "queue.Queue[Span]" = queue.Queue(maxsize=EXPORT_BATCH_SIZE * 20)
+        self.thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def submit(self, span: Span) -> None:
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(EXPORT_INTERVAL_SECONDS)
+            self.flush()
+
+    def flush(self) -> None:
+        while True:
+            batch = []
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Span]) -> None:
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "smart-safi"}, "spans": [span.to_otlp() for span in batch]}],
+        }]})
+        if TRACE_EXPORTER == "file":
+            with open(TRACE_FILE, "a") as out:
+                out.write(line + "\n")
+        else:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+
+_exporter = _Exporter()
+
+
+# ==========================
+# SPANS
+# ==========================
+def _sampled_root() -> bool:
+    return random.random() < TRACE_SAMPLE_RATE
+
+
+@contextmanager
+def start_span(name: str, kind: int = KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+               root: bool = False) -> Iterator[Optional[Span]]:
+    """Record ``name`` as a child of the active span; yields None when not recording.
+
+    ``root=True`` starts a new trace (subject to sampling) regardless of the
+    active span, e.g. for each message on a long-lived WebSocket. Outside
+    any trace, a span starts a sampled trace of its own.
+    """
+    parent = None if root else _current.get()
+    if not ENABLED or parent is _UNSAMPLED or (parent is None and not _sampled_root()):
+        yield None
+        return
+
+    trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+    span = Span(name, trace_id, parent.span_id if parent else None, kind, attributes)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def traced(name: str, kind: int = KIND_INTERNAL):
+    """Decorator form of ``start_span`` for plain functions"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ==========================
+# INSTRUMENTATION
+# ==========================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None or parent is _UNSAMPLED:
+        return
+    span = Span("db.query", parent.trace_id, parent.span_id, KIND_CLIENT, {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        "db.operation": statement.lstrip().split(" ", 1)[0].upper(),
+    })
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+    if spans:
+        span = spans.pop()
+        span.record_exception(exception_context.original_exception)
+        span.end()
+
+
+def instrument_engine(engine: Engine) -> None:
+    if ENABLED and not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def instrument_requests() -> None:
+    """Client spans for every ``requests`` call: M-Pesa directly, Stripe via its RequestsClient"""
+    import requests
+
+    send = requests.Session.send
+    if not ENABLED or getattr(send, "traced", False):
+        return
+
+    @functools.wraps(send)
+    def traced_send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        attributes = {"http.method": request.method, "server.address": url.hostname, "url.path": url.path}
+        with start_span(f"HTTP {request.method} {url.hostname}", KIND_CLIENT, attributes) as span:
+            response = send(self, request, **kwargs)
+            if span:
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.status = STATUS_ERROR
+            return response
+
+    traced_send.traced = True
+    requests.Session.send = traced_send
+
+
+def _parse_traceparent(header: bytes):
+    """W3C ``traceparent``: version-traceid-parentid-flags"""
+    parts = header.decode("latin-1").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+class TracingMiddleware:
+    """Root span per HTTP request, continuing an incoming ``traceparent``"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"traceparent")
+        parent = _parse_traceparent(incoming) if incoming else None
+        sampled = parent[2] if parent else _sampled_root()
+        if not sampled:
+            token = _current.set(_UNSAMPLED)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current.reset(token)
+            return
+
+        span = Span(scope["method"], parent[0] if parent else f"{random.getrandbits(128):032x}",
+                    parent[1] if parent else None, KIND_SERVER, {"http.method": scope["method"]})
+        token = _current.set(span)
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = STATUS_ERROR
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            route = scope.get("route")
+            span.name = f"{scope['method']} {route.path if route else 'unmatched'}"
+            span.set_attribute("http.route", route.path if route else None)
+            _current.reset(token)
+            span.end()
@@ -0,0 +1,61 @@
+# outbox/__init__.py
+# Transactional outbox. Handlers record a domain event on the same session
+# as the change it describes, so both commit or neither does; side effects
+# (notifications, push, email) run afterwards in outbox.dispatcher.
+#
+# Delivery is at least once: a handler can run again after a crash or a
+# failed sibling handler, so handlers must tolerate repeats.
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import OutboxEvent
+
+BOOKING_CREATED = "BookingCreated"
+MESSAGE_SENT = "MessageSent"
+WORKER_VERIFIED = "WorkerVerified"
+PAYMENT_SUCCEEDED = "PaymentSucceeded"
+USER_REGISTERED = "UserRegistered"
+
+Handler = Callable[[Session, dict], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def record(db: Session, event_type: str, payload: dict) -> None:
+    """Add an event to the caller's transaction; it is dispatched once that commits"""
+    db.add(OutboxEvent(event_type=event_type, payload=payload))
+    db.info["outbox_pending"] = True
+
+
+def handles(event_type: str):
+    """Register ``func(db, payload)`` for an event type.
+
+    Database writes a handler makes on ``db`` commit together with the event
+    being marked dispatched.
+    """
+    def register(func: Handler) -> Handler:
+        _handlers[event_type].append(func)
+        return func
+    return register
+
+
+def handlers_for(event_type: str) -> List[Handler]:
+    return list(_handlers.get(event_type, ()))
+
+
+# ==========================
+# WAKE THE DISPATCHER ON COMMIT
+# ==========================
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop("outbox_pending", False):
+        from outbox.dispatcher import dispatcher
+        dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("outbox_pending", None)
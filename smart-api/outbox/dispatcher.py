@@ -0,0 +1,206 @@
+# outbox/dispatcher.py
+# Claims pending outbox events and runs their handlers. In the API process
+# a background task is woken on every commit that recorded events and
+# otherwise polls; ``python -m outbox.dispatcher`` runs the same loop as a
+# separate worker (set OUTBOX_DISPATCH_IN_APP=0 then).
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import anyio.to_thread
+from sqlalchemy import or_, update
+
+from database import SessionLocal
+from models import OutboxEvent
+from observability.metrics import Counter, Histogram
+from outbox import handlers_for
+import outbox.handlers  # noqa: F401  (registers the handlers)
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCH_IN_APP = os.getenv("OUTBOX_DISPATCH_IN_APP", "1") == "1"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+# Fallback poll, for events committed by other processes
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 2))
+# A claimed event whose dispatcher died is retried after this long
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 60))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+# Retry delay doubles from this, capped at an hour
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", 5))
+MAX_RETRY_DELAY_SECONDS = 3600
+
+OUTBOX_EVENTS = Counter(
+    "outbox_events_total", "Outbox events handled, by outcome (dispatched, retry, failed)",
+    ("event_type", "outcome"),
+)
+OUTBOX_LAG = Histogram(
+    "outbox_dispatch_lag_seconds", "Time from commit to handlers finishing", ("event_type",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 3600.0),
+)
+
+
+def retry_delay(attempts: int) -> int:
+    return min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+
+def _claim(db, limit: int) -> List[int]:
+    """Lease up to ``limit`` due events; a conditional UPDATE per row so
+    concurrent dispatchers never both take one"""
+    now = datetime.utcnow()
+    unclaimed = or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until < now)
+    candidates = [
+        event_id for (event_id,) in db.query(OutboxEvent.id)
+        .filter(OutboxEvent.status == "pending", OutboxEvent.available_at <= now, unclaimed)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+    ]
+    claimed = []
+    for event_id in candidates:
+        result = db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event_id, OutboxEvent.status == "pending", unclaimed)
+            .values(locked_until=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+        )
+        if result.rowcount:
+            claimed.append(event_id)
+    db.commit()
+    return claimed
+
+
+def _dispatch_one(db, event_id: int) -> str:
+    event = db.get(OutboxEvent, event_id)
+    try:
+        for handler in handlers_for(event.event_type):
+            handler(db, event.payload)
+        event.status = "dispatched"
+        event.dispatched_at = datetime.utcnow()
+        event.locked_until = None
+        db.commit()
+        OUTBOX_LAG.observe((event.dispatched_at - event.created_at).total_seconds(), event.event_type)
+        outcome = "dispatched"
+    except Exception as exc:
+        db.rollback()
+        event = db.get(OutboxEvent, event_id)
+        event.attempts += 1
+        event.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+        event.locked_until = None
+        if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+            event.status = "failed"
+            outcome = "failed"
+            logger.error("Outbox event gave up", extra={"event_id": event_id, "event_type": event.event_type},
+                         exc_info=True)
+        else:
+            event.available_at = datetime.utcnow() + timedelta(seconds=retry_delay(event.attempts))
+            outcome = "retry"
+            logger.warning("Outbox event failed, will retry",
+                           extra={"event_id": event_id, "event_type": event.event_type, "attempts": event.attempts},
+                           exc_info=True)
+        db.commit()
+    OUTBOX_EVENTS.inc(event.event_type, outcome)
+    return outcome
+
+
+def dispatch_pending(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Handle one batch of due events; returns how many were claimed"""
+    db = SessionLocal()
+    try:
+        claimed = _claim(db, limit)
+        for event_id in claimed:
+            _dispatch_one(db, event_id)
+        return len(claimed)
+    finally:
+        db.close()
+
+
+def retry_failed(db) -> int:
+    """Send events that exhausted their attempts round again (after fixing the cause)"""
+    result = db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.status == "failed")
+        .values(status="pending", attempts=0, available_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+
+# ==========================
+# BACKGROUND TASK
+# ==========================
+class Dispatcher:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._loop = None
+
+    def wake(self) -> None:
+        """Called after a commit that recorded events; safe from any thread"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await anyio.to_thread.run_sync(dispatch_pending)
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            if claimed >= OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+dispatcher = Dispatcher()
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m outbox.dispatcher [--once] [--retry-failed]"""
+    parser = argparse.ArgumentParser(description="Dispatch outbox events")
+    parser.add_argument("--once", action="store_true", help="Drain what is due and exit")
+    parser.add_argument("--retry-failed", action="store_true", help="Requeue events that ran out of attempts")
+    args = parser.parse_args(argv)
+
+    if args.retry_failed:
+        db = SessionLocal()
+        try:
+            print(json.dumps({"requeued": retry_failed(db)}))
+        finally:
+            db.close()
+
+    while True:
+        while dispatch_pending() >= OUTBOX_BATCH_SIZE:
+            pass
+        if args.once:
+            return 0
+        time.sleep(OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
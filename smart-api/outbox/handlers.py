@@ -0,0 +1,96 @@
+# outbox/handlers.py
+# Side effects moved out of the request handlers. Each runs after the
+# change that caused it has committed; raising schedules a retry.
+import logging
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from models import Notification, User
+from outbox import (
+    BOOKING_CREATED,
+    MESSAGE_SENT,
+    PAYMENT_SUCCEEDED,
+    USER_REGISTERED,
+    WORKER_VERIFIED,
+    handles,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@handles(BOOKING_CREATED)
+def notify_worker_of_booking(db: Session, payload: dict) -> None:
+    appointment = datetime.fromisoformat(payload["appointment_datetime"])
+    db.add(Notification(
+        user_id=payload["worker_user_id"],
+        title="New Booking Request",
+        message=f"You have a new booking scheduled for {appointment.strftime('%d %b %Y, %I:%M %p')}",
+        is_read=False,
+    ))
+
+
+@handles(MESSAGE_SENT)
+def push_message_to_offline_receiver(db: Session, payload: dict) -> None:
+    """FCM push unless the receiver has the booking's chat open (they got it over WebSocket)"""
+    from messages.fcm import FCMService
+    from messages.route import manager
+
+    receiver_id = payload["receiver_id"]
+    if manager.is_user_online(payload["booking_id"], receiver_id):
+        return
+    receiver = db.get(User, receiver_id)
+    if not receiver or not receiver.fcm_token:
+        return
+
+    FCMService.send_message_notification(
+        fcm_token=receiver.fcm_token,
+        title=f"New message from {payload['sender_name']}",
+        body=payload["content"][:100],
+        data={
+            "type": "new_message",
+            "message_id": str(payload["message_id"]),
+            "booking_id": str(payload["booking_id"]),
+            "sender_id": str(payload["sender_id"]),
+            "sender_type": payload["sender_type"],
+            "sender_name": payload["sender_name"],
+            "content": payload["content"][:100],
+            "timestamp": payload["timestamp"],
+        },
+        raise_errors=True,
+    )
+
+
+@handles(WORKER_VERIFIED)
+def notify_worker_of_verification(db: Session, payload: dict) -> None:
+    if payload["approved"]:
+        title = "Account Verified"
+        message = "Your account has been verified by HR. You can now accept bookings."
+    else:
+        title = "Verification Rejected"
+        message = f"Your verification was rejected. Reason: {payload['rejection_reason']}"
+    db.add(Notification(user_id=payload["worker_user_id"], title=title, message=message, is_read=False))
+
+
+@handles(PAYMENT_SUCCEEDED)
+def notify_payee(db: Session, payload: dict) -> None:
+    amount = f"KES {payload['amount']:,.2f}"
+    if payload["payment_kind"] == "admin":
+        title = "Payment Processed"
+        message = (
+            f"Your {payload['payment_type']} payment of {amount} has been processed. "
+            f"Reference: {payload['reference']}"
+        )
+    else:
+        title = "Payment Received"
+        message = f"A payment of {amount} has been made to you."
+    db.add(Notification(user_id=payload["payee_user_id"], title=title, message=message, is_read=False))
+
+
+@handles(USER_REGISTERED)
+def send_verification(db: Session, payload: dict) -> None:
+    # Minted here so the token's lifetime starts when the email goes out
+    from authentication import create_verification_token
+    from emails import send_verification_email
+
+    send_verification_email(payload["email"], create_verification_token(payload["email"]), raise_errors=True)
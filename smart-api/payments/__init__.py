@@ -4,10 +4,17 @@ from requests.auth import HTTPBasicAuth
 from datetime import datetime
 import base64
 import stripe
+import logging
 import os
 from sqlalchemy.orm import Session
 from models import Booking, Payment
 
+logger = logging.getLogger(__name__)
+
+# Point Stripe at a stand-in such as stripe-mock, e.g. during load tests
+if os.getenv("STRIPE_API_BASE"):
+    stripe.api_base = os.getenv("STRIPE_API_BASE")
+
 def lipa_na_mpesa_online(phone: str ="254759234753", amount: float= 1.0):
     # Step 1: Get access token
     consumer_key = os.getenv("Mpesa_Consumer_Key")
@@ -45,7 +52,7 @@ def lipa_na_mpesa_online(phone: str ="254759234753", amount: float= 1.0):
         "AccountReference": "Test123",
         "TransactionDesc": "Payment for goods"
     }
-    print("as received" , phone, amount)
+    logger.info("Requesting M-Pesa STK push", extra={"amount": amount})
     response = requests.post(
         "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest",
         headers=headers,
@@ -8,17 +8,20 @@ from pathlib import Path
 import os
 import shutil,stripe
 from models import Booking, Payment
+from ratelimit import STK_PER_IP, STK_PER_ROUTE, STRIPE_PER_IP, STRIPE_PER_ROUTE, rate_limit
 
 
 paymentsrouter = router
 
 
 
-@paymentsrouter.get("/stk", response_model=dict)
+@paymentsrouter.get("/stk", response_model=dict, dependencies=[Depends(rate_limit(STK_PER_IP, STK_PER_ROUTE))])
 def get_stk_info():
     return lipa_na_mpesa_online()   
 
-@paymentsrouter.get("/stripe", response_model=dict)
+@paymentsrouter.get(
+    "/stripe", response_model=dict, dependencies=[Depends(rate_limit(STRIPE_PER_IP, STRIPE_PER_ROUTE))]
+)
 def test_stripe_payment():
     return stripe_payment_test()
 
@@ -30,7 +33,6 @@ def create_deposit_payment_intent(
     db: Session = Depends(get_db)
 ):
 
-    print("stripe secret key", os.getenv("stripe_api_key"))
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(404, "Booking not found")
@@ -0,0 +1,281 @@
+# ratelimit/__init__.py
+# Token-bucket rate limits for expensive or abusable endpoints. A Policy
+# allows ``limit`` requests per ``period`` seconds (bursts up to ``burst``)
+# per subject: the client IP, the authenticated user, or the route as a
+# whole (to protect an upstream such as Daraja or Stripe). Routes opt in:
+#
+#   @auth_router.post("/login", dependencies=[Depends(rate_limit(LOGIN_PER_IP, LOGIN_PER_ROUTE))])
+#
+# Buckets live in process memory by default; RATE_LIMIT_BACKEND=database
+# keeps them in rate_limit_buckets so every node draws from the same bucket.
+# Limits can be changed per policy with RATE_LIMIT_OVERRIDES, e.g.
+# "login_ip=20/60,stk_route=0" (0 turns a policy off).
+#
+# ratelimit.concurrency holds the global in-flight limiter.
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import anyio.to_thread
+from fastapi import HTTPException, Request, Response
+from jose import JWTError, jwt
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from observability.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# "memory" (per process) or "database" (shared by every node)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_OVERRIDES = os.getenv("RATE_LIMIT_OVERRIDES", "")
+# Proxies in front of the app that append to X-Forwarded-For; 0 uses the socket peer
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+# In-memory buckets kept before idle, already refilled ones are dropped
+MEMORY_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_BUCKETS", 50_000))
+# Compare-and-set retries against the shared table before letting the request through
+DATABASE_CAS_ATTEMPTS = 5
+
+RATE_LIMITED = Counter("rate_limited_total", "Requests rejected by a rate limit policy", ("policy",))
+
+
+def _overrides() -> Dict[str, Tuple[int, float]]:
+    parsed = {}
+    for pair in RATE_LIMIT_OVERRIDES.split(","):
+        name, _, value = pair.partition("=")
+        if not name.strip() or not value.strip():
+            continue
+        limit, _, period = value.partition("/")
+        try:
+            parsed[name.strip()] = (int(limit), float(period or 1))
+        except ValueError:
+            logger.warning("Ignoring malformed rate limit override %r", pair)
+    return parsed
+
+
+_OVERRIDES = _overrides()
+
+
+# ==========================
+# POLICIES
+# ==========================
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    limit: int
+    period: float
+    # "ip", "user" (falls back to ip when unauthenticated) or "route"
+    key: str = "ip"
+    burst: Optional[int] = None
+
+    @property
+    def capacity(self) -> float:
+        return float(self.burst or self.limit)
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second"""
+        return self.limit / self.period
+
+
+def policy(name: str, limit: int, period: float, key: str = "ip", burst: Optional[int] = None) -> Policy:
+    """A Policy, with any RATE_LIMIT_OVERRIDES entry for ``name`` applied"""
+    if name in _OVERRIDES:
+        limit, period = _OVERRIDES[name]
+    return Policy(name, limit, period, key, burst)
+
+
+# bcrypt makes each attempt cost ~0.25 s of a worker thread
+LOGIN_PER_IP = policy("login_ip", 10, 60)
+LOGIN_PER_ROUTE = policy("login_route", 20, 1)
+# STK pushes go to Safaricom (Daraja has its own quotas)
+STK_PER_IP = policy("stk_ip", 3, 60)
+STK_PER_ROUTE = policy("stk_route", 60, 60)
+STRIPE_PER_IP = policy("stripe_ip", 5, 60)
+STRIPE_PER_ROUTE = policy("stripe_route", 60, 60)
+# Whole-table scans; one admin refreshing a dashboard is fine, a loop is not
+ANALYTICS_PER_USER = policy("analytics_user", 10, 60, key="user", burst=5)
+ANALYTICS_PER_ROUTE = policy("analytics_route", 30, 60)
+
+
+# ==========================
+# SUBJECTS
+# ==========================
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            # Hops before the first trusted proxy are whatever the client claimed
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def _user_id(request: Request) -> Optional[str]:
+    from authentication import ALGORITHM, SECRET_KEY
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        # Signature only: the limiter must not cost a database lookup. Registration
+        # tokens carry the numeric user id as "sub", which jose rejects by default
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_sub": False})
+    except JWTError:
+        return None
+    # Login tokens name the user in "client_id"; registration ("sub": id) and
+    # admin-created ("sub": email) tokens only have "sub"
+    user_id = payload.get("client_id", payload.get("sub"))
+    return None if user_id is None else str(user_id)
+
+
+def subject(limit: Policy, request: Request) -> str:
+    if limit.key == "route":
+        route = request.scope.get("route")
+        return route.path if route else request.url.path
+    if limit.key == "user":
+        user_id = _user_id(request)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{client_ip(request)}"
+
+
+# ==========================
+# BACKENDS
+# ==========================
+def _refill(tokens: float, elapsed: float, limit: Policy) -> float:
+    return min(limit.capacity, tokens + max(0.0, elapsed) * limit.rate)
+
+
+def _take(tokens: float, limit: Policy) -> Tuple[bool, float, float]:
+    """(allowed, tokens left, seconds until one token) after trying to take one"""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / limit.rate
+
+
+class MemoryBackend:
+    """Buckets in this process; each node (and worker process) limits on its own"""
+
+    blocking = False
+
+    def __init__(self, max_buckets: int = MEMORY_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        # key -> (tokens, updated, moment the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Policy) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            tokens = limit.capacity if state is None else _refill(state[0], now - state[1], limit)
+            allowed, tokens, retry_after = _take(tokens, limit)
+            self._buckets[key] = (tokens, now, now + (limit.capacity - tokens) / limit.rate)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+        return allowed, tokens, retry_after
+
+    def _prune(self, now: float) -> None:
+        # A full bucket is the same as no bucket
+        for key in [key for key, state in self._buckets.items() if state[2] <= now]:
+            del self._buckets[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBackend:
+    """Buckets in rate_limit_buckets, updated by compare-and-set on updated_at.
+
+    Fails open: if the table is unreachable or too contended the request is
+    let through and the failure logged, so the limiter never takes the API
+    down with it.
+    """
+
+    blocking = True
+
+    def take(self, key: str, limit: Policy) -> Tuple[bool, float, float]:
+        from database import engine
+        from models import RateLimitBucket
+
+        try:
+            for _ in range(DATABASE_CAS_ATTEMPTS):
+                now = time.time()
+                try:
+                    with engine.begin() as conn:
+                        row = conn.execute(
+                            select(RateLimitBucket.tokens, RateLimitBucket.updated_at)
+                            .where(RateLimitBucket.key == key)
+                        ).first()
+                        if row is None:
+                            allowed, tokens, retry_after = _take(limit.capacity, limit)
+                            conn.execute(insert(RateLimitBucket).values(key=key, tokens=tokens, updated_at=now))
+                            return allowed, tokens, retry_after
+                        allowed, tokens, retry_after = _take(_refill(row.tokens, now - row.updated_at, limit), limit)
+                        result = conn.execute(
+                            update(RateLimitBucket)
+                            .where(RateLimitBucket.key == key, RateLimitBucket.updated_at == row.updated_at)
+                            .values(tokens=tokens, updated_at=now)
+                        )
+                        if result.rowcount:
+                            return allowed, tokens, retry_after
+                except IntegrityError:
+                    pass  # another node created the bucket first; read it again
+            logger.warning("Rate limit bucket too contended, allowing", extra={"bucket": key})
+        except SQLAlchemyError:
+            logger.exception("Rate limit backend unavailable, allowing", extra={"bucket": key})
+        return True, limit.capacity, 0.0
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = DatabaseBackend() if RATE_LIMIT_BACKEND == "database" else MemoryBackend()
+    return _backend
+
+
+# ==========================
+# DEPENDENCY
+# ==========================
+def rate_limit(*policies: Policy):
+    """Route dependency enforcing ``policies`` in order; 429 with Retry-After when one is exhausted"""
+    active = [limit for limit in policies if limit.limit > 0]
+
+    async def check(request: Request, response: Response) -> None:
+        if not RATE_LIMIT_ENABLED or not active:
+            return
+        backend = get_backend()
+        headline, remaining = None, None
+        for limit in active:
+            key = f"{limit.name}:{subject(limit, request)}"
+            if backend.blocking:
+                allowed, tokens, retry_after = await anyio.to_thread.run_sync(backend.take, key, limit)
+            else:
+                allowed, tokens, retry_after = backend.take(key, limit)
+            if not allowed:
+                RATE_LIMITED.inc(limit.name)
+                logger.info("Rate limited", extra={"policy": limit.name, "bucket": key})
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests, retry later",
+                    headers={
+                        "Retry-After": str(max(1, math.ceil(retry_after))),
+                        "X-RateLimit-Limit": str(limit.limit),
+                        "X-RateLimit-Remaining": "0",
+                    },
+                )
+            if remaining is None or tokens < remaining:
+                headline, remaining = limit, tokens
+        response.headers["X-RateLimit-Limit"] = str(headline.limit)
+        response.headers["X-RateLimit-Remaining"] = str(int(remaining))
+
+    return check
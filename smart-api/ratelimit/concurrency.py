@@ -0,0 +1,110 @@
+# ratelimit/concurrency.py
+# Global admission control. At most MAX_CONCURRENT_REQUESTS HTTP requests
+# are handled at once (by default the size of anyio's worker thread pool,
+# which every sync handler and dependency borrows from). Up to
+# CONCURRENCY_QUEUE_SIZE more wait, for at most CONCURRENCY_QUEUE_TIMEOUT
+# seconds; anything beyond that is shed at once with 503 and Retry-After,
+# so a burst costs some clients a retry instead of everyone's latency.
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Deque, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from observability.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 40))
+CONCURRENCY_QUEUE_SIZE = int(os.getenv("CONCURRENCY_QUEUE_SIZE", 100))
+CONCURRENCY_QUEUE_TIMEOUT = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT", 2.0))
+CONCURRENCY_RETRY_AFTER = int(os.getenv("CONCURRENCY_RETRY_AFTER", 2))
+# Long-lived or trivial paths that must not hold (or wait for) a slot
+CONCURRENCY_EXEMPT_PATHS: Tuple[str, ...] = tuple(
+    path.strip() for path in os.getenv("CONCURRENCY_EXEMPT_PATHS", "/metrics,/health,/notifications/stream").split(",")
+    if path.strip()
+)
+
+REQUESTS_ADMITTED = Gauge("http_requests_admitted", "Requests holding a concurrency slot")
+REQUESTS_QUEUED = Gauge("http_requests_queued", "Requests waiting for a concurrency slot")
+REQUESTS_SHED = Counter("http_requests_shed_total", "Requests rejected with 503 by the concurrency limiter", ("reason",))
+
+
+class ConcurrencyLimitMiddleware:
+    def __init__(self, app: ASGIApp, limit: int = MAX_CONCURRENT_REQUESTS, queue_size: int = CONCURRENCY_QUEUE_SIZE,
+                 queue_timeout: float = CONCURRENCY_QUEUE_TIMEOUT):
+        self.app = app
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._admitted = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.limit <= 0 or scope["path"].startswith(CONCURRENCY_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self._acquire()
+        if reason:
+            REQUESTS_SHED.inc(reason)
+            logger.warning("Shedding request", extra={"reason": reason, "path": scope["path"]})
+            response = JSONResponse(
+                {"detail": "Server busy, retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(CONCURRENCY_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _acquire(self) -> str:
+        """Take a slot; returns why the request was shed, or "" once admitted"""
+        if self._admitted < self.limit and not self._waiters:
+            self._admitted += 1
+            REQUESTS_ADMITTED.set(self._admitted)
+            return ""
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        REQUESTS_QUEUED.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            return ""
+        except asyncio.TimeoutError:
+            # A slot handed over just as the wait expired is still ours
+            if waiter.done() and not waiter.cancelled():
+                return ""
+            waiter.cancel()
+            return "timeout"
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot it was just given
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            REQUESTS_QUEUED.set(len(self._waiters))
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so queued requests keep their order
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                REQUESTS_QUEUED.set(len(self._waiters))
+                return
+        self._admitted -= 1
+        REQUESTS_ADMITTED.set(self._admitted)
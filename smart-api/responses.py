@@ -0,0 +1,29 @@
+# responses.py
+# orjson-encoded JSON for high-volume list endpoints. Those routes build
+# their rows from selected columns (slotted dataclasses, which orjson
+# encodes natively) and return this response directly, skipping Pydantic
+# validation; their response_model stays for the OpenAPI schema.
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not encode itself"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
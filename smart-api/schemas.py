@@ -1,10 +1,12 @@
 from pydantic import BaseModel, EmailStr, validator,Field
 from enum import Enum
 from typing import Optional, List,Dict,Literal,Any
-from pydantic import BaseModel, field_validator,EmailStr
-from datetime import datetime
+from pydantic import BaseModel, field_validator,EmailStr, computed_field, field_serializer
+from datetime import date, datetime
 from uuid import uuid4
 from fastapi import Form, UploadFile, File
+from storage import signed_reference
+from storage.images import variant_urls
 
 ## enums for user role ###
 
@@ -259,6 +261,20 @@ class PayrollSummary(BaseModel):
     payment_count: int
     payments: List[Any]
 
+class BulkImportError(BaseModel):
+    row: int
+    field: Optional[str] = None
+    detail: str
+
+class BulkImportReport(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    dry_run: bool
+    documents_stored: int
+    elapsed_seconds: float
+    errors: List[BulkImportError]
+
 class BookingAnalytics(BaseModel):
     bookings_by_period: List[Dict[str, Any]]
     status_distribution: Dict[str, int]
@@ -285,6 +301,19 @@ class Token(BaseModel):
 
 
 
+class ImageVariants(BaseModel):
+    """Resized copies of an uploaded image (see storage/images.py)"""
+    thumb: str
+    medium: str
+    thumb_jpeg: str
+    medium_jpeg: str
+
+
+def image_variants(reference: Optional[str]) -> Optional[ImageVariants]:
+    urls = variant_urls(reference)
+    return ImageVariants(**urls) if urls else None
+
+
 class ClientBase (BaseModel):
  
     first_name: Optional[str]
@@ -316,6 +345,16 @@ class ClientOut(ClientCreate):
     tax_document_proof:Optional[str]
     profile_picture:Optional[str]
 
+    @computed_field
+    @property
+    def profile_picture_variants(self) -> Optional[ImageVariants]:
+        return image_variants(self.profile_picture)
+
+    # KYC documents are returned as short-lived signed URLs
+    @field_serializer("national_id_proof", "tax_document_proof")
+    def sign_documents(self, value: Optional[str]) -> Optional[str]:
+        return signed_reference(value)
+
     class Config:
         from_attributes = True
 
@@ -393,6 +432,11 @@ class WorkerEquipmentCreate:
 class WorkerEquipmentResponse(WorkerEquipmentBase):
     id: int
 
+    @computed_field
+    @property
+    def equipment_image_variants(self) -> Optional[ImageVariants]:
+        return image_variants(self.equipment_image)
+
     class Config:
         orm_mode = True
 
@@ -487,7 +531,6 @@ class WorkerRatingResponse(WorkerRatingBase, from_attributes=True):
     booking_id: int
     # booking: Optional[BookingB]
     # customer: CustomerRatersResponse
-    print("Inside WorkerRatingResponse schema", CustomerRatersResponse)
 
     @classmethod
     def from_orm(cls, obj):
@@ -584,10 +627,41 @@ class NotificationResponse(NotificationBase):
     is_read: bool
     title: str
     created_at: datetime
+    # Not stored on the model
+    type: Optional[str] = None
 
     class Config:
         orm_mode = True
 
+
+class InboxItem(BaseModel, from_attributes=True):
+    id: int
+    title: str
+    message: str
+    is_read: bool
+    created_at: datetime
+    booking_id: Optional[int] = None
+
+
+class InboxPage(BaseModel):
+    items: List[InboxItem]
+    # Pass back as ``cursor`` for the next (older) page; None on the last page
+    next_cursor: Optional[int] = None
+    unread_count: int
+
+
+class UnreadCount(BaseModel):
+    unread_count: int
+
+
+class MarkReadUpTo(BaseModel):
+    up_to_id: int = Field(..., ge=1)
+
+
+class MarkReadResult(BaseModel):
+    updated: int
+    unread_count: int
+
 class Jobstats(BaseModel):
     total_jobs: Optional[int] = 1
     completed_jobs: Optional[int] = 1
@@ -615,6 +689,16 @@ class WorkerResponse(WorkerBase):
     job_stats: Jobstats |None = None
     # we don’t embed payments by default (usually admin view only)
 
+    @computed_field
+    @property
+    def profile_picture_variants(self) -> Optional[ImageVariants]:
+        return image_variants(self.profile_picture)
+
+    # KYC documents are returned as short-lived signed URLs
+    @field_serializer("national_id_proof", "good_conduct_proof")
+    def sign_documents(self, value: Optional[str]) -> Optional[str]:
+        return signed_reference(value)
+
     class Config:
         orm_mode = True
         from_attributes = True
@@ -629,8 +713,12 @@ class BookingServiceBase(BaseModel):
     total_price: float
 
 
-class BookingServiceCreate(BookingServiceBase):
-    pass
+class BookingServiceCreate(BaseModel):
+    feature_option_id: int
+    quantity: int = 1
+    # Accepted for older app versions but ignored: prices come from the pricing engine
+    unit_price: Optional[float] = None
+    total_price: Optional[float] = None
 
 
 
@@ -692,7 +780,52 @@ class BookingServiceResponse(BookingServiceBase):
 
 
 class BookingCreate(BookingBase):
-    booked_services: Optional[List[BookingServiceResponse]]=[]
+    total_price: Optional[float] = None
+    booked_services: Optional[List[BookingServiceCreate]]=[]
+
+
+# ------------------------------
+# Quote Schemas
+# ------------------------------
+
+class QuoteItem(BaseModel):
+    feature_option_id: int
+    quantity: int = Field(1, ge=0)
+
+
+class CartQuoteRequest(BaseModel):
+    service_feature_id: Optional[int] = None
+    items: List[QuoteItem]
+
+
+class BookingQuoteRequest(BaseModel):
+    carts: List[CartQuoteRequest] = Field(..., max_length=100)
+
+
+class QuoteLine(BaseModel):
+    feature_option_id: int
+    label: str
+    area_type: str
+    quantity: int
+    unit_price: float
+    total_price: float
+
+
+class QuoteError(BaseModel):
+    feature_option_id: int
+    detail: str
+
+
+class CartQuote(BaseModel):
+    service_feature_id: Optional[int] = None
+    total_price: float
+    lines: List[QuoteLine]
+    errors: List[QuoteError]
+    valid: bool
+
+
+class BookingQuoteResponse(BaseModel):
+    quotes: List[CartQuote]
 
 
 class BookingUpdate(BaseModel):
@@ -822,6 +955,44 @@ class BookingRequestResponse(BookingRequestBase):
         orm_mode = True
 
 
+class WorkerMatch(BaseModel):
+    worker_id: int
+    name: str
+    score: float
+    rating: float
+    current_load: int
+    distance_km: Optional[float] = None
+    speaks_preferred_language: Optional[bool] = None
+
+
+class NearbyWorker(BaseModel):
+    worker_id: int
+    public_id: str
+    name: Optional[str] = None
+    distance_km: float
+    latitude: float
+    longitude: float
+    average_rating: Optional[float] = None
+
+
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class WorkerFreeSlots(BaseModel):
+    worker_id: int
+    day: date
+    slots: List[FreeSlot]
+
+
+class AvailableWorker(BaseModel):
+    worker_id: int
+    public_id: str
+    name: Optional[str] = None
+    average_rating: Optional[float] = None
+
+
 class PaymentCreateResponse(BaseModel):
     client_secret: str
     payment_intent_id: str
@@ -929,6 +1100,7 @@ class MessageItem(BaseModel):
 class UserSummary(BaseModel):
     name: str
     profilePicture: str | None
+    profilePictureThumb: str | None = None
     rating: float | None
     status: str  # "online" or "last seen X mins ago"
 
@@ -0,0 +1,280 @@
+# storage/__init__.py
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import BinaryIO, FrozenSet, Optional
+from uuid import uuid4
+
+import anyio
+from dotenv import load_dotenv
+from fastapi import File, HTTPException, UploadFile, status
+
+from .backends import LocalStorage, S3Storage, StorageBackend
+from . import images
+
+load_dotenv()
+
+# Uploads are copied and hashed this many bytes at a time
+UPLOAD_CHUNK_BYTES = 256 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+
+# Partially received files; kept outside the public /uploads mount
+UPLOAD_STAGING_DIR = Path(os.getenv("UPLOAD_STAGING_DIR", "tmp/uploads"))
+
+IMAGE_TYPES: FrozenSet[str] = frozenset({"image/jpeg", "image/png", "image/webp"})
+DOCUMENT_TYPES: FrozenSet[str] = IMAGE_TYPES | {"application/pdf"}
+
+# Key prefix for documents that must not be publicly cacheable (KYC proofs)
+PRIVATE_PREFIX = "private"
+SIGNED_URL_TTL_SECONDS = int(os.getenv("SIGNED_URL_TTL_SECONDS", 15 * 60))
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+}
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Detect the file type from its first bytes; the client's Content-Type is not trusted"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+# ==========================
+# BACKEND
+# ==========================
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+
+    if _storage is None:
+        if os.getenv("STORAGE_BACKEND", "local") == "s3":
+            _storage = S3Storage(
+                bucket=os.getenv("S3_BUCKET"),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+                public_url=os.getenv("S3_PUBLIC_URL"),
+                prefix=os.getenv("S3_PREFIX", ""),
+            )
+        else:
+            _storage = LocalStorage(os.getenv("UPLOAD_ROOT", "uploads/objects"))
+    return _storage
+
+
+def set_storage(storage: StorageBackend):
+    """Swap the backend, e.g. for a local stand-in of S3"""
+    global _storage
+    _storage = storage
+
+
+def signed_reference(reference: Optional[str], expires_in: int = SIGNED_URL_TTL_SECONDS) -> Optional[str]:
+    """Turn a stored private reference into an expiring URL; others pass through"""
+    if not reference:
+        return reference
+    storage = get_storage()
+    key = storage.key_for(reference)
+    if key is None or not key.startswith(f"{PRIVATE_PREFIX}/"):
+        return reference
+    return storage.signed_url(key, expires_in)
+
+
+# ==========================
+# STAGING
+# ==========================
+class StagedUpload:
+    """An upload fully written to a staging file, with its SHA-256 known"""
+
+    def __init__(
+        self,
+        path: Path,
+        sha256: str,
+        size: int,
+        content_type: str,
+        filename: Optional[str],
+        private: bool = False,
+    ):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.filename = filename
+        # Private files are only served through signed, expiring URLs
+        self.private = private
+        self.stored: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        # Identical files map to the same key, so each is stored once
+        h = self.sha256
+        key = f"{h[:2]}/{h[2:4]}/{h}{EXTENSIONS[self.content_type]}"
+        return f"{PRIVATE_PREFIX}/{key}" if self.private else key
+
+    def reference(self, storage: Optional[StorageBackend] = None) -> str:
+        """The reference ``commit`` will return, without storing anything yet"""
+        return (storage or get_storage()).url(self.key)
+
+    def commit(self, storage: Optional[StorageBackend] = None) -> str:
+        """Store the file under its content hash and return its reference"""
+        if self.stored is not None:
+            return self.stored
+
+        storage = storage or get_storage()
+        if storage.exists(self.key):
+            self.discard()
+        else:
+            # Private files (KYC documents) are never served as variants
+            if self.content_type in IMAGE_TYPES and images.IMAGE_VARIANTS_ENABLED and not self.private:
+                images.schedule_variants(self._variant_source(), self.key, storage)
+            storage.put_file(str(self.path), self.key, self.content_type)
+        self.stored = storage.url(self.key)
+        return self.stored
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+
+    def _variant_source(self) -> Path:
+        # A second name for the staged bytes that outlives the move into storage
+        source = self.path.with_name(f"{uuid4().hex}{EXTENSIONS[self.content_type]}")
+        try:
+            os.link(self.path, source)
+        except OSError:
+            shutil.copyfile(self.path, source)
+        return source
+
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _check_type(head: bytes, filename: Optional[str], allowed_types: FrozenSet[str]) -> str:
+    content_type = sniff_content_type(head)
+    if content_type not in allowed_types:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"{filename or 'File'} must be one of: {', '.join(sorted(allowed_types))}"
+        )
+    return content_type
+
+
+def _check_size(size: int, filename: Optional[str], max_bytes: int):
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{filename or 'File'} exceeds the {max_bytes // (1024 * 1024)} MB limit"
+        )
+
+
+async def stage_upload(
+    upload: UploadFile,
+    allowed_types: FrozenSet[str] = DOCUMENT_TYPES,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    private: bool = False,
+) -> StagedUpload:
+    """Copy an upload to a staging file in fixed-size chunks, hashing as it goes.
+
+    Disk writes and hashing run on a worker thread one chunk at a time, so the
+    event loop is never blocked on a large file. Raises 415 for disallowed
+    types and 413 once ``max_bytes`` is exceeded.
+    """
+    UPLOAD_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    path = UPLOAD_STAGING_DIR / f"{uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+
+    out = await anyio.to_thread.run_sync(open, path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if content_type is None:
+                content_type = _check_type(chunk, upload.filename, allowed_types)
+            size += len(chunk)
+            _check_size(size, upload.filename, max_bytes)
+            await anyio.to_thread.run_sync(_write_chunk, out, digest, chunk)
+    except BaseException:
+        out.close()
+        path.unlink(missing_ok=True)
+        raise
+    out.close()
+
+    if size == 0:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"{upload.filename or 'File'} is empty")
+
+    return StagedUpload(path, digest.hexdigest(), size, content_type, upload.filename, private)
+
+
+def stage_file(
+    source: BinaryIO,
+    filename: Optional[str],
+    allowed_types: FrozenSet[str] = DOCUMENT_TYPES,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    private: bool = False,
+) -> StagedUpload:
+    """Blocking counterpart of stage_upload() for files that are not request
+    bodies, e.g. members of an import archive. Same checks and errors.
+    """
+    UPLOAD_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    path = UPLOAD_STAGING_DIR / f"{uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+
+    try:
+        with open(path, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if content_type is None:
+                    content_type = _check_type(chunk, filename, allowed_types)
+                size += len(chunk)
+                _check_size(size, filename, max_bytes)
+                _write_chunk(out, digest, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail=f"{filename or 'File'} is empty")
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    return StagedUpload(path, digest.hexdigest(), size, content_type, filename, private)
+
+
+def staged_file(
+    field: str,
+    allowed_types: FrozenSet[str] = DOCUMENT_TYPES,
+    required: bool = False,
+    private: bool = False,
+):
+    """Dependency that stages the multipart file ``field`` before the endpoint runs.
+
+    The endpoint receives a StagedUpload (or None when the optional field is
+    absent) and calls ``commit()`` once its own validation has passed. Staged
+    files that were never committed are removed after the request.
+    """
+    async def dependency(upload: Optional[UploadFile] = File(... if required else None, alias=field)):
+        if upload is None or not upload.filename:
+            yield None
+            return
+        staged = await stage_upload(upload, allowed_types, private=private)
+        try:
+            yield staged
+        finally:
+            if staged.stored is None:
+                staged.discard()
+
+    return dependency
@@ -0,0 +1,124 @@
+# storage/backends.py
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+
+class StorageBackend:
+    """Where committed uploads live. Keys are content-addressed relative paths."""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, local_path: str, key: str, content_type: str):
+        """Move a fully written local file into storage under ``key``"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """Reference saved on the model (path or URL)"""
+        raise NotImplementedError
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        """A URL for ``key`` that stops working after ``expires_in`` seconds"""
+        raise NotImplementedError
+
+    def key_for(self, reference: str) -> Optional[str]:
+        """Inverse of url(): the key for a stored reference, or None if it isn't ours"""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory, served by the /uploads static mount"""
+
+    def __init__(self, root: str = "uploads/objects"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def put_file(self, local_path: str, key: str, content_type: str):
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # Atomic when staging and storage share a filesystem
+            os.replace(local_path, target)
+        except OSError:
+            shutil.move(local_path, target)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def url(self, key: str) -> str:
+        return str(self._path(key))
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        from .serving import signed_query
+
+        return f"{self.url(key)}?{signed_query(self.url(key), expires_in)}"
+
+    def key_for(self, reference: str) -> Optional[str]:
+        prefix = f"{self.root}/"
+        return reference[len(prefix):] if reference.startswith(prefix) else None
+
+
+class S3Storage(StorageBackend):
+    """S3 or any S3-compatible service (MinIO, R2, ...) via boto3"""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        public_url: Optional[str] = None,
+        prefix: str = "",
+    ):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.public_url = (public_url or f"{endpoint_url or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def put_file(self, local_path: str, key: str, content_type: str):
+        self.client.upload_file(
+            local_path, self.bucket, self._key(key),
+            ExtraArgs={"ContentType": content_type},
+        )
+        os.remove(local_path)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{self._key(key)}"
+
+    def signed_url(self, key: str, expires_in: int) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=expires_in,
+        )
+
+    def key_for(self, reference: str) -> Optional[str]:
+        prefix = f"{self.public_url}/{self.prefix + '/' if self.prefix else ''}"
+        return reference[len(prefix):] if reference.startswith(prefix) else None
@@ -0,0 +1,189 @@
+# storage/images.py
+import atexit
+import logging
+import importlib.util
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each variant
+VARIANT_SIZES = {
+    "thumb": 160,
+    "medium": 640,
+}
+# WebP for clients that support it, JPEG as the fallback
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Variants are skipped (originals still served) when Pillow is not installed
+IMAGE_VARIANTS_ENABLED = importlib.util.find_spec("PIL") is not None
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# How long "no variants" is remembered for an image before storage is asked again
+VARIANT_MISS_TTL_SECONDS = float(os.getenv("VARIANT_MISS_TTL_SECONDS", 60))
+# Remembered misses kept before expired ones are dropped
+VARIANT_MISS_MAX_ENTRIES = 10_000
+
+# Stored references look like ".../ab/cd/<sha256>.jpg" (see StagedUpload.key)
+_CONTENT_ADDRESSED = re.compile(r"/(?P<sha>[0-9a-f]{64})\.(?:jpg|png|webp)$")
+
+
+def variant_key(key: str, variant: str, fmt: str) -> str:
+    """``ab/cd/<sha>.jpg`` -> ``ab/cd/<sha>_thumb.webp``"""
+    stem, _ = os.path.splitext(key)
+    return f"{stem}_{variant}.{fmt}"
+
+
+# ==========================
+# WORKER PROCESS
+# ==========================
+def render_variants(source: str) -> List[Tuple[str, str, str]]:
+    """Resize and re-encode one image. Runs in a pool process.
+
+    EXIF orientation is applied to the pixels and all metadata (GPS, device,
+    timestamps) is dropped, since nothing is passed through on save.
+    Returns (variant, format, output path) triples.
+    """
+    from PIL import Image, ImageOps
+
+    stem, _ = os.path.splitext(source)
+    rendered = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        for variant, edge in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            for fmt, (pil_format, options) in VARIANT_FORMATS.items():
+                frame = resized.convert("RGB") if pil_format == "JPEG" else resized
+                path = f"{stem}_{variant}.{fmt}"
+                frame.save(path, pil_format, **options)
+                rendered.append((variant, fmt, path))
+    return rendered
+
+
+# ==========================
+# POOL
+# ==========================
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Variant keys known to exist, so responses don't stat/HEAD storage each time
+_known_variants = set()
+# Image hash -> monotonic expiry, for images without variants (legacy uploads,
+# renders still queued or failed); cleared when a render for the image finishes
+_missing_variants: Dict[str, float] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server process is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def schedule_variants(source: Path, key: str, storage) -> Future:
+    """Render variants of ``source`` in the pool and store them next to ``key``.
+
+    ``source`` is a private copy the job deletes when done, so the caller can
+    move the original into storage immediately.
+    """
+    from observability.metrics import QUEUE_DEPTH
+
+    future = _get_pool().submit(render_variants, str(source))
+    QUEUE_DEPTH.inc("image_variants")
+
+    def store(done: Future):
+        try:
+            for variant, fmt, path in done.result():
+                target = variant_key(key, variant, fmt)
+                storage.put_file(path, target, f"image/{fmt}")
+                _known_variants.add(target)
+        except Exception as exc:
+            logger.warning("Image variants failed for %s: %s", key, exc)
+        finally:
+            _missing_variants.pop(_image_hash(key), None)
+            source.unlink(missing_ok=True)
+            QUEUE_DEPTH.dec("image_variants")
+
+    future.add_done_callback(store)
+    return future
+
+
+# ==========================
+# URLS
+# ==========================
+def _image_hash(key: str) -> str:
+    return os.path.splitext(os.path.basename(key))[0]
+
+
+def _remember_missing(sha: str):
+    now = time.monotonic()
+    if len(_missing_variants) >= VARIANT_MISS_MAX_ENTRIES:
+        for expired in [key for key, expires in _missing_variants.items() if expires <= now]:
+            _missing_variants.pop(expired, None)
+        if len(_missing_variants) >= VARIANT_MISS_MAX_ENTRIES:
+            return
+    _missing_variants[sha] = now + VARIANT_MISS_TTL_SECONDS
+
+
+def variant_urls(reference: Optional[str]) -> Optional[Dict[str, str]]:
+    """Variant URLs for a stored image reference, or None if there are none (yet).
+
+    Keys are ``thumb``/``medium`` (WebP) and ``thumb_jpeg``/``medium_jpeg``.
+    Files saved before the upload pipeline existed have no variants.
+    """
+    if not reference:
+        return None
+    match = _CONTENT_ADDRESSED.search(reference)
+    if not match:
+        return None
+
+    from storage import get_storage
+
+    storage = get_storage()
+    sha = match.group("sha")
+    expires = _missing_variants.get(sha)
+    if expires is not None and expires > time.monotonic():
+        return None
+    key = f"{sha[:2]}/{sha[2:4]}/{sha}.jpg"
+
+    urls = {}
+    for variant in VARIANT_SIZES:
+        for fmt in VARIANT_FORMATS:
+            target = variant_key(key, variant, fmt)
+            if target not in _known_variants:
+                if not storage.exists(target):
+                    _remember_missing(sha)
+                    return None
+                _known_variants.add(target)
+            urls[variant if fmt == "webp" else f"{variant}_jpeg"] = storage.url(target)
+    return urls
+
+
+def variant_url(reference: Optional[str], variant: str = "thumb") -> Optional[str]:
+    """A single WebP variant URL, falling back to the original reference"""
+    urls = variant_urls(reference)
+    return urls.get(variant, reference) if urls else reference
@@ -0,0 +1,133 @@
+# storage/serving.py
+import hashlib
+import hmac
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode
+
+from dotenv import load_dotenv
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+load_dotenv()
+
+# Directory behind the /uploads mount
+UPLOADS_DIR = "uploads"
+UPLOAD_SIGNING_KEY = (os.getenv("UPLOAD_SIGNING_KEY") or os.getenv("SECRET_KEY") or "").encode()
+if not UPLOAD_SIGNING_KEY:
+    # An empty HMAC key would make signed URLs to private files forgeable
+    raise RuntimeError("Set UPLOAD_SIGNING_KEY (or SECRET_KEY) to sign private upload URLs")
+
+# Content-addressed files never change, so clients and CDNs may keep them forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Files saved before content addressing can be overwritten; revalidate via ETag
+MUTABLE_CACHE = "public, no-cache"
+
+_CONTENT_HASH = re.compile(r"(?:^|/)([0-9a-f]{64})(?:_[a-z]+)?\.[a-z0-9]+$")
+
+
+# ==========================
+# SIGNED URLS
+# ==========================
+def _signature(path: str, expires: int) -> str:
+    message = f"{path}\n{expires}".encode()
+    return hmac.new(UPLOAD_SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+
+def _mount_path(reference: str) -> str:
+    """``uploads/objects/x.pdf`` -> ``objects/x.pdf``, as StaticFiles sees it"""
+    return os.path.normpath(os.path.relpath(reference, UPLOADS_DIR))
+
+
+def signed_query(reference: str, expires_in: int) -> str:
+    expires = int(time.time()) + expires_in
+    return urlencode({"expires": expires, "signature": _signature(_mount_path(reference), expires)})
+
+
+def verify_signature(path: str, query_string: str) -> int:
+    """Return the seconds left on a valid signature, or raise 403"""
+    params = parse_qs(query_string)
+    try:
+        expires = int(params["expires"][0])
+        signature = params["signature"][0]
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=403, detail="Signed URL required")
+
+    remaining = expires - int(time.time())
+    if remaining <= 0 or not hmac.compare_digest(signature, _signature(path, expires)):
+        raise HTTPException(status_code=403, detail="Invalid or expired URL")
+    return remaining
+
+
+# ==========================
+# RESPONSES
+# ==========================
+class SendfileResponse(FileResponse):
+    """FileResponse that hands the file to the server when it supports it.
+
+    Servers advertising the ``http.response.pathsend`` or
+    ``http.response.zerocopysend`` ASGI extensions send the file with
+    sendfile(2); otherwise (and for range requests) Starlette streams it.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        plain_get = (
+            scope["method"] == "GET"
+            and self.status_code == 200
+            and "range" not in Headers(scope=scope)
+        )
+        if plain_get and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+        if plain_get and "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+                await send({"type": "http.response.zerocopysend", "file": file.fileno()})
+            return
+        await super().__call__(scope, receive, send)
+
+
+class UploadFiles(StaticFiles):
+    """StaticFiles for /uploads with long-lived caching and signed private files.
+
+    - content-addressed files get ``Cache-Control: immutable`` and their hash
+      as ETag
+    - anything under a ``private/`` directory needs a valid signed URL
+    - ETag/Last-Modified conditional requests and byte ranges are handled
+      by Starlette
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if "private" in Path(path).parts:
+            scope.setdefault("state", {})["signed_ttl"] = verify_signature(
+                path, scope.get("query_string", b"").decode()
+            )
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = SendfileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        signed_ttl = (scope.get("state") or {}).get("signed_ttl")
+        match = _CONTENT_HASH.search(str(full_path))
+        if match:
+            response.headers["etag"] = f'"{match.group(1)}"'
+
+        if signed_ttl is not None:
+            # Never shared caches, and not beyond the URL's own expiry
+            response.headers["cache-control"] = f"private, max-age={signed_ttl}"
+        elif match:
+            response.headers["cache-control"] = IMMUTABLE_CACHE
+        else:
+            response.headers["cache-control"] = MUTABLE_CACHE
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
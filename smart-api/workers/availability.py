@@ -0,0 +1,77 @@
+# workers/availability.py
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# WorkerAvailability.day_of_week has been written both as 0-6 (0=Monday)
+# and as day names ("Monday"), so readers accept either.
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+DEFAULT_START = "06:00"
+DEFAULT_END = "18:00"
+
+
+def parse_day_of_week(value: Union[int, str, None]) -> Optional[int]:
+    """Normalise a stored day of week to 0=Monday ... 6=Sunday"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value if 0 <= value <= 6 else None
+
+    text = str(value).strip().lower()
+    if text.isdigit():
+        day = int(text)
+        return day if 0 <= day <= 6 else None
+    for index, name in enumerate(DAY_NAMES):
+        if name.startswith(text[:3]) and len(text) >= 3:
+            return index
+    return None
+
+
+def parse_clock_minutes(value: Optional[str], default: str = DEFAULT_START) -> int:
+    """Convert "HH:MM" to minutes since midnight, falling back to ``default``"""
+    text = (value or default).strip()
+    try:
+        hours, _, minutes = text.partition(":")
+        total = int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        return parse_clock_minutes(default, default)
+    # "24:00" is a valid end of day
+    return max(0, min(total, 24 * 60))
+
+
+class TimeRange(NamedTuple):
+    """A daily availability window, in minutes since midnight"""
+    start: int
+    end: int
+
+    def contains(self, start: int, end: int) -> bool:
+        return self.start <= start and end <= self.end
+
+    def on(self, day: date) -> Tuple[datetime, datetime]:
+        midnight = datetime.combine(day, time.min)
+        return midnight + timedelta(minutes=self.start), midnight + timedelta(minutes=self.end)
+
+
+DEFAULT_WINDOW = TimeRange(parse_clock_minutes(DEFAULT_START), parse_clock_minutes(DEFAULT_END, DEFAULT_END))
+
+
+def weekly_windows(rows) -> Dict[int, List[TimeRange]]:
+    """Group WorkerAvailability rows into day -> sorted windows.
+
+    Rows need ``day_of_week``, ``start_time`` and ``end_time`` attributes;
+    unparseable days and empty windows are skipped.
+    """
+    windows: Dict[int, List[TimeRange]] = {}
+    for row in rows:
+        day = parse_day_of_week(row.day_of_week)
+        if day is None:
+            continue
+        window = TimeRange(
+            parse_clock_minutes(row.start_time, DEFAULT_START),
+            parse_clock_minutes(row.end_time, DEFAULT_END),
+        )
+        if window.end > window.start:
+            windows.setdefault(day, []).append(window)
+    for day_windows in windows.values():
+        day_windows.sort()
+    return windows
@@ -0,0 +1,547 @@
+# workers/bulk_import.py
+# Bulk worker onboarding from CSV or JSONL. CSV list columns hold JSON, as in
+# the create_worker form; document columns name files inside a zip archive.
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import secrets
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from authentication import get_password_hash
+from models import (
+    Language, ServiceCategory, User, UserRoleEnum, WorkerTypeEnum, Workers,
+    WorkerAvailability, WorkerEmergencyContact, WorkerEquipment, WorkerLanguages, WorkerService,
+)
+from storage import DOCUMENT_TYPES, IMAGE_TYPES, MAX_UPLOAD_BYTES, StagedUpload, stage_file
+from bookings.dispatch import invalidate_dispatch_index
+from workers.geo import invalidate_geo_index, parse_location_pin
+from workers.scheduling import invalidate_schedule_index
+
+# Rows per transaction; each batch is sent as multi-row INSERTs per table
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+MAX_IMPORT_ROWS = int(os.getenv("MAX_IMPORT_ROWS", 50000))
+# Archive members are read, hashed and stored on this many threads
+IMPORT_DOCUMENT_WORKERS = int(os.getenv("IMPORT_DOCUMENT_WORKERS", min(8, (os.cpu_count() or 2) * 2)))
+# Keeps "WHERE email IN (...)" under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+# Scalar columns accepted from the file, copied onto Workers as given
+WORKER_FIELDS = (
+    "first_name", "last_name", "organization_name", "phone_number", "address",
+    "national_id_number", "good_conduct_number", "company_registration_number",
+    "company_hotline_number", "location_pin", "mpesa_number", "bank_name",
+    "bank_account_name", "bank_account_number",
+)
+
+# Document columns name a file inside the archive: column -> (allowed types, private)
+DOCUMENT_FIELDS = {
+    "profile_picture": (IMAGE_TYPES, False),
+    "national_id_front": (DOCUMENT_TYPES, True),
+    "national_id_back": (DOCUMENT_TYPES, True),
+    "good_conduct_proof": (DOCUMENT_TYPES, True),
+}
+
+# JSON list columns, same shape as the create_worker form fields
+LIST_FIELDS = ("emergency_contacts", "equipments", "services", "availabilities", "languages")
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_TIME = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+_TRUE = {"1", "true", "yes", "y"}
+
+
+class RowError(Exception):
+    def __init__(self, field: Optional[str], detail: str):
+        super().__init__(detail)
+        self.field = field
+        self.detail = detail
+
+
+class ImportRow:
+    """One validated worker with its child rows and document references"""
+
+    __slots__ = ("number", "email", "user_id", "worker", "children", "documents")
+
+    def __init__(self, number: int, email: str):
+        self.number = number
+        self.email = email
+        self.user_id: Optional[int] = None
+        self.worker: Dict[str, Any] = {}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        # column -> archive member name
+        self.documents: Dict[str, str] = {}
+
+
+# ==========================
+# READING
+# ==========================
+def read_rows(source: BinaryIO, filename: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, dict) pairs from a CSV or JSONL file.
+
+    Lines that are not valid JSON objects yield an error string instead of a
+    dict, so they land in the report rather than aborting the import.
+    """
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, f"Invalid JSON: {exc.msg}"
+                continue
+            yield number, record if isinstance(record, dict) else "Each line must be a JSON object"
+    else:
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            yield number, {key.strip(): value for key, value in record.items() if key}
+    text.detach()
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in _TRUE
+
+
+def _int(value: Any, field: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(field, f"{field} must be an integer")
+
+
+def _list(value: Any, field: str) -> List[Dict[str, Any]]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            raise RowError(field, f"{field} must be a JSON list")
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise RowError(field, f"{field} must be a list of objects")
+    return value
+
+
+# ==========================
+# VALIDATION
+# ==========================
+class Validator:
+    """Checks every row before anything is written.
+
+    Reference data (categories, languages, organizations, existing accounts)
+    is loaded once, so validation costs a handful of queries regardless of
+    the number of rows.
+    """
+
+    def __init__(self, db: Session, archive: Optional[zipfile.ZipFile], organization_id: Optional[int]):
+        self.db = db
+        self.archive_members = set(archive.namelist()) if archive else None
+        self.organization_id = organization_id
+        self.category_ids = {category_id for (category_id,) in db.query(ServiceCategory.id)}
+        self.language_ids = {language_id for (language_id,) in db.query(Language.id)}
+        self.organization_ids = {
+            worker_id for (worker_id,) in db.query(Workers.id).filter(Workers.worker_type == WorkerTypeEnum.organization.value)
+        }
+        self.seen_emails = set()
+
+    def row(self, number: int, record: Dict[str, Any]) -> ImportRow:
+        email = _text(record.get("email")) or ""
+        if not _EMAIL.match(email):
+            raise RowError("email", "A valid email is required")
+        if email.lower() in self.seen_emails:
+            raise RowError("email", "Duplicate email in file")
+        self.seen_emails.add(email.lower())
+
+        row = ImportRow(number, email)
+        worker = {field: _text(record.get(field)) for field in WORKER_FIELDS}
+
+        worker_type = _text(record.get("worker_type")) or WorkerTypeEnum.individual.value
+        if worker_type not in ("individual", "organization"):
+            raise RowError("worker_type", "Invalid worker type")
+        if worker_type == "individual" and not (worker["first_name"] and worker["last_name"] and worker["national_id_number"]):
+            raise RowError("first_name", "First name, last name and national ID number are required for individual workers")
+        if worker_type == "organization" and not (
+            worker["organization_name"] and worker["company_registration_number"] and worker["company_hotline_number"]
+        ):
+            raise RowError("organization_name", "Organization name, company registration number, and company hotline number are required for worker organization")
+        for field in ("phone_number", "mpesa_number", "location_pin"):
+            if not worker[field]:
+                raise RowError(field, f"{field} is required")
+        if not _flag(record.get("agreement_accepted")):
+            raise RowError("agreement_accepted", "The agreement must be accepted")
+
+        organization_id = _int(record.get("organization_id"), "organization_id") or self.organization_id
+        if organization_id is not None and organization_id not in self.organization_ids:
+            raise RowError("organization_id", f"Organization {organization_id} not found")
+
+        # Core inserts skip the ORM hook that fills these in (see workers/geo.py)
+        point = parse_location_pin(worker["location_pin"])
+        worker["latitude"], worker["longitude"] = point or (None, None)
+        worker.update(worker_type=worker_type, organization_id=organization_id, agreement_accepted=True)
+        row.worker = worker
+
+        for field in LIST_FIELDS:
+            row.children[field] = getattr(self, f"_{field}")(_list(record.get(field), field))
+
+        for field in DOCUMENT_FIELDS:
+            # Every row needs the same keys for a multi-row INSERT; set on commit
+            worker[field] = None
+            name = _text(record.get(field))
+            if not name:
+                continue
+            if self.archive_members is None:
+                raise RowError(field, f"{field} names a document but no archive was uploaded")
+            if name not in self.archive_members:
+                raise RowError(field, f"{name} is not in the documents archive")
+            row.documents[field] = name
+        return row
+
+    def _emergency_contacts(self, items):
+        contacts = []
+        for c in items:
+            if not _text(c.get("name")) or not _text(c.get("phone_number")):
+                raise RowError("emergency_contacts", "Each emergency contact needs a name and phone_number")
+            contacts.append({
+                "name": _text(c.get("name")),
+                "phone_number": _text(c.get("phone_number")),
+                "relationship_to_worker": _text(c.get("relationship") or c.get("relationship_to_worker")),
+            })
+        return contacts
+
+    def _equipments(self, items):
+        equipments = []
+        for e in items:
+            if not _text(e.get("equipment_name")):
+                raise RowError("equipments", "Each equipment needs an equipment_name")
+            equipments.append({
+                "equipment_name": _text(e.get("equipment_name")),
+                "has_equipment": _flag(e.get("has_equipment", True)),
+            })
+        return equipments
+
+    def _services(self, items):
+        services = []
+        for s in items:
+            category_id = _int(s.get("category_id"), "services")
+            if category_id not in self.category_ids:
+                raise RowError("services", f"Service category {s.get('category_id')} not found")
+            services.append({
+                "category_id": category_id,
+                "experience_years": _int(s.get("experience_years"), "services") or 0,
+            })
+        return services
+
+    def _availabilities(self, items):
+        availabilities = []
+        for a in items:
+            day = _int(a.get("day_of_week"), "availabilities")
+            if day is None or not 0 <= day <= 6:
+                raise RowError("availabilities", "day_of_week must be 0 (Monday) to 6 (Sunday)")
+            start_time = _text(a.get("start_time")) or "06:00"
+            end_time = _text(a.get("end_time")) or "18:00"
+            if not (_TIME.match(start_time) and _TIME.match(end_time)) or start_time >= end_time:
+                raise RowError("availabilities", "start_time and end_time must be HH:MM with start before end")
+            availabilities.append({"day_of_week": day, "start_time": start_time, "end_time": end_time})
+        return availabilities
+
+    def _languages(self, items):
+        languages = []
+        for item in items:
+            language_id = _int(item.get("language_id"), "languages")
+            if language_id not in self.language_ids:
+                raise RowError("languages", f"Language {item.get('language_id')} not found")
+            languages.append({"language_id": language_id})
+        return languages
+
+    def attach_accounts(self, rows: List[ImportRow]) -> List[Tuple[ImportRow, RowError]]:
+        """Link rows to existing users by email; reject users that are already workers.
+
+        Emails match case-insensitively, as duplicates within the file do.
+        """
+        by_email = {row.email.lower(): row for row in rows}
+        emails = list(by_email)
+        rejected = []
+        for start in range(0, len(emails), LOOKUP_CHUNK):
+            chunk = emails[start:start + LOOKUP_CHUNK]
+            existing = (
+                self.db.query(User.id, User.email, Workers.id)
+                .outerjoin(Workers, Workers.user_id == User.id)
+                .filter(func.lower(User.email).in_(chunk))
+            )
+            for user_id, email, worker_id in existing:
+                row = by_email[email.lower()]
+                if worker_id is not None:
+                    rejected.append((row, RowError("email", "Worker profile already exists for this user")))
+                else:
+                    row.user_id = user_id
+        return rejected
+
+
+# ==========================
+# DOCUMENTS
+# ==========================
+def stage_documents(
+    archive: zipfile.ZipFile,
+    rows: List[ImportRow],
+) -> Tuple[Dict[Tuple[str, bool], StagedUpload], Dict[Tuple[str, bool], str]]:
+    """Read, type-check and hash every referenced archive member in parallel.
+
+    A member used by several rows (or columns with the same privacy) is
+    staged once. Returns staged files and errors keyed by (member, private).
+    """
+    wanted = {}
+    for row in rows:
+        for field, name in row.documents.items():
+            allowed, private = DOCUMENT_FIELDS[field]
+            # A member referenced as both image and document is checked against the stricter set
+            key = (name, private)
+            wanted[key] = wanted[key] & allowed if key in wanted else allowed
+
+    def stage(item):
+        (name, private), allowed = item
+        info = archive.getinfo(name)
+        try:
+            if info.file_size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"{name} exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
+            with archive.open(info) as member:
+                return (name, private), stage_file(member, name, allowed, private=private), None
+        except HTTPException as exc:
+            return (name, private), None, exc.detail
+        except (zipfile.BadZipFile, OSError) as exc:
+            return (name, private), None, f"{name} could not be read: {exc}"
+
+    staged, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=IMPORT_DOCUMENT_WORKERS) as pool:
+        for key, upload, error in pool.map(stage, wanted.items()):
+            if upload is not None:
+                staged[key] = upload
+            else:
+                errors[key] = error
+    return staged, errors
+
+
+# ==========================
+# INSERTS
+# ==========================
+def _insert_batch(db: Session, batch: List[ImportRow], password_hash: str):
+    # Executemany form of insert(): compiled once and sent as multi-row
+    # INSERT ... VALUES (SQLAlchemy "insertmanyvalues"), with RETURNING in
+    # parameter order so generated ids line up with the batch.
+    new_accounts = [row for row in batch if row.user_id is None]
+    if new_accounts:
+        created = db.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [
+                {"email": row.email, "hashed_password": password_hash, "role": UserRoleEnum.worker.value}
+                for row in new_accounts
+            ],
+        )
+        for row, user_id in zip(new_accounts, created.scalars()):
+            row.user_id = user_id
+
+    created = db.execute(
+        insert(Workers).returning(Workers.id, sort_by_parameter_order=True),
+        [{**row.worker, "user_id": row.user_id} for row in batch],
+    )
+    worker_ids = list(created.scalars())
+
+    for field, model in (
+        ("emergency_contacts", WorkerEmergencyContact),
+        ("equipments", WorkerEquipment),
+        ("services", WorkerService),
+        ("availabilities", WorkerAvailability),
+        ("languages", WorkerLanguages),
+    ):
+        values = [
+            {**item, "worker_id": worker_id}
+            for row, worker_id in zip(batch, worker_ids)
+            for item in row.children[field]
+        ]
+        if values:
+            db.execute(insert(model), values)
+
+
+def import_workers(
+    db: Session,
+    source: BinaryIO,
+    filename: str,
+    documents: Optional[BinaryIO] = None,
+    organization_id: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Validate and import a worker file, returning a per-row report.
+
+    Every row is validated (including its documents) before the first insert.
+    Valid rows are then written in batches of IMPORT_BATCH_SIZE, one
+    transaction each; a failing batch is rolled back and reported without
+    affecting the others. Accounts created here get a random password nobody
+    knows, so workers must have one set before they can log in.
+    """
+    started = time.monotonic()
+    errors: Dict[int, Dict[str, Any]] = {}
+
+    def reject(number: int, error: RowError):
+        errors.setdefault(number, {"row": number, "field": error.field, "detail": error.detail})
+
+    try:
+        archive = zipfile.ZipFile(documents) if documents is not None else None
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Documents must be a zip archive")
+
+    try:
+        validator = Validator(db, archive, organization_id)
+        rows: List[ImportRow] = []
+        total = 0
+        for number, record in read_rows(source, filename):
+            total += 1
+            if total > MAX_IMPORT_ROWS:
+                raise HTTPException(status_code=413, detail=f"Imports are limited to {MAX_IMPORT_ROWS} rows")
+            if isinstance(record, str):
+                reject(number, RowError(None, record))
+                continue
+            try:
+                rows.append(validator.row(number, record))
+            except RowError as exc:
+                reject(number, exc)
+
+        for row, error in validator.attach_accounts(rows):
+            reject(row.number, error)
+        rows = [row for row in rows if row.number not in errors]
+
+        staged: Dict[Tuple[str, bool], StagedUpload] = {}
+        if archive is not None and rows:
+            staged, document_errors = stage_documents(archive, rows)
+            for row in rows:
+                for field, name in row.documents.items():
+                    key = (name, DOCUMENT_FIELDS[field][1])
+                    if key in document_errors:
+                        reject(row.number, RowError(field, document_errors[key]))
+            rows = [row for row in rows if row.number not in errors]
+    finally:
+        if archive is not None:
+            archive.close()
+
+    imported = 0
+    stored = set()
+    try:
+        if not dry_run and rows:
+            # One hash for the whole import: bcrypt per row would dominate the run time
+            password_hash = get_password_hash(secrets.token_urlsafe(32))
+            for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+                batch = rows[start:start + IMPORT_BATCH_SIZE]
+                batch_documents = set()
+                for row in batch:
+                    for field, name in row.documents.items():
+                        key = (name, DOCUMENT_FIELDS[field][1])
+                        row.worker[field] = staged[key].reference()
+                        batch_documents.add(key)
+                try:
+                    _insert_batch(db, batch, password_hash)
+                    # Files go to storage only once their rows are in; a failed
+                    # batch leaves them staged and they are discarded below
+                    for key in batch_documents:
+                        staged[key].commit()
+                    db.commit()
+                    stored |= batch_documents
+                    imported += len(batch)
+                except Exception as exc:
+                    db.rollback()
+                    detail = str(getattr(exc, "orig", None) or exc)
+                    for row in batch:
+                        reject(row.number, RowError(None, f"Batch insert failed: {detail}"))
+    finally:
+        for upload in staged.values():
+            if upload.stored is None:
+                upload.discard()
+
+    if imported:
+        # These caches only follow ORM events, which bulk inserts don't emit
+        invalidate_dispatch_index()
+        invalidate_schedule_index()
+        invalidate_geo_index()
+
+    return {
+        "total_rows": total,
+        "imported": imported,
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "documents_stored": len(stored),
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+        "errors": sorted(errors.values(), key=lambda error: error["row"]),
+    }
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m workers.bulk_import workers.csv --documents docs.zip [--organization-id 7] [--dry-run]"""
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import workers from CSV or JSONL")
+    parser.add_argument("rows", help="CSV or JSONL (.jsonl/.ndjson) file, one worker per row")
+    parser.add_argument("--documents", help="Zip archive holding the files named in document columns")
+    parser.add_argument("--organization-id", type=int, help="Agency (organization worker id) for rows without one")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+    parser.add_argument("--report", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.rows, "rb") as source:
+            documents = open(args.documents, "rb") if args.documents else None
+            try:
+                report = import_workers(
+                    db, source, os.path.basename(args.rows), documents,
+                    organization_id=args.organization_id, dry_run=args.dry_run,
+                )
+            finally:
+                if documents:
+                    documents.close()
+    except HTTPException as exc:
+        print(f"Import failed: {exc.detail}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    print(
+        f"Imported {report['imported']} of {report['total_rows']} rows "
+        f"({report['failed']} failed) in {report['elapsed_seconds']}s",
+        file=sys.stderr,
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# workers/geo.py
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from models import Booking, Workers, WorkerService
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Matches "lat,lon" pairs as typed by users or embedded in map links,
+# e.g. "-1.2921, 36.8219", "https://maps.google.com/?q=-1.29,36.82" or "@-1.29,36.82,15z"
+_COORD_PAIR = re.compile(r"(-?\d{1,3}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)")
+
+
+def parse_location_pin(pin: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Extract (latitude, longitude) from a free-form location pin, or None"""
+    if not pin:
+        return None
+
+    for lat_text, lon_text in _COORD_PAIR.findall(pin):
+        lat, lon = float(lat_text), float(lon_text)
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon
+    return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ==========================
+# COORDINATES ON SAVE
+# ==========================
+def _sync_coordinates(target, text_attr: str):
+    state = inspect(target)
+    changed = state.attrs[text_attr].history.has_changes()
+    if target.latitude is not None and not changed:
+        return
+
+    point = parse_location_pin(getattr(target, text_attr))
+    if point:
+        target.latitude, target.longitude = point
+    elif changed:
+        target.latitude = target.longitude = None
+
+
+@event.listens_for(Workers, "before_insert")
+@event.listens_for(Workers, "before_update")
+def _worker_coordinates(mapper, connection, target):
+    _sync_coordinates(target, "location_pin")
+
+
+@event.listens_for(Booking, "before_insert")
+@event.listens_for(Booking, "before_update")
+def _booking_coordinates(mapper, connection, target):
+    _sync_coordinates(target, "location")
+
+
+# ==========================
+# SPATIAL INDEX
+# ==========================
+# Grid cell size in degrees (~5.5 km of latitude). Radius queries visit only
+# the cells overlapping the search circle's bounding box.
+CELL_DEGREES = 0.05
+KM_PER_DEGREE = 111.32
+# Full rebuild interval; between rebuilds the grid is updated row by row
+GEO_INDEX_TTL_SECONDS = 3600
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class WorkerGeoIndex:
+    """Uniform grid over worker coordinates with per-worker service categories"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self.points: Dict[int, Tuple[float, float]] = {}
+        self.categories: Dict[int, Set[int]] = defaultdict(set)
+        self.built_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, db: Session) -> "WorkerGeoIndex":
+        index = cls()
+        for worker_id, lat, lon, pin in db.query(
+            Workers.id, Workers.latitude, Workers.longitude, Workers.location_pin
+        ):
+            # Rows saved before coordinates were stored still carry a parseable pin
+            point = (lat, lon) if lat is not None and lon is not None else parse_location_pin(pin)
+            if point:
+                index.upsert(worker_id, *point)
+
+        for worker_id, category_id in db.query(WorkerService.worker_id, WorkerService.category_id):
+            index.categories[worker_id].add(category_id)
+        return index
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.built_at < GEO_INDEX_TTL_SECONDS
+
+    def upsert(self, worker_id: int, lat: Optional[float], lon: Optional[float]):
+        with self.lock:
+            self.remove(worker_id, keep_categories=True)
+            if lat is None or lon is None:
+                return
+            self.points[worker_id] = (lat, lon)
+            self.cells[_cell(lat, lon)].add(worker_id)
+
+    def remove(self, worker_id: int, keep_categories: bool = False):
+        with self.lock:
+            point = self.points.pop(worker_id, None)
+            if point:
+                cell = _cell(*point)
+                self.cells[cell].discard(worker_id)
+                if not self.cells[cell]:
+                    del self.cells[cell]
+            if not keep_categories:
+                self.categories.pop(worker_id, None)
+
+    def nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        category_id: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Tuple[float, int]]:
+        """Return (distance_km, worker_id) pairs within radius, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        min_i, min_j = _cell(lat - dlat, lon - dlon)
+        max_i, max_j = _cell(lat + dlat, lon + dlon)
+
+        found = []
+        with self.lock:
+            for i in range(min_i, max_i + 1):
+                for j in range(min_j, max_j + 1):
+                    for worker_id in self.cells.get((i, j), ()):
+                        if category_id is not None and category_id not in self.categories.get(worker_id, ()):
+                            continue
+                        w_lat, w_lon = self.points[worker_id]
+                        distance = haversine_km(lat, lon, w_lat, w_lon)
+                        if distance <= radius_km:
+                            found.append((distance, worker_id))
+
+        return heapq.nsmallest(limit, found)
+
+
+_geo_index: Optional[WorkerGeoIndex] = None
+_geo_index_lock = threading.Lock()
+
+
+def get_geo_index(db: Session) -> WorkerGeoIndex:
+    global _geo_index
+
+    with _geo_index_lock:
+        if _geo_index is None or not _geo_index.is_fresh():
+            _geo_index = WorkerGeoIndex.build(db)
+        return _geo_index
+
+
+def invalidate_geo_index(*args):
+    """Drop the index after writes that bypass the ORM (bulk Core inserts)"""
+    global _geo_index
+    _geo_index = None
+
+
+# Keep a built index in step with ORM writes instead of rebuilding it. Changes
+# are queued on the session and applied only once the transaction commits,
+# so rolled back writes never leave phantom points or categories behind.
+def _queue_geo_change(target, *change):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("geo_changes", []).append(change)
+
+
+@event.listens_for(Workers, "after_insert")
+@event.listens_for(Workers, "after_update")
+def _index_worker(mapper, connection, target):
+    _queue_geo_change(target, "upsert", target.id, target.latitude, target.longitude)
+
+
+@event.listens_for(Workers, "after_delete")
+def _unindex_worker(mapper, connection, target):
+    _queue_geo_change(target, "remove", target.id)
+
+
+def _previous(target, attr: str):
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+@event.listens_for(WorkerService, "after_insert")
+def _index_worker_service(mapper, connection, target):
+    _queue_geo_change(target, "add_category", target.worker_id, target.category_id)
+
+
+@event.listens_for(WorkerService, "after_update")
+def _reindex_worker_service(mapper, connection, target):
+    old = (_previous(target, "worker_id"), _previous(target, "category_id"))
+    if old != (target.worker_id, target.category_id):
+        _queue_geo_change(target, "discard_category", *old)
+        _queue_geo_change(target, "add_category", target.worker_id, target.category_id)
+
+
+@event.listens_for(WorkerService, "after_delete")
+def _unindex_worker_service(mapper, connection, target):
+    _queue_geo_change(target, "discard_category", _previous(target, "worker_id"), _previous(target, "category_id"))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_geo_changes(session):
+    pending = session.info.pop("geo_changes", None)
+    index = _geo_index
+    if not pending or index is None:
+        return
+    with index.lock:
+        for action, worker_id, *args in pending:
+            if action == "upsert":
+                index.upsert(worker_id, *args)
+            elif action == "remove":
+                index.remove(worker_id)
+            elif action == "add_category":
+                index.categories[worker_id].add(args[0])
+            else:
+                index.categories[worker_id].discard(args[0])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_geo_changes(session):
+    session.info.pop("geo_changes", None)
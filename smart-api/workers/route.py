@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, Form, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from sqlalchemy import func
-from uuid import uuid4
-import shutil
-import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 from database import get_db
 from models import (
     Workers, WorkerEmergencyContact, WorkerEquipment,WorkerPayments,
-    WorkerService, WorkerAvailability, WorkerRating, Notification, User, WorkerLanguages,Booking
+    WorkerService, WorkerAvailability, WorkerRating, Booking
 )
 
-from bookings.route import get_worker_job_counts,get_worker_bookings
+from bookings.route import get_worker_bookings
 from notifications.route import get_worker_notifications
+from workers.geo import get_geo_index
+from storage import StagedUpload, staged_file, IMAGE_TYPES
+from workers.scheduling import DEFAULT_JOB_MINUTES, get_schedule_index
+from bookings.dispatch import free_workers
+from outbox import PAYMENT_SUCCEEDED, record
+from responses import ORJSONResponse
+from workers.rows import WORKERS, rating_rows, worker_rows
+from fieldsets import Selection, sparse_fields
+from idempotency import idempotent
+from ratelimit import ANALYTICS_PER_ROUTE, ANALYTICS_PER_USER, rate_limit
 
 from schemas import (
     EarningsSummaryResponse,
@@ -27,15 +34,14 @@ from schemas import (
     WorkerResponse,
     WorkerEmergencyContactCreate,WorkerEquipmentCreate,
     WorkerRatingResponse,
-    WorkerReviewStatsResponse,EarningsChartItem,WorkerReviewRatingResponse
+    WorkerReviewStatsResponse,EarningsChartItem,WorkerReviewRatingResponse,
+    NearbyWorker, WorkerFreeSlots, AvailableWorker
 )
 router = APIRouter(prefix="/workers", tags=["workers"])
 
 
 
 
-UPLOAD_DIR = "uploads/workers"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 # ------------------ CREATE WORKER ------------------
@@ -65,12 +71,12 @@ def create_worker(
     agreement_accepted: bool = Form(False),
     location_pin: Optional[str] = Form(None),
 
-    profile_picture: Optional[UploadFile] = File(None),
+    profile_picture: Optional[StagedUpload] = Depends(staged_file("profile_picture", IMAGE_TYPES)),
     # national_id_proof: Optional[UploadFile] = File(None),
-    national_id_front: Optional[UploadFile] = File(None),
-    national_id_back: Optional[UploadFile] = File(None),
+    national_id_front: Optional[StagedUpload] = Depends(staged_file("national_id_front", private=True)),
+    national_id_back: Optional[StagedUpload] = Depends(staged_file("national_id_back", private=True)),
 
-    good_conduct_proof: Optional[UploadFile] = File(None),
+    good_conduct_proof: Optional[StagedUpload] = Depends(staged_file("good_conduct_proof", private=True)),
 
     # --- Emergency contacts (comma separated JSON-like strings) ---
     emergency_contacts: Optional[str] = Form(None),  
@@ -88,9 +94,6 @@ def create_worker(
     availabilities: Optional[str] = Form(None),  
     # example: '[{"day_of_week":0,"start_time":"08:00","end_time":"17:00"}]'
 ):
-    print("here is availabilities:",)
-    # availabilities)
-
     if worker_type not in ["individual", "organization"]:
         raise HTTPException(status_code=400, detail="Invalid worker type")
     if worker_type == "individual" and (not first_name or not last_name or not national_id_number):
@@ -111,14 +114,9 @@ def create_worker(
 
     import json
 
-    # Save files if uploaded
-    def save_file(upload: UploadFile, folder: str):
-        if not upload:
-            return None
-        file_path = os.path.join(UPLOAD_DIR, f"{folder}_{uuid4()}_{upload.filename}")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload.file, buffer)
-        return file_path
+    # Store files if uploaded (already received and hashed, see storage/)
+    def save_file(upload: Optional[StagedUpload]):
+        return upload.commit() if upload else None
 
     worker = Workers(
         user_id=user_id,
@@ -135,11 +133,11 @@ def create_worker(
         bank_account_number=bank_account_number,
         national_id_number=national_id_number,
         agreement_accepted=agreement_accepted,
-        profile_picture=save_file(profile_picture, "profile") if profile_picture else None,
+        profile_picture=save_file(profile_picture),
         # national_id_proof=save_file(national_id_proof, "id") if national_id_proof else None,
-        national_id_front=save_file(national_id_front, "id_front") if national_id_front else None,
-        national_id_back=save_file(national_id_back, "id_back") if national_id_back else None,
-        good_conduct_proof=save_file(good_conduct_proof, "good_conduct") if good_conduct_proof else None,
+        national_id_front=save_file(national_id_front),
+        national_id_back=save_file(national_id_back),
+        good_conduct_proof=save_file(good_conduct_proof),
     )
 
     db.add(worker)
@@ -246,12 +244,96 @@ def add_rating(worker_id: int, Workerrating: WorkerRatingCreate, db: Session = D
 
 
 
+# ==========================
+#  Nearby Workers
+# ==========================
+@router.get("/nearby", response_model=List[NearbyWorker])
+def get_nearby_workers(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=100),
+    category_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    index = get_geo_index(db)
+    hits = index.nearby(lat, lon, radius_km, category_id=category_id, limit=limit)
+    if not hits:
+        return []
+
+    rows = {
+        w.id: w
+        for w in db.query(
+            Workers.id, Workers.public_id, Workers.first_name, Workers.last_name,
+            Workers.organization_name, Workers.worker_type, Workers.average_rating,
+        ).filter(Workers.id.in_([worker_id for _, worker_id in hits]))
+    }
+
+    result = []
+    for distance, worker_id in hits:
+        w = rows.get(worker_id)
+        if w is None:
+            continue
+        w_lat, w_lon = index.points.get(worker_id, (lat, lon))
+        result.append({
+            "worker_id": w.id,
+            "public_id": w.public_id,
+            "name": (
+                f"{w.first_name} {w.last_name}"
+                if w.worker_type == "individual"
+                else w.organization_name
+            ),
+            "distance_km": round(distance, 3),
+            "latitude": w_lat,
+            "longitude": w_lon,
+            "average_rating": w.average_rating,
+        })
+    return result
+
+
+# ==========================
+#  Available Workers
+# ==========================
+@router.get("/available", response_model=List[AvailableWorker])
+def get_available_workers(
+    at: datetime = Query(...),
+    category_id: Optional[int] = Query(None),
+    duration_minutes: int = Query(DEFAULT_JOB_MINUTES, ge=15, le=24 * 60),
+    db: Session = Depends(get_db)
+):
+    """Workers offering the category who are free for the whole visit starting at ``at``"""
+    worker_ids = free_workers(db, category_id, at, duration_minutes)
+    if not worker_ids:
+        return []
+
+    rows = db.query(
+        Workers.id, Workers.public_id, Workers.first_name, Workers.last_name,
+        Workers.organization_name, Workers.worker_type, Workers.average_rating,
+    ).filter(Workers.id.in_(worker_ids)).order_by(Workers.id)
+
+    return [
+        {
+            "worker_id": w.id,
+            "public_id": w.public_id,
+            "name": (
+                f"{w.first_name} {w.last_name}"
+                if w.worker_type == "individual"
+                else w.organization_name
+            ),
+            "average_rating": w.average_rating,
+        }
+        for w in rows
+    ]
+
+
 # ==========================
 #  Get All Workers
 # ==========================
 @router.get("/", response_model=List[WorkerResponse])
-def list_workers(db: Session = Depends(get_db)):
-    return db.query(Workers).all()
+def list_workers(
+    selection: Selection = Depends(sparse_fields(WORKERS, omit=("job_stats",))), db: Session = Depends(get_db)
+):
+    return ORJSONResponse(worker_rows(db, selection=selection))
 
 
 # ==========================
@@ -290,41 +372,50 @@ def delete_worker(worker_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{worker_id}", response_model=WorkerResponse)
-def get_full_worker(worker_id: int, db: Session = Depends(get_db)):
-    worker = (
-        db.query(Workers)
-        .options(
-            joinedload(Workers.emergency_contacts),
-            joinedload(Workers.equipments),
-            joinedload(Workers.services),
-            joinedload(Workers.availabilities),
-            joinedload(Workers.ratings),
-            joinedload(Workers.languages).joinedload(WorkerLanguages.language),
-            joinedload(Workers.user).joinedload(User.notifications).joinedload(Notification.user),
-            # joinedload(User.notifications).joinedload(Notification.user),
-        )
-        .filter(Workers.id == worker_id)
-        .first()
-    )
-
-    if not worker:
+def get_full_worker(
+    worker_id: int, selection: Selection = Depends(sparse_fields(WORKERS)), db: Session = Depends(get_db)
+):
+    workers = worker_rows(db, Workers.id == worker_id, selection=selection)
+    if not workers:
         raise HTTPException(status_code=404, detail="Worker not found")
-    
-    # Get job stats
-    job_stats = get_worker_job_counts(worker_id, db)
-    worker.job_stats = job_stats
-
-    return worker
+    return ORJSONResponse(workers[0])
 
 
 #### get worker jobs ####
 
 @router.get("/{worker_id}/jobs")
 def grouped_worker_jobs(worker_id: int, db: Session = Depends(get_db)):
-    print("Fetching jobs for worker:", worker_id)
     return get_worker_bookings(worker_id, db)
 
 
+#### worker free slots ####
+
+@router.get("/{worker_id}/free-slots", response_model=List[WorkerFreeSlots])
+def get_worker_free_slots(
+    worker_id: int,
+    start_date: Optional[date] = Query(None),
+    days: int = Query(7, ge=1, le=31),
+    duration_minutes: int = Query(DEFAULT_JOB_MINUTES, ge=15, le=24 * 60),
+    db: Session = Depends(get_db)
+):
+    """Open time per day: declared availability minus existing bookings"""
+    if not db.query(Workers.id).filter(Workers.id == worker_id).first():
+        raise HTTPException(status_code=404, detail="Worker not found")
+
+    index = get_schedule_index(db)
+    first_day = start_date or datetime.utcnow().date()
+    result = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        slots = index.free_slots(worker_id, day, duration_minutes)
+        result.append({
+            "worker_id": worker_id,
+            "day": day,
+            "slots": [{"start": start, "end": end} for start, end in slots],
+        })
+    return result
+
+
     ##### Worker equipments #####
 
 #UPLOAD_DIR = "static/equipment_images"
@@ -336,7 +427,7 @@ def add_worker_equipment(
     has_equipment: bool = Form(True),
     equipment_description: str = Form(None),
     equipment_status: str = Form(None),
-    equipment_image: UploadFile = File(None),
+    equipment_image: Optional[StagedUpload] = Depends(staged_file("equipment_image", IMAGE_TYPES)),
     db: Session = Depends(get_db)
 ):
     worker = db.query(Workers).filter(Workers.id == worker_id).first()
@@ -350,14 +441,7 @@ def add_worker_equipment(
         raise HTTPException(status_code=404, detail="Worker not found")
     
 
-    image_path = None
-    if equipment_image:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        filename = f"{uuid4()}_{equipment_image.filename}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(equipment_image.file, buffer)
-        image_path = file_path
+    image_path = equipment_image.commit() if equipment_image else None
 
     db_equipment = WorkerEquipment(
         worker_id=worker.id,
@@ -399,14 +483,9 @@ def delete_worker_equipment(equipment_id: int, db: Session = Depends(get_db)):
 #         raise HTTPException(status_code=404, detail="Worker not found")
 #     reviews= db.query(WorkerRating).filter(WorkerRating.worker_id == worker_id).all()
 #     return reviews
-from sqlalchemy.orm import selectinload
 @router.get("/{worker_id}/reviews", response_model=List[WorkerRatingResponse])
 def get_worker_ratings(worker_id: int, db: Session = Depends(get_db)):
-    ratings = db.query(WorkerRating).options(
-        selectinload(WorkerRating.booking).selectinload(Booking.client)
-    ).filter(WorkerRating.worker_id == worker_id).all()
-
-    return ratings
+    return ORJSONResponse(rating_rows(db, worker_id))
     
 
 @router.get(
@@ -498,6 +577,7 @@ def notifications_getter(worker_id: int, db: Session = Depends(get_db)):
 
 ######make worker payments
 @router.post("/{worker_id}/payments")
+@idempotent
 def make_worker_payment(worker_id: int, payment: WorkerPaymentCreate, db: Session = Depends(get_db)):
     worker = db.query(Workers).filter(Workers.id == worker_id).first()
     if not worker:
@@ -512,6 +592,15 @@ def make_worker_payment(worker_id: int, payment: WorkerPaymentCreate, db: Sessio
         work_done=payment.work_done
     )
     db.add(new_payment)
+    db.flush()
+    record(db, PAYMENT_SUCCEEDED, {
+        "payment_kind": "worker",
+        "payment_id": new_payment.id,
+        "payee_user_id": worker.user_id,
+        "amount": amount,
+        "payment_type": "worker",
+        "reference": None,
+    })
     db.commit()
     db.refresh(new_payment)
 
@@ -587,9 +676,6 @@ def weekly_earnings(db: Session, worker_id: int):
         )
         .scalar()
     )
-    print("This week earnings:", this_week)
-    print("Start this week:", start_this_week)
-    print("Start last week:", start_last_week)
 
     last_week = (
         db.query(func.coalesce(func.sum(WorkerPayments.amount), 0))
@@ -677,7 +763,7 @@ def worker_earnings_summary(
     return build_earnings_summary(db, worker_id)
 
 
-@router.get("/admin/all")
+@router.get("/admin/all", dependencies=[Depends(rate_limit(ANALYTICS_PER_USER, ANALYTICS_PER_ROUTE))])
 def list_cleaners_analytics(db: Session = Depends(get_db)):
     workers = (
         db.query(Workers)
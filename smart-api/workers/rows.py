@@ -0,0 +1,273 @@
+# workers/rows.py
+# Worker and review rows built from selected columns, in the shapes of
+# WorkerResponse and WorkerRatingResponse. Each child collection is one
+# query grouped by worker, instead of six lazy loads per worker. WORKERS is
+# the projection behind ``?fields=``/``?include=`` (fieldsets.py).
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from fieldsets import Column, Projection, Relation, Selection
+from models import (
+    Booking,
+    Language,
+    WorkerAvailability,
+    WorkerEmergencyContact,
+    WorkerEquipment,
+    WorkerLanguages,
+    WorkerRating,
+    WorkerService,
+    Workers,
+)
+from storage import signed_reference
+from storage.images import variant_urls
+
+_VARIANT_KEYS = ("thumb", "medium", "thumb_jpeg", "medium_jpeg")
+
+
+def _variants(reference: Optional[str]) -> Optional[Dict[str, str]]:
+    urls = variant_urls(reference)
+    return {key: urls[key] for key in _VARIANT_KEYS} if urls else None
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+@dataclass(slots=True)
+class EmergencyContactRow:
+    name: str
+    phone_number: str
+    relationship_to_worker: Optional[str]
+    id: int
+
+
+@dataclass(slots=True)
+class EquipmentRow:
+    equipment_name: str
+    has_equipment: bool
+    equipment_image: Optional[str]
+    equipment_description: Optional[str]
+    equipment_status: Optional[str]
+    id: int
+    equipment_image_variants: Optional[Dict[str, str]]
+
+
+@dataclass(slots=True)
+class WorkerServiceRow:
+    category_id: int
+    experience_years: int
+    id: int
+
+
+@dataclass(slots=True)
+class AvailabilityRow:
+    day_of_week: str
+    start_time: str
+    end_time: str
+    id: int
+
+
+@dataclass(slots=True)
+class RatingRow:
+    rating: float
+    review: Optional[str]
+    id: int
+    created_at: datetime
+    booking_id: Optional[int]
+
+
+@dataclass(slots=True)
+class LanguageRow:
+    name: str
+    id: int
+
+
+@dataclass(slots=True)
+class WorkerLanguageRow:
+    language_id: int
+    id: int
+    language: Optional[LanguageRow]
+
+
+@dataclass(slots=True)
+class WorkerRow:
+    worker_type: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    organization_name: Optional[str]
+    phone_number: str
+    address: Optional[str]
+    profile_picture: Optional[str]
+    national_id_number: Optional[str]
+    national_id_proof: Optional[str]
+    good_conduct_number: Optional[str]
+    good_conduct_proof: Optional[str]
+    good_conduct_issue_date: Optional[datetime]
+    good_conduct_expiry_date: Optional[datetime]
+    mpesa_number: str
+    bank_name: Optional[str]
+    bank_account_name: Optional[str]
+    bank_account_number: Optional[str]
+    id: int
+    public_id: str
+    average_rating: Optional[float]
+    jobs_completed: Optional[int]
+    notifications_enabled: Optional[bool]
+    chat_enabled: Optional[bool]
+    agreement_accepted: Optional[bool]
+    emergency_contacts: List[EmergencyContactRow] = field(default_factory=list)
+    equipments: List[EquipmentRow] = field(default_factory=list)
+    services: List[WorkerServiceRow] = field(default_factory=list)
+    availabilities: List[AvailabilityRow] = field(default_factory=list)
+    ratings: List[RatingRow] = field(default_factory=list)
+    languages: List[WorkerLanguageRow] = field(default_factory=list)
+    notifications: list = field(default_factory=list)
+    job_stats: Optional[dict] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
+
+
+def _grouped(db: Session, statement, build) -> Dict[int, list]:
+    """Run ``statement`` (worker_id first) and group ``build(*rest)`` by worker"""
+    groups: Dict[int, list] = {}
+    for worker_id, *values in db.execute(statement):
+        groups.setdefault(worker_id, []).append(build(*values))
+    return groups
+
+
+def _rating_columns():
+    return (WorkerRating.rating, WorkerRating.review, WorkerRating.id, WorkerRating.created_at,
+            WorkerRating.booking_id)
+
+
+def _rating(rating, review, rating_id, created_at, booking_id) -> RatingRow:
+    return RatingRow(_float(rating), review, rating_id, created_at, booking_id)
+
+
+def _contacts(db: Session, worker_ids) -> Dict[int, List[EmergencyContactRow]]:
+    return _grouped(db, select(
+        WorkerEmergencyContact.worker_id, WorkerEmergencyContact.name, WorkerEmergencyContact.phone_number,
+        WorkerEmergencyContact.relationship_to_worker, WorkerEmergencyContact.id,
+    ).where(WorkerEmergencyContact.worker_id.in_(worker_ids)).order_by(WorkerEmergencyContact.id),
+        EmergencyContactRow)
+
+
+def _equipments(db: Session, worker_ids) -> Dict[int, List[EquipmentRow]]:
+    return _grouped(db, select(
+        WorkerEquipment.worker_id, WorkerEquipment.equipment_name, WorkerEquipment.has_equipment,
+        WorkerEquipment.equipment_image, WorkerEquipment.equipment_description, WorkerEquipment.equipment_status,
+        WorkerEquipment.id,
+    ).where(WorkerEquipment.worker_id.in_(worker_ids)).order_by(WorkerEquipment.id),
+        lambda *values: EquipmentRow(*values, _variants(values[2])))
+
+
+def _services(db: Session, worker_ids) -> Dict[int, List[WorkerServiceRow]]:
+    return _grouped(db, select(
+        WorkerService.worker_id, WorkerService.category_id, WorkerService.experience_years, WorkerService.id,
+    ).where(WorkerService.worker_id.in_(worker_ids)).order_by(WorkerService.id), WorkerServiceRow)
+
+
+def _availabilities(db: Session, worker_ids) -> Dict[int, List[AvailabilityRow]]:
+    # Stored as 0-6 (and as names by older clients); the schema declares a string
+    return _grouped(db, select(
+        WorkerAvailability.worker_id, WorkerAvailability.day_of_week, WorkerAvailability.start_time,
+        WorkerAvailability.end_time, WorkerAvailability.id,
+    ).where(WorkerAvailability.worker_id.in_(worker_ids)).order_by(WorkerAvailability.id),
+        lambda day, *rest: AvailabilityRow(str(day), *rest))
+
+
+def _ratings(db: Session, worker_ids) -> Dict[int, List[RatingRow]]:
+    return _grouped(db, select(WorkerRating.worker_id, *_rating_columns())
+                    .where(WorkerRating.worker_id.in_(worker_ids)).order_by(WorkerRating.id), _rating)
+
+
+def _languages(db: Session, worker_ids) -> Dict[int, List[WorkerLanguageRow]]:
+    return _grouped(db, select(
+        WorkerLanguages.worker_id, WorkerLanguages.language_id, WorkerLanguages.id, Language.name, Language.id,
+    ).outerjoin(Language, Language.id == WorkerLanguages.language_id)
+        .where(WorkerLanguages.worker_id.in_(worker_ids)).order_by(WorkerLanguages.id),
+        lambda language_id, row_id, name, lang_id: WorkerLanguageRow(
+            language_id, row_id, LanguageRow(name, lang_id) if lang_id is not None else None,
+        ))
+
+
+def _no_notifications(db: Session, worker_ids) -> dict:
+    # Workers have no notifications relationship; kept for the response shape
+    return {}
+
+
+def _job_stats(db: Session, worker_ids) -> Dict[int, dict]:
+    counts: Dict[int, Dict[str, int]] = {}
+    statement = (
+        select(Booking.worker_id, Booking.status, func.count(Booking.id))
+        .where(Booking.worker_id.in_(worker_ids))
+        .group_by(Booking.worker_id, Booking.status)
+    )
+    for worker_id, status, count in db.execute(statement):
+        counts.setdefault(worker_id, {})[status] = count
+    return {
+        worker_id: {
+            "total_jobs": sum(by_status.values()),
+            "completed_jobs": by_status.get("completed", 0),
+            "pending_jobs": by_status.get("pending", 0) + by_status.get("pending_payment", 0),
+            "cancelled_jobs": by_status.get("cancelled", 0),
+            "rejected_jobs": by_status.get("rejected", 0),
+            "accepted_jobs": by_status.get("confirmed", 0) + by_status.get("in_progress", 0),
+        }
+        for worker_id, by_status in counts.items()
+    }
+
+
+def _none():
+    return None
+
+
+WORKERS = Projection("worker", [
+    Column("worker_type", Workers.worker_type),
+    Column("first_name", Workers.first_name),
+    Column("last_name", Workers.last_name),
+    Column("organization_name", Workers.organization_name),
+    Column("phone_number", Workers.phone_number),
+    Column("address", Workers.address),
+    Column("profile_picture", Workers.profile_picture),
+    Column("national_id_number", Workers.national_id_number),
+    # The model keeps only the front and back images, not a single proof
+    Column("national_id_proof"),
+    Column("good_conduct_number", Workers.good_conduct_number),
+    Column("good_conduct_proof", Workers.good_conduct_proof, signed_reference),
+    Column("good_conduct_issue_date", Workers.good_conduct_issue_date),
+    Column("good_conduct_expiry_date", Workers.good_conduct_expiry_date),
+    Column("mpesa_number", Workers.mpesa_number),
+    Column("bank_name", Workers.bank_name),
+    Column("bank_account_name", Workers.bank_account_name),
+    Column("bank_account_number", Workers.bank_account_number),
+    Column("id", Workers.id),
+    Column("public_id", Workers.public_id),
+    Column("average_rating", Workers.average_rating, float),
+    Column("jobs_completed", Workers.jobs_completed),
+    Column("notifications_enabled", Workers.notifications_enabled),
+    Column("chat_enabled", Workers.chat_enabled),
+    Column("agreement_accepted", Workers.agreement_accepted),
+    Relation("emergency_contacts", _contacts),
+    Relation("equipments", _equipments),
+    Relation("services", _services),
+    Relation("availabilities", _availabilities),
+    Relation("ratings", _ratings),
+    Relation("languages", _languages),
+    Relation("notifications", _no_notifications),
+    Relation("job_stats", _job_stats, default=_none),
+    Column("profile_picture_variants", Workers.profile_picture, _variants),
+], row=WorkerRow)
+
+
+def worker_rows(db: Session, *criteria, selection: Optional[Selection] = None) -> List[WorkerRow]:
+    """Workers matching ``criteria`` (all when none), ordered by id"""
+    return WORKERS.rows(db, selection or WORKERS.full(omit=("job_stats",)), *criteria, order_by=Workers.id)
+
+
+def rating_rows(db: Session, worker_id: int) -> List[RatingRow]:
+    statement = select(*_rating_columns()).where(WorkerRating.worker_id == worker_id).order_by(WorkerRating.id)
+    return [_rating(*row) for row in db.execute(statement)]
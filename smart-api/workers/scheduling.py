@@ -0,0 +1,297 @@
+# workers/scheduling.py
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from models import Booking, WorkerAvailability
+from .availability import DEFAULT_WINDOW, TimeRange, weekly_windows
+
+
+# Bookings have no end time, so each one is assumed to occupy this long
+DEFAULT_JOB_MINUTES = 120
+
+# Bookings in these states hold the worker's time
+BLOCKING_STATUSES = ("pending", "pending_payment", "assigned", "confirmed", "in_progress")
+
+# Full rebuild interval; committed booking changes are applied incrementally
+SCHEDULE_INDEX_TTL_SECONDS = 900
+
+
+def booking_interval(appointment_datetime: datetime, duration_minutes: int = DEFAULT_JOB_MINUTES) -> Tuple[datetime, datetime]:
+    return appointment_datetime, appointment_datetime + timedelta(minutes=duration_minutes)
+
+
+class WorkerBusyIntervals:
+    """A worker's booked time as sorted, merged, non-overlapping blocks.
+
+    Keeping the blocks disjoint means an overlap check only has to look at the
+    block starting just before the query and the one after it: two bisects.
+    """
+
+    def __init__(self):
+        self.bookings: Dict[int, Tuple[datetime, datetime]] = {}
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return True
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, booking_id: int, start: datetime, end: datetime):
+        self.bookings[booking_id] = (start, end)
+        # Absorb every block touching [start, end), then insert the merged block
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+            del self.starts[lo:hi]
+            del self.ends[lo:hi]
+        self.starts.insert(lo, start)
+        self.ends.insert(lo, end)
+
+    def remove(self, booking_id: int):
+        if self.bookings.pop(booking_id, None) is None:
+            return
+        # Merged blocks cannot be split, so rebuild this worker's blocks only
+        remaining = sorted(self.bookings.items(), key=lambda item: item[1])
+        self.bookings, self.starts, self.ends = {}, [], []
+        for other_id, (start, end) in remaining:
+            self.add(other_id, start, end)
+
+    def between(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Busy blocks intersecting [start, end)"""
+        i = max(bisect_right(self.starts, start) - 1, 0)
+        blocks = []
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.ends[i] > start:
+                blocks.append((self.starts[i], self.ends[i]))
+            i += 1
+        return blocks
+
+
+class ScheduleIndex:
+    """Per-worker availability windows and busy intervals"""
+
+    def __init__(self):
+        self.windows: Dict[int, Dict[int, List[TimeRange]]] = {}
+        self.busy: Dict[int, WorkerBusyIntervals] = defaultdict(WorkerBusyIntervals)
+        self.booking_workers: Dict[int, int] = {}
+        self.built_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, db: Session) -> "ScheduleIndex":
+        index = cls()
+
+        rows = defaultdict(list)
+        for row in db.query(
+            WorkerAvailability.worker_id, WorkerAvailability.day_of_week,
+            WorkerAvailability.start_time, WorkerAvailability.end_time,
+        ):
+            rows[row.worker_id].append(row)
+        index.windows = {worker_id: weekly_windows(worker_rows) for worker_id, worker_rows in rows.items()}
+
+        for booking_id, worker_id, appointment in db.query(
+            Booking.id, Booking.worker_id, Booking.appointment_datetime
+        ).filter(
+            Booking.worker_id.isnot(None),
+            Booking.status.in_(BLOCKING_STATUSES),
+        ):
+            index.add_booking(booking_id, worker_id, appointment)
+        return index
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.built_at < SCHEDULE_INDEX_TTL_SECONDS
+
+    def add_booking(self, booking_id: int, worker_id: int, appointment: datetime):
+        with self.lock:
+            self.remove_booking(booking_id)
+            self.busy[worker_id].add(booking_id, *booking_interval(appointment))
+            self.booking_workers[booking_id] = worker_id
+
+    def remove_booking(self, booking_id: int):
+        with self.lock:
+            worker_id = self.booking_workers.pop(booking_id, None)
+            if worker_id is not None:
+                self.busy[worker_id].remove(booking_id)
+
+    def reload_worker(self, db: Session, worker_id: int):
+        """Replace one worker's busy time with what the database holds now"""
+        rows = db.query(Booking.id, Booking.appointment_datetime).filter(
+            Booking.worker_id == worker_id,
+            Booking.status.in_(BLOCKING_STATUSES),
+        ).all()
+        with self.lock:
+            for booking_id in list(self.busy.get(worker_id, WorkerBusyIntervals()).bookings):
+                self.booking_workers.pop(booking_id, None)
+            self.busy[worker_id] = WorkerBusyIntervals()
+            for booking_id, appointment in rows:
+                self.add_booking(booking_id, worker_id, appointment)
+
+    def windows_on(self, worker_id: int, day: date) -> List[TimeRange]:
+        # Workers that never declared availability get the default window every day
+        if worker_id not in self.windows:
+            return [DEFAULT_WINDOW]
+        return self.windows[worker_id].get(day.weekday(), [])
+
+    def is_busy(self, worker_id: int, start: datetime, end: datetime) -> bool:
+        with self.lock:
+            busy = self.busy.get(worker_id)
+            return busy is not None and busy.overlaps(start, end)
+
+    def is_available(self, worker_id: int, start: datetime, end: datetime) -> bool:
+        """Inside a declared window and not already booked"""
+        if start.date() != end.date() and end != datetime.combine(start.date() + timedelta(days=1), datetime.min.time()):
+            return False
+        first = start.hour * 60 + start.minute
+        last = first + int((end - start).total_seconds() // 60)
+        if not any(window.contains(first, last) for window in self.windows_on(worker_id, start.date())):
+            return False
+        return not self.is_busy(worker_id, start, end)
+
+    def free_slots(self, worker_id: int, day: date, min_minutes: int = DEFAULT_JOB_MINUTES) -> List[Tuple[datetime, datetime]]:
+        """Availability windows on ``day`` minus booked time"""
+        slots = []
+        with self.lock:
+            busy = self.busy.get(worker_id)
+            for window in self.windows_on(worker_id, day):
+                cursor, window_end = window.on(day)
+                blocks = busy.between(cursor, window_end) if busy else []
+                for block_start, block_end in blocks:
+                    if block_start > cursor:
+                        slots.append((cursor, block_start))
+                    cursor = max(cursor, block_end)
+                if cursor < window_end:
+                    slots.append((cursor, window_end))
+
+        minimum = timedelta(minutes=min_minutes)
+        return [(start, end) for start, end in slots if end - start >= minimum]
+
+
+_schedule_index: Optional[ScheduleIndex] = None
+_schedule_index_lock = threading.Lock()
+
+
+def get_schedule_index(db: Session) -> ScheduleIndex:
+    global _schedule_index
+
+    with _schedule_index_lock:
+        if _schedule_index is None or not _schedule_index.is_fresh():
+            _schedule_index = ScheduleIndex.build(db)
+        return _schedule_index
+
+
+def invalidate_schedule_index(*args):
+    global _schedule_index
+    _schedule_index = None
+
+
+# Availability changes drop the index once their transaction commits; a
+# rebuild between flush and commit would cache rows that may be rolled back.
+def _queue_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["schedule_index_stale"] = True
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(WorkerAvailability, _event_name, _queue_invalidation)
+
+
+# Booking changes are queued on the session and only reach the index once the
+# transaction commits, so rolled back bookings never block a slot.
+def _queue_booking_change(target, deleted: bool = False):
+    session = object_session(target)
+    if session is None:
+        return
+    pending = session.info.setdefault("schedule_changes", {})
+    if deleted or target.worker_id is None or target.status not in BLOCKING_STATUSES:
+        pending[target.id] = None
+    else:
+        pending[target.id] = (target.worker_id, target.appointment_datetime)
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+def _booking_saved(mapper, connection, target):
+    _queue_booking_change(target)
+
+
+@event.listens_for(Booking, "after_delete")
+def _booking_deleted(mapper, connection, target):
+    _queue_booking_change(target, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_booking_changes(session):
+    if session.info.pop("schedule_index_stale", False):
+        invalidate_schedule_index()
+    pending = session.info.pop("schedule_changes", None)
+    index = _schedule_index
+    if not pending or index is None:
+        return
+    for booking_id, change in pending.items():
+        if change is None:
+            index.remove_booking(booking_id)
+        else:
+            index.add_booking(booking_id, *change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_booking_changes(session):
+    session.info.pop("schedule_changes", None)
+    session.info.pop("schedule_index_stale", None)
+
+
+# ==========================
+# BOOKING CONFLICTS
+# ==========================
+# Serialises conflict check + insert per worker within this process; callers
+# also lock the worker row (SELECT ... FOR UPDATE) to cover other processes.
+_worker_locks: Dict[int, threading.Lock] = defaultdict(threading.Lock)
+_worker_locks_guard = threading.Lock()
+
+
+def worker_lock(worker_id: int) -> threading.Lock:
+    with _worker_locks_guard:
+        return _worker_locks[worker_id]
+
+
+def has_booking_conflict(
+    db: Session,
+    worker_id: int,
+    appointment_datetime: datetime,
+    duration_minutes: int = DEFAULT_JOB_MINUTES,
+    exclude_booking_id: Optional[int] = None,
+) -> bool:
+    """Whether the worker already has a blocking booking overlapping the slot.
+
+    The database decides: a range scan on (worker_id, appointment_datetime)
+    sees bookings committed, cancelled or moved by other API processes. The
+    in-memory index only learns about those on rebuild, so when it claims a
+    conflict the database does not confirm, that worker's entry is reloaded.
+    """
+    start, end = booking_interval(appointment_datetime, duration_minutes)
+    query = db.query(Booking.id).filter(
+        Booking.worker_id == worker_id,
+        Booking.status.in_(BLOCKING_STATUSES),
+        Booking.appointment_datetime > start - timedelta(minutes=DEFAULT_JOB_MINUTES),
+        Booking.appointment_datetime < end,
+    )
+    if exclude_booking_id is not None:
+        query = query.filter(Booking.id != exclude_booking_id)
+    conflict = db.query(query.exists()).scalar()
+
+    index = get_schedule_index(db)
+    if not conflict and exclude_booking_id is None and index.is_busy(worker_id, start, end):
+        index.reload_worker(db, worker_id)
+    return conflict